@@ -1,5 +1,17 @@
 from __future__ import annotations
 
-from .dargs import Argument, ArgumentEncoder, Variant
+from .dargs import (
+    Argument,
+    ArgumentDecoder,
+    ArgumentEncoder,
+    ArgumentVisitor,
+    Variant,
+)
 
-__all__ = ["Argument", "ArgumentEncoder", "Variant"]
+__all__ = [
+    "Argument",
+    "ArgumentDecoder",
+    "ArgumentEncoder",
+    "ArgumentVisitor",
+    "Variant",
+]
@@ -1,9 +1,37 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from typing import cast
 
 from dargs.dargs import Argument
 
+# the recent Arguments wrapping lists of arguments, by the ids of the
+# arguments. A wrapper holds all the arguments of its list, so their ids can
+# not be reused while it is kept; at most _BASE_CACHE_MAXSIZE lists are kept
+# alive by the cache, and nothing is stored on the arguments themselves.
+_BASE_CACHE: OrderedDict[tuple[int, ...], Argument] = OrderedDict()
+_BASE_CACHE_MAXSIZE = 16
+_BASE_CACHE_LOCK = threading.Lock()
+
+
+def _base_argument(arginfo: list[Argument] | tuple[Argument, ...]) -> Argument:
+    """Wrap a list of arguments into one, reusing the recent wrappers."""
+    if not arginfo:
+        return Argument("base", dtype=dict, sub_fields=[])
+    key = tuple(map(id, arginfo))
+    with _BASE_CACHE_LOCK:
+        base = _BASE_CACHE.get(key)
+        if base is not None:
+            _BASE_CACHE.move_to_end(key)
+            return base
+    base = Argument("base", dtype=dict, sub_fields=cast("list[Argument]", arginfo))
+    with _BASE_CACHE_LOCK:
+        _BASE_CACHE[key] = base
+        while len(_BASE_CACHE) > _BASE_CACHE_MAXSIZE:
+            _BASE_CACHE.popitem(last=False)
+    return base
+
 
 def check(
     arginfo: Argument | list[Argument] | tuple[Argument, ...],
@@ -11,6 +39,7 @@ def check(
     strict: bool = True,
     trim_pattern: str = "_*",
     allow_ref: bool = False,
+    allow_ndarray: bool = False,
 ) -> dict:
     """Check and normalize input data.
 
@@ -27,17 +56,66 @@ def check(
     allow_ref : bool, optional
         If True, allow loading from external files via the ``$ref`` key,
         by default False.
+    allow_ndarray : bool, optional
+        If True, accept one-dimensional `numpy.ndarray` values for the
+        arguments of `List[int]` or `List[float]`, by default False.
+        The arrays are kept in the normalized data.
 
     Returns
     -------
     dict
         normalized data
     """
-    if isinstance(arginfo, (list, tuple)):
-        arginfo = Argument(
-            "base", dtype=dict, sub_fields=cast("list[Argument]", arginfo)
-        )
+    if not isinstance(arginfo, Argument):
+        arginfo = _base_argument(arginfo)
 
     data = arginfo.normalize_value(data, trim_pattern=trim_pattern, allow_ref=allow_ref)
-    arginfo.check_value(data, strict=strict, allow_ref=allow_ref)
+    arginfo.check_value(
+        data, strict=strict, allow_ref=allow_ref, allow_ndarray=allow_ndarray
+    )
+    return data
+
+
+async def acheck(
+    arginfo: Argument | list[Argument] | tuple[Argument, ...],
+    data: dict,
+    strict: bool = True,
+    trim_pattern: str = "_*",
+    allow_ref: bool = False,
+    allow_ndarray: bool = False,
+) -> dict:
+    """Asynchronous version of :func:`check`.
+
+    Parameters
+    ----------
+    arginfo : Union[Argument, List[Argument], Tuple[Argument, ...]]
+        Argument object
+    data : dict
+        data to check
+    strict : bool, optional
+        If True, raise an error if the key is not pre-defined, by default True
+    trim_pattern : str, optional
+        Pattern to trim the key, by default "_*"
+    allow_ref : bool, optional
+        If True, allow loading from external files via the ``$ref`` key,
+        by default False.
+    allow_ndarray : bool, optional
+        If True, accept one-dimensional `numpy.ndarray` values for the
+        arguments of `List[int]` or `List[float]`, by default False.
+        The arrays are kept in the normalized data.
+
+    Returns
+    -------
+    dict
+        normalized data
+    """
+    if not isinstance(arginfo, Argument):
+        arginfo = _base_argument(arginfo)
+
+    data = await arginfo.anormalize_value(
+        data, trim_pattern=trim_pattern, allow_ref=allow_ref
+    )
+    await arginfo.acheck_value(
+        data, strict=strict, allow_ref=allow_ref, allow_ndarray=allow_ndarray
+    )
     return data
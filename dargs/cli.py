@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
 from typing import IO, Any
 
 from dargs._version import __version__
 from dargs.check import check
+from dargs.dargs import Argument, ArgumentDecoder, ArgumentEncoder
 
 
 def main_parser() -> argparse.ArgumentParser:
@@ -26,19 +28,25 @@ def main_parser() -> argparse.ArgumentParser:
         help="Check a JSON file against an Argument",
         epilog="Example: dargs check -f dargs._test.test_arguments test_arguments.json",
     )
-    parser_check.add_argument(
+    group_check = parser_check.add_mutually_exclusive_group(required=True)
+    group_check.add_argument(
         "-f",
         "--func",
         type=str,
         help="Function that returns an Argument object. E.g., `dargs._test.test_arguments`",
-        required=True,
+    )
+    group_check.add_argument(
+        "--schema",
+        type=str,
+        help="Path to the Argument objects saved by `dargs export`, "
+        "used instead of importing a function",
     )
     parser_check.add_argument(
         "jdata",
-        type=argparse.FileType("r"),
-        default=[sys.stdin],
+        type=str,
+        default=["-"],
         nargs="*",
-        help="Path to the JSON file. If not given, read from stdin.",
+        help="Path to the JSON file. If not given or `-`, read from stdin.",
     )
     parser_check.add_argument(
         "--no-strict",
@@ -60,26 +68,140 @@ def main_parser() -> argparse.ArgumentParser:
     )
     parser_check.set_defaults(entrypoint=check_cli)
 
+    # normalize subcommand
+    parser_normalize = subparsers.add_parser(
+        "normalize",
+        help="Normalize a JSON file against an Argument",
+        epilog="Example: dargs normalize -f dargs._test.test_arguments test_arguments.json",
+    )
+    group_normalize = parser_normalize.add_mutually_exclusive_group(required=True)
+    group_normalize.add_argument(
+        "-f",
+        "--func",
+        type=str,
+        help="Function that returns an Argument object. E.g., `dargs._test.test_arguments`",
+    )
+    group_normalize.add_argument(
+        "--schema",
+        type=str,
+        help="Path to the Argument objects saved by `dargs export`, "
+        "used instead of importing a function",
+    )
+    parser_normalize.add_argument(
+        "jdata",
+        type=str,
+        default=["-"],
+        nargs="*",
+        help="Path to the JSON file. If not given or `-`, read from stdin.",
+    )
+    parser_normalize.add_argument(
+        "-o",
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Directory to write the normalized JSON files, named after the input files. "
+        "If not given, write to stdout, one document per line.",
+    )
+    parser_normalize.add_argument(
+        "--indent",
+        type=int,
+        default=None,
+        help="Indentation of the output JSON. If not given, the output is compact.",
+    )
+    parser_normalize.add_argument(
+        "--no-strict",
+        action="store_false",
+        dest="strict",
+        help="Do not raise an error if the key is not pre-defined",
+    )
+    parser_normalize.add_argument(
+        "--trim-pattern",
+        type=str,
+        default="_*",
+        help="Pattern to trim the key",
+    )
+    parser_normalize.add_argument(
+        "--allow-ref",
+        action="store_true",
+        dest="allow_ref",
+        help="Allow loading from external files via the $ref key",
+    )
+    parser_normalize.set_defaults(entrypoint=normalize_cli)
+
     # doc subcommand
     parser_doc = subparsers.add_parser(
         "doc",
         help="Print documentation for an Argument",
         epilog="Example: dargs doc dargs._test.test_arguments [arg_path]",
     )
-    parser_doc.add_argument(
+    group_doc = parser_doc.add_mutually_exclusive_group(required=True)
+    group_doc.add_argument(
         "func",
         type=str,
+        nargs="?",
+        default=None,
         help="Function that returns an Argument or list of Arguments. E.g., `dargs._test.test_arguments`",
     )
-    parser_doc.add_argument(
+    group_doc.add_argument(
+        "--schema",
+        type=str,
+        default=None,
+        help="Path to the Argument objects saved by `dargs export`, "
+        "used instead of importing a function",
+    )
+    group_doc_arg = parser_doc.add_mutually_exclusive_group()
+    group_doc_arg.add_argument(
         "arg",
         type=str,
         nargs="?",
-        default=None,
+        # not to override --arg
+        default=argparse.SUPPRESS,
         help="Optional argument path (e.g., 'base/sub1'). If not provided, prints all top-level arguments.",
     )
+    group_doc_arg.add_argument(
+        "--arg",
+        type=str,
+        dest="arg",
+        default=None,
+        help="Argument path, the same as the positional one. Required to give the path with --schema.",
+    )
     parser_doc.set_defaults(entrypoint=doc_cli)
 
+    # export subcommand
+    parser_export = subparsers.add_parser(
+        "export",
+        help="Save an Argument to a JSON file, to be used by --schema",
+        epilog="Example: dargs export -f dargs._test.test_arguments -o arguments.json",
+    )
+    parser_export.add_argument(
+        "-f",
+        "--func",
+        type=str,
+        help="Function that returns an Argument or list of Arguments. E.g., `dargs._test.test_arguments`",
+        required=True,
+    )
+    parser_export.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="Path to the output JSON file. If not given, write to stdout.",
+    )
+    parser_export.add_argument(
+        "--indent",
+        type=int,
+        default=None,
+        help="Indentation of the output JSON. If not given, the output is compact.",
+    )
+    parser_export.add_argument(
+        "--drop-extra-check",
+        action="store_true",
+        dest="drop_extra_check",
+        help="Export even if some arguments have an extra_check, which is not saved, "
+        "so that --schema does not run it",
+    )
+    parser_export.set_defaults(entrypoint=export_cli)
+
     # --version
     parser.add_argument("--version", action="version", version=__version__)
     return parser
@@ -93,81 +215,234 @@ def main() -> None:
     args.entrypoint(**vars(args))
 
 
+def _import_func(func: str) -> Any:
+    """Import a function given by its full name.
+
+    Parameters
+    ----------
+    func : str
+        Full name of the function, e.g., `dargs._test.test_arguments`
+
+    Returns
+    -------
+    Any
+        The imported function
+    """
+    try:
+        module_name, attr_name = func.strip().rsplit(".", 1)
+    except ValueError as e:
+        raise RuntimeError(
+            f'Function must be in format "module.function", got: "{func}"'
+        ) from e
+    try:
+        mod = __import__(module_name, globals(), locals(), [attr_name])
+    except ImportError as e:
+        raise RuntimeError(
+            f'Failed to import "{attr_name}" from "{module_name}".\n{sys.exc_info()[1]}'
+        ) from e
+
+    if not hasattr(mod, attr_name):
+        raise RuntimeError(f'Module "{module_name}" has no attribute "{attr_name}"')
+    return getattr(mod, attr_name)
+
+
+def _load_arginfo(func: str | None, schema: str | None) -> Any:
+    """Get the Argument objects from a function or a file saved by `dargs export`.
+
+    Parameters
+    ----------
+    func : str, optional
+        Full name of the function returning the Argument objects
+    schema : str, optional
+        Path to the JSON file of the Argument objects, used if given
+
+    Returns
+    -------
+    Any
+        The Argument or list of Arguments
+    """
+    if schema is None:
+        if func is None:
+            raise RuntimeError("Either a function or --schema must be given")
+        return _import_func(func)()
+    with open(schema, "rb") as f:
+        arginfo = json.loads(f.read(), cls=ArgumentDecoder)
+    items = arginfo if isinstance(arginfo, list) else [arginfo]
+    if not all(isinstance(aa, Argument) for aa in items):
+        raise RuntimeError(
+            f'"{schema}" does not contain Argument objects written by `dargs export`'
+        )
+    return arginfo
+
+
+def _load_json(jdata: str | IO) -> Any:
+    """Load JSON data from a file path, stdin, or a file object.
+
+    A file given by its path is opened only here and read in bulk as bytes,
+    so that files are opened one at a time and decoded by :func:`json.loads`
+    in one pass instead of through a text-mode stream.
+
+    Parameters
+    ----------
+    jdata : str or IO
+        Path to the JSON file, `-` for stdin, or a file object
+
+    Returns
+    -------
+    Any
+        The loaded data
+    """
+    if not isinstance(jdata, str):
+        return json.loads(jdata.read())
+    if jdata == "-":
+        return json.loads(sys.stdin.buffer.read())
+    with open(jdata, "rb") as f:
+        return json.loads(f.read())
+
+
 def check_cli(
     *,
-    func: str,
-    jdata: list[IO],
+    func: str | None = None,
+    jdata: list[str | IO],
     strict: bool,
     allow_ref: bool = False,
+    schema: str | None = None,
     **kwargs: Any,
 ) -> None:
     """Normalize and check input data.
 
     Parameters
     ----------
-    func : str
+    func : str, optional
         Function that returns an Argument object. E.g., `dargs._test.test_arguments`
-    jdata : IO
-        File object that contains the JSON data
+    jdata : list[str or IO]
+        Paths to the JSON files (`-` for stdin) or file objects
     strict : bool
         If True, raise an error if the key is not pre-defined
     allow_ref : bool, optional
         If True, allow loading from external files via the ``$ref`` key
+    schema : str, optional
+        Path to the Argument objects saved by `dargs export`, used instead of func
 
     Returns
     -------
     dict
         normalized data
     """
-    module_name, attr_name = func.strip().rsplit(".", 1)
-    try:
-        mod = __import__(module_name, globals(), locals(), [attr_name])
-    except ImportError as e:
-        raise RuntimeError(
-            f'Failed to import "{attr_name}" from "{module_name}".\n{sys.exc_info()[1]}'
-        ) from e
-
-    if not hasattr(mod, attr_name):
-        raise RuntimeError(f'Module "{module_name}" has no attribute "{attr_name}"')
-    func_obj = getattr(mod, attr_name)
-    arginfo = func_obj()
+    arginfo = _load_arginfo(func, schema)
     for jj in jdata:
-        data = json.load(jj)
+        data = _load_json(jj)
         check(arginfo, data, strict=strict, allow_ref=allow_ref)
 
 
+def normalize_cli(
+    *,
+    func: str | None = None,
+    jdata: list[str | IO],
+    output_dir: str | None = None,
+    indent: int | None = None,
+    strict: bool = True,
+    trim_pattern: str = "_*",
+    allow_ref: bool = False,
+    schema: str | None = None,
+    **kwargs: Any,
+) -> None:
+    """Normalize and check input data, then write the normalized data.
+
+    The normalized data is serialized incrementally to the output stream,
+    so the full JSON string of a document is never held in memory.
+
+    Parameters
+    ----------
+    func : str, optional
+        Function that returns an Argument object. E.g., `dargs._test.test_arguments`
+    jdata : list[str or IO]
+        Paths to the JSON files (`-` for stdin) or file objects
+    output_dir : str, optional
+        Directory to write the normalized files, named after the input files.
+        If not given, write the normalized data to stdout, one document per line.
+    indent : int, optional
+        Indentation of the output JSON. If not given, the output is compact.
+    strict : bool, optional
+        If True, raise an error if the key is not pre-defined
+    trim_pattern : str, optional
+        Pattern to trim the key
+    allow_ref : bool, optional
+        If True, allow loading from external files via the ``$ref`` key
+    schema : str, optional
+        Path to the Argument objects saved by `dargs export`, used instead of func
+    """
+    arginfo = _load_arginfo(func, schema)
+    if output_dir is not None:
+        out_paths = _output_paths(jdata, output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+    for ii, jj in enumerate(jdata):
+        data = _load_json(jj)
+        data = check(
+            arginfo,
+            data,
+            strict=strict,
+            trim_pattern=trim_pattern,
+            allow_ref=allow_ref,
+        )
+        if output_dir is None:
+            # json.dump writes the chunks from JSONEncoder.iterencode one by one
+            json.dump(data, sys.stdout, indent=indent)
+            sys.stdout.write("\n")
+        else:
+            with open(out_paths[ii], "w", encoding="utf-8") as fout:
+                json.dump(data, fout, indent=indent)
+                fout.write("\n")
+
+
+def _output_paths(jdata: list[str | IO], output_dir: str) -> list[str]:
+    """Name the output files after the input files, before writing any.
+
+    Raises
+    ------
+    RuntimeError
+        If an input is read from stdin, or two inputs have the same file name.
+    """
+    out_paths = []
+    seen: dict[str, str] = {}
+    for jj in jdata:
+        name = jj if isinstance(jj, str) else getattr(jj, "name", "-")
+        if not isinstance(name, str) or name in ("-", "<stdin>"):
+            raise RuntimeError(
+                "Cannot name the output file for data read from stdin; "
+                "omit --output-dir to write to stdout"
+            )
+        basename = os.path.basename(name)
+        key = os.path.normcase(basename)
+        if key in seen:
+            raise RuntimeError(
+                f"Input files {seen[key]} and {name} would both be written to "
+                f"{basename} in the output directory"
+            )
+        seen[key] = name
+        out_paths.append(os.path.join(output_dir, basename))
+    return out_paths
+
+
 def doc_cli(
     *,
-    func: str,
+    func: str | None = None,
     arg: str | None = None,
+    schema: str | None = None,
     **kwargs: Any,
 ) -> None:
     """Print documentation for an Argument.
 
     Parameters
     ----------
-    func : str
+    func : str, optional
         Function that returns an Argument or list of Arguments. E.g., `dargs._test.test_arguments`
     arg : str, optional
         Optional argument path (e.g., 'base/sub1'). If not provided, prints all top-level arguments.
+    schema : str, optional
+        Path to the Argument objects saved by `dargs export`, used instead of func
     """
-    try:
-        module_name, attr_name = func.strip().rsplit(".", 1)
-    except ValueError as e:
-        raise RuntimeError(
-            f'Function must be in format "module.function", got: "{func}"'
-        ) from e
-    try:
-        mod = __import__(module_name, globals(), locals(), [attr_name])
-    except ImportError as e:
-        raise RuntimeError(
-            f'Failed to import "{attr_name}" from "{module_name}".\n{sys.exc_info()[1]}'
-        ) from e
-
-    if not hasattr(mod, attr_name):
-        raise RuntimeError(f'Module "{module_name}" has no attribute "{attr_name}"')
-    func_obj = getattr(mod, attr_name)
-    arginfo = func_obj()
+    arginfo = _load_arginfo(func, schema)
 
     # Handle both single Argument and iterable of Arguments (list or tuple)
     if isinstance(arginfo, (list, tuple)):
@@ -180,19 +455,19 @@ def doc_cli(
         if not (
             hasattr(argument, "name")
             and hasattr(argument, "sub_fields")
-            and callable(getattr(argument, "gen_doc", None))
+            and callable(getattr(argument, "write_doc", None))
         ):
             raise RuntimeError(
                 f"Invalid argument object at index {index}: expected an object with "
-                '"name", "sub_fields", and "gen_doc()" attributes, '
+                '"name", "sub_fields", and "write_doc()" attributes, '
                 f"got {type(argument)!r}"
             )
 
     # If no specific arg path is provided, print all top-level arguments
     if arg is None:
         for argument in args_list:
-            print(argument.gen_doc())
-            print()  # Add blank line between arguments
+            argument.write_doc(sys.stdout)
+            sys.stdout.write("\n\n")  # Add blank line between arguments
     else:
         # Navigate to the specific argument by path
         path_parts = arg.split("/")
@@ -213,7 +488,8 @@ def doc_cli(
                         )
                 # Pass the parent path so gen_doc can render the full argument path
                 parent_path = path_parts[:-1]
-                print(current_arg.gen_doc(path=parent_path))
+                current_arg.write_doc(sys.stdout, path=parent_path)
+                sys.stdout.write("\n")
                 found = True
                 break
 
@@ -221,3 +497,92 @@ def doc_cli(
             raise RuntimeError(
                 f'Argument path "{arg}" not found: no top-level argument named "{path_parts[0]}"'
             )
+
+
+def export_cli(
+    *,
+    func: str,
+    output: str | None = None,
+    indent: int | None = None,
+    drop_extra_check: bool = False,
+    **kwargs: Any,
+) -> None:
+    """Save the Argument objects returned by a function to a JSON file.
+
+    The file can be given to ``--schema`` of the other commands, which then
+    do not need to import the function. The ``extra_check`` of an argument
+    is a Python callable that cannot be saved, so the export fails if any
+    argument has one, unless `drop_extra_check` is set.
+
+    Parameters
+    ----------
+    func : str
+        Function that returns an Argument or list of Arguments. E.g., `dargs._test.test_arguments`
+    output : str, optional
+        Path to the output JSON file. If not given, write to stdout.
+    indent : int, optional
+        Indentation of the output JSON. If not given, the output is compact.
+    drop_extra_check : bool, optional
+        If true, export without the ``extra_check`` of the arguments instead
+        of failing.
+    """
+    arginfo = _import_func(func)()
+    if not drop_extra_check:
+        checked = _extra_check_paths(
+            arginfo if isinstance(arginfo, (list, tuple)) else [arginfo]
+        )
+        if checked:
+            raise RuntimeError(
+                "extra_check cannot be exported, so --schema would not run it; "
+                f"found in: {', '.join(checked)}. "
+                "Use --drop-extra-check to export without them."
+            )
+    if output is None:
+        json.dump(arginfo, sys.stdout, cls=ArgumentEncoder, indent=indent)
+        sys.stdout.write("\n")
+    else:
+        with open(output, "w", encoding="utf-8") as fout:
+            json.dump(arginfo, fout, cls=ArgumentEncoder, indent=indent)
+            fout.write("\n")
+
+
+def _extra_check_paths(arguments: list[Argument]) -> list[str]:
+    """Get the paths of the arguments having an ``extra_check``.
+
+    Parameters
+    ----------
+    arguments : list[Argument]
+        The top-level arguments
+
+    Returns
+    -------
+    list[str]
+        The paths, e.g. ``base[type=a]/sub``, with the choice of a variant
+        in square brackets
+    """
+    paths = []
+    stack: list[tuple[Argument, list[str]]] = [
+        (argument, [argument.name]) for argument in reversed(arguments)
+    ]
+    seen = set()
+    while stack:
+        argument, path = stack.pop()
+        # a shared sub-argument is reported once
+        if id(argument) in seen:
+            continue
+        seen.add(id(argument))
+        if argument.extra_check is not None:
+            paths.append("/".join(path))
+        children = []
+        for variant in argument.sub_variants.values():
+            for choice in variant.choice_dict.values():
+                cpath = [*path[:-1], f"{path[-1]}[{variant.flag_name}={choice.name}]"]
+                children.extend(
+                    (subarg, [*cpath, subarg.name])
+                    for subarg in choice.sub_fields.values()
+                )
+        children[:0] = [
+            (subarg, [*path, subarg.name]) for subarg in argument.sub_fields.values()
+        ]
+        stack.extend(reversed(children))
+    return paths
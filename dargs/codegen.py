@@ -0,0 +1,701 @@
+r"""Generate a standalone validator module from a given dargs.Argument.
+
+The generated Python source does not depend on dargs: key sets, type tests,
+default values and variant dispatch are written out as plain code, with one
+function per nested argument instead of the generic traversal and its hooks.
+It can be used where dargs cannot be imported, or in hot paths.
+
+Examples
+--------
+>>> from dargs import Argument
+>>> from dargs.codegen import generate_validator
+>>> ca = Argument("base", dict, [Argument("sub", int, optional=True, default=1)])
+>>> with open("validator.py", "w") as f:
+...     f.write(generate_validator(ca))
+>>> import validator
+>>> validator.normalize({})
+{'sub': 1}
+"""
+
+from __future__ import annotations
+
+import ast
+from typing import Any, Union
+
+from dargs.dargs import Argument, _fingerprint, _Flags
+
+try:
+    from typing import get_args, get_origin
+except ImportError:
+    from typing_extensions import get_args, get_origin
+
+__all__ = ["generate_validator"]
+
+
+def generate_validator(argument: Argument, ignore_extra_check: bool = False) -> str:
+    """Generate the source of a standalone validator module.
+
+    The module provides ``check(value, strict=False)`` and
+    ``normalize(value, inplace=False, do_default=True, do_alias=True,
+    trim_pattern=None)``, which behave as :meth:`Argument.check_value` and
+    :meth:`Argument.normalize_value` of `argument`. Errors are raised as the
+    ``ArgumentKeyError``, ``ArgumentTypeError`` and ``ArgumentValueError``
+    classes defined in the module, with the same paths as in dargs. The
+    messages of type errors are shorter than the ones of typeguard.
+    ``$ref`` is not supported and always raises a ValueError, as with
+    ``allow_ref=False``.
+
+    Parameters
+    ----------
+    argument : Argument
+        The argument to generate the validator for.
+    ignore_extra_check : bool, optional
+        ``extra_check`` callables cannot be written into the module. If
+        true, they are skipped; otherwise, an error is raised.
+
+    Returns
+    -------
+    str
+        The Python source of the module.
+
+    Raises
+    ------
+    ValueError
+        If the argument uses something that cannot be generated: a type
+        other than classes, ``None``, ``Any``, ``List``, ``Dict`` and
+        ``Union``, a default value that is not a Python literal, an
+        ``extra_check`` (unless ignored), or variant choices whose keys may
+        collide.
+    """
+    return _Generator(argument, ignore_extra_check).generate()
+
+
+# passes of the generated code, in the order they are applied
+_PASSES = ("check", "alias", "default", "empty", "trim")
+_EXTRA_PARAMS = {
+    "check": ", strict",
+    "alias": "",
+    "default": "",
+    "empty": "",
+    "trim": ", rem, pattern",
+}
+
+_PREAMBLE = '''\
+import copy
+import difflib
+import fnmatch
+import re
+
+
+class ArgumentError(Exception):
+    """Base error class for invalid argument values in argchecking."""
+
+    def __init__(self, path=None, message=None):
+        super().__init__(message)
+        if path is None:
+            path = ""
+        if not isinstance(path, str):
+            path = "/".join(map(str, path))
+        self.path = path.strip("/")
+        self.message = message
+
+    def __str__(self):
+        loc_msg = "at root location" if not self.path else f"at location `{self.path}`"
+        return f"[{loc_msg}] {self.message}"
+
+
+class ArgumentKeyError(ArgumentError):
+    """Error class for missing or invalid argument keys."""
+
+
+class ArgumentTypeError(ArgumentError):
+    """Error class for invalid argument data types."""
+
+
+class ArgumentValueError(ArgumentError):
+    """Error class for missing or invalid argument values."""
+
+
+_REF_ERROR = (
+    "$ref is not allowed by default. "
+    "Pass allow_ref=True to enable loading from external files."
+)
+# stands for an empty dict default until all defaults are assigned
+_EMPTY_DICT = object()
+
+
+def _did_you_mean(choice, choices):
+    if not isinstance(choice, str):
+        return ""
+    matches = difflib.get_close_matches(choice, choices)
+    return f"Did you mean: {matches[0]}?" if matches else ""
+
+
+def _not_dict(path, value):
+    return ArgumentTypeError(
+        path,
+        f"key `{path[-1]}` gets wrong value type, "
+        f"requires dict but {type(value).__name__} is given",
+    )
+
+
+def _check_leaf(value):
+    if isinstance(value, dict) and "$ref" in value:
+        raise ValueError(_REF_ERROR)
+
+
+def _trim(argdict, rem, pattern, reserved):
+    if reserved:
+        conflict = [x for x in reserved if rem.match(x)]
+        if conflict:
+            raise ValueError(
+                f"pattern `{pattern}` conflicts with the "
+                f"following reserved names: {', '.join(conflict)}"
+            )
+    for key in [x for x in argdict if isinstance(x, str) and rem.match(x)]:
+        argdict.pop(key)
+
+
+def _trim_leaf(value, rem, pattern):
+    if isinstance(value, dict):
+        _check_leaf(value)
+        _trim(value, rem, pattern, ())
+
+'''
+
+
+class _Generator:
+    """Generate the validator module of an argument.
+
+    Parameters
+    ----------
+    argument : Argument
+        The root argument.
+    ignore_extra_check : bool
+        Whether to skip ``extra_check`` instead of raising an error.
+    """
+
+    def __init__(self, argument: Argument, ignore_extra_check: bool) -> None:
+        self.argument = argument
+        self.ignore_extra_check = ignore_extra_check
+        self.memo: dict[int, str] = {}
+        # fingerprint -> index of the functions of a nested argument
+        self.indices: dict[str, int] = {}
+        self.queue: list[Argument] = []
+        self.functions: list[str] = []
+        self.imports: set[str] = set()
+        # literal -> name of the module-level constant
+        self.constants: dict[str, str] = {}
+        self.has_empty: dict[str, bool] = {}
+
+    def generate(self) -> str:
+        root = self.argument
+        body = [
+            "def check(value, strict=False):",
+            *self._root_lines("check", root),
+            "",
+            "",
+            "def normalize(value, inplace=False, do_default=True, do_alias=True, trim_pattern=None):",
+            "    if not inplace:",
+            "        value = copy.deepcopy(value)",
+            "    if do_alias:",
+            *_indent(self._root_lines("alias", root)),
+            "    if do_default:",
+            *_indent(self._root_lines("default", root)),
+            *_indent(self._root_lines("empty", root)),
+            "    if trim_pattern is not None:",
+            "        patterns = (",
+            "            [trim_pattern] if isinstance(trim_pattern, str) else list(trim_pattern)",
+            "        )",
+            '        rem = re.compile("|".join(fnmatch.translate(pp) for pp in patterns))',
+            '        pattern = "`, `".join(patterns)',
+            *_indent(self._root_lines("trim", root)),
+            "    return value",
+        ]
+        while self.queue:
+            self._emit_functions(self.queue.pop(0))
+        parts = [
+            f'"""Validator of argument `{root.name}`, generated by dargs."""',
+            "",
+            _PREAMBLE,
+        ]
+        if self.imports:
+            parts.extend(sorted(self.imports))
+            parts.append("")
+        parts.extend(f"{name} = {literal}" for literal, name in self.constants.items())
+        parts.append("")
+        for func in self.functions:
+            parts.extend(["", func])
+        parts.extend(["", "", *body, ""])
+        return "\n".join(parts)
+
+    # helpers
+
+    def _constant(self, literal: str) -> str:
+        """Get the name of a module-level constant."""
+        name = self.constants.get(literal)
+        if name is None:
+            name = self.constants[literal] = f"_C{len(self.constants)}"
+        return name
+
+    def _index(self, argument: Argument) -> int:
+        """Get the index of the functions of a nested argument."""
+        fingerprint = _fingerprint(argument, self.memo)
+        index = self.indices.get(fingerprint)
+        if index is None:
+            index = self.indices[fingerprint] = len(self.indices)
+            self.queue.append(argument)
+        return index
+
+    def _needs_empty(self, argument: Argument) -> bool:
+        """Whether the value of the argument may be or contain an empty dict default."""
+        fingerprint = _fingerprint(argument, self.memo)
+        result = self.has_empty.get(fingerprint)
+        if result is None:
+            result = _is_empty_default(argument) or any(
+                self._needs_empty(sub) for sub in _all_subs(argument)
+            )
+            self.has_empty[fingerprint] = result
+        return result
+
+    def _root_lines(self, kind: str, root: Argument) -> list[str]:
+        """Lines of the public functions traversing the root value."""
+        if kind == "empty" and not self._needs_empty(root):
+            return []
+        lines = self._traverse_lines(kind, root, "value", "[]", [])
+        return _indent(lines) or ["    pass"]
+
+    def _traverse_lines(
+        self, kind: str, argument: Argument, var: str, path: str, tail: list[str]
+    ) -> list[str]:
+        """Lines traversing into the value `var` of `argument`.
+
+        `path` is the expression of the path of the parent, and `tail` the
+        literals appended to it for `var`.
+        """
+        args = _EXTRA_PARAMS[kind]
+        if (
+            not argument.repeat
+            and not argument.sub_fields
+            and not argument.sub_variants
+        ):
+            if kind == "trim":
+                return [f"_trim_leaf({var}, rem, pattern)"]
+            if kind == "check" and not _may_be_dict(argument.dtype):
+                return []
+            return [f"_check_leaf({var})"]
+        func = f"_{kind}_{self._index(argument)}"
+        if not argument.repeat:
+            subpath = _path_expr(path, tail)
+            return [
+                f"if isinstance({var}, dict):",
+                f"    {func}({var}, {subpath}{args})",
+            ]
+        return [
+            f"if isinstance({var}, list):",
+            f"    for idx, item in enumerate({var}):",
+            f"        {func}(item, {_path_expr(path, [*tail, 'str(idx)'])}{args})",
+            f"elif isinstance({var}, dict):",
+            f"    for kk, item in {var}.items():",
+            f"        {func}(item, {_path_expr(path, [*tail, 'kk'])}{args})",
+        ]
+
+    # functions of nested arguments
+
+    def _emit_functions(self, argument: Argument) -> None:
+        index = self._index(argument)
+        tree = _Tree(self, argument)
+        for kind in _PASSES:
+            if kind == "empty" and not self._needs_empty(argument):
+                continue
+            lines = [
+                f"def _{kind}_{index}(d, path{_EXTRA_PARAMS[kind]}):",
+                "    if not isinstance(d, dict):",
+                "        raise _not_dict(path, d)",
+                '    if "$ref" in d:',
+                "        raise ValueError(_REF_ERROR)",
+            ]
+            body: list[str] = []
+            if kind == "alias":
+                body.extend(self._choice_alias_lines(argument))
+            body.extend(tree.dispatch_lines())
+            if kind == "check" and tree.has_keys:
+                body.append("if strict:")
+                body.extend(_indent(tree.keys_lines()))
+                body.extend(
+                    [
+                        "    allowed = set(keys)",
+                        '    allowed.add("$schema")',
+                        "    for name in d:",
+                        "        if name not in allowed:",
+                        "            raise ArgumentKeyError(",
+                        "                path,",
+                        '                f"undefined key `{name}` is not allowed in strict mode. "',
+                        "                + _did_you_mean(name, allowed),",
+                        "            )",
+                    ]
+                )
+            elif kind == "trim":
+                if tree.has_keys:
+                    body.extend(tree.keys_lines())
+                    body.append("_trim(d, rem, pattern, keys)")
+                else:
+                    body.append("_trim(d, rem, pattern, ())")
+            body.extend(tree.entry_lines(kind))
+            lines.extend(_indent(body))
+            self.functions.append("\n".join(lines) + "\n")
+
+    def _choice_alias_lines(self, argument: Argument) -> list[str]:
+        """Lines replacing aliases of the choices of direct variants."""
+        lines = []
+        for vv in argument.sub_variants.values():
+            if not vv.choice_alias:
+                continue
+            names = self._constant(repr(frozenset(vv.choice_dict)))
+            aliases = self._constant(repr(vv.choice_alias))
+            flag = repr(vv.flag_name)
+            lines.extend(
+                [
+                    f"if {flag} in d:",
+                    f"    tag = d[{flag}]",
+                    f"    if tag not in {names} and tag in {aliases}:",
+                    f"        d[{flag}] = {aliases}[tag]",
+                ]
+            )
+        return lines
+
+    def field_lines(self, kind: str, argument: Argument) -> list[str]:
+        """Lines of a pass over a sub field."""
+        name = repr(argument.name)
+        if kind == "check":
+            if argument.extra_check is not None and not self.ignore_extra_check:
+                raise ValueError(
+                    f"extra_check of argument `{argument.name}` cannot be generated, "
+                    "set ignore_extra_check to skip it"
+                )
+            type_names = "|".join(argument._get_type_name(dd) for dd in argument.dtype)
+            message = repr(
+                f"key `{argument.name}` gets wrong value type, "
+                f"requires <{type_names}> but "
+            )
+            test = " or ".join(self._type_test(dd, "v", 0) for dd in argument.dtype)
+            lines = [
+                f"if {name} in d:",
+                f"    v = d[{name}]",
+                f"    if not ({test}):",
+                "        raise ArgumentTypeError(",
+                f'            path, {message} + type(v).__name__ + " is given"',
+                "        )",
+                *_indent(self._traverse_lines(kind, argument, "v", "path", [name])),
+            ]
+            if not argument.optional:
+                lines.extend(
+                    [
+                        "else:",
+                        "    raise ArgumentKeyError(",
+                        f"        path, {f'key `{argument.name}` is required in arguments but not found'!r}",
+                        "    )",
+                    ]
+                )
+            return lines
+        lines = []
+        if kind == "alias" and argument.alias:
+            lines.append(f"if {name} not in d:")
+            for ii, alias in enumerate(argument.alias):
+                lines.extend(
+                    [
+                        f"    {'if' if ii == 0 else 'elif'} {alias!r} in d:",
+                        f"        d[{name}] = d.pop({alias!r})",
+                    ]
+                )
+        elif (
+            kind == "default"
+            and argument.optional
+            and argument.default is not _Flags.NONE
+        ):
+            lines.extend(
+                [
+                    f"if {name} not in d:",
+                    f"    d[{name}] = {self._default_literal(argument)}",
+                ]
+            )
+        elif kind == "empty":
+            if not self._needs_empty(argument):
+                return []
+            lines.extend(
+                [
+                    f"if {name} in d:",
+                    f"    v = d[{name}]",
+                    "    if v is _EMPTY_DICT:",
+                    f"        v = d[{name}] = {{}}",
+                    *_indent(self._traverse_lines(kind, argument, "v", "path", [name])),
+                ]
+            )
+            return lines
+        lines.extend(
+            [
+                f"if {name} in d:",
+                *_indent(
+                    self._traverse_lines(kind, argument, f"d[{name}]", "path", [name])
+                ),
+            ]
+        )
+        if lines[-1] == f"if {name} in d:":
+            lines.pop()
+        return lines
+
+    def _default_literal(self, argument: Argument) -> str:
+        default = argument.default
+        if _is_empty_default(argument):
+            return "_EMPTY_DICT"
+        literal = repr(default)
+        try:
+            valid = ast.literal_eval(literal) == default
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            valid = False
+        if not valid:
+            raise ValueError(
+                f"default value of argument `{argument.name}` is not a Python literal: {literal}"
+            )
+        return literal
+
+    def _type_test(self, dtype: Any, var: str, depth: int) -> str:
+        """Python expression testing `var` as typeguard does for `dtype`."""
+        if dtype is None or dtype is type(None):
+            return f"{var} is None"
+        if dtype is Any or dtype is object:
+            return "True"
+        origin = get_origin(dtype)
+        if origin is None and isinstance(dtype, type):
+            if dtype is float:
+                return f"isinstance({var}, (int, float))"
+            if dtype is complex:
+                return f"isinstance({var}, (int, float, complex))"
+            return f"isinstance({var}, {self._class_name(dtype)})"
+        args = get_args(dtype)
+        if origin is Union:
+            return (
+                "(" + " or ".join(self._type_test(aa, var, depth) for aa in args) + ")"
+            )
+        if origin is list:
+            if not args or args[0] in (Any, object):
+                return f"isinstance({var}, list)"
+            item = f"x{depth}"
+            return (
+                f"(isinstance({var}, list) and all("
+                f"{self._type_test(args[0], item, depth + 1)} for {item} in {var}))"
+            )
+        if origin is dict:
+            if not args or all(aa in (Any, object) for aa in args):
+                return f"isinstance({var}, dict)"
+            key, value = f"k{depth}", f"v{depth}"
+            return (
+                f"(isinstance({var}, dict) and all("
+                f"{self._type_test(args[0], key, depth + 1)} and "
+                f"{self._type_test(args[1], value, depth + 1)} "
+                f"for {key}, {value} in {var}.items()))"
+            )
+        raise ValueError(f"type {dtype} cannot be generated")
+
+    def _class_name(self, cls: type) -> str:
+        if cls.__module__ == "builtins":
+            return cls.__name__
+        if "<" in cls.__qualname__ or "." in cls.__qualname__:
+            raise ValueError(f"type {cls} cannot be imported by the generated code")
+        self.imports.add(f"from {cls.__module__} import {cls.__qualname__}")
+        return cls.__qualname__
+
+
+class _Tree:
+    """Sub fields and variants of a nested argument, as flattened by dargs.
+
+    Each variant gets a local variable in the generated code that holds the
+    index of the picked choice, so that the nested choices and their sub
+    fields are dispatched the same way in all passes.
+
+    Parameters
+    ----------
+    gen : _Generator
+        The generator.
+    argument : Argument
+        The nested argument.
+    """
+
+    def __init__(self, gen: _Generator, argument: Argument) -> None:
+        self.gen = gen
+        self.argument = argument
+        self.counter = 0
+        self.items = self._walk(argument, [])
+        self.has_keys = bool(argument.sub_fields or argument.sub_variants)
+
+    def _walk(self, argument: Argument, keys: list[set[str]]) -> list[tuple]:
+        """Build the items of an argument or a choice, checking key collisions."""
+        items: list[tuple] = [("field", aa) for aa in argument.sub_fields.values()]
+        seen = set(argument.sub_fields)
+        for vv in argument.sub_variants.values():
+            if vv.optional and vv.default_tag not in vv.choice_dict:
+                raise ValueError(
+                    f"default tag `{vv.default_tag}` of flag `{vv.flag_name}` is not a choice"
+                )
+            var = f"c{self.counter}"
+            self.counter += 1
+            branches = []
+            possible = {vv.flag_name}
+            for ii, choice in enumerate(vv.choice_dict.values()):
+                choice_keys: list[set[str]] = []
+                sub_items = self._walk(choice, choice_keys)
+                flat = set().union(set(choice.sub_fields), *choice_keys)
+                if vv.flag_name in flat:
+                    raise ValueError(
+                        f"choice `{choice.name}` of flag `{vv.flag_name}` has a key "
+                        "with the same name as the flag"
+                    )
+                possible |= flat
+                branches.append((ii, sub_items))
+            if possible & seen:
+                raise ValueError(
+                    f"keys {sorted(possible & seen)} may be duplicated "
+                    f"when flattening variants of `{argument.name}`"
+                )
+            seen |= possible
+            keys.append(possible)
+            items.append(("variant", vv, var, branches))
+        return items
+
+    def dispatch_lines(self) -> list[str]:
+        return self._dispatch(self.items)
+
+    def _dispatch(self, items: list[tuple]) -> list[str]:
+        lines = []
+        for item in items:
+            if item[0] != "variant":
+                continue
+            _, vv, var, branches = item
+            flag = repr(vv.flag_name)
+            choices = {}
+            for ii, choice in enumerate(vv.choice_dict.values()):
+                choices[choice.name] = ii
+            for alias, name in vv.choice_alias.items():
+                choices[alias] = choices[name]
+            table = self.gen._constant(repr(choices))
+            candidates = self.gen._constant(
+                repr([*vv.choice_dict.keys(), *vv.choice_alias.keys()])
+            )
+            lines.extend(
+                [
+                    f"if {flag} in d:",
+                    f"    tag = d[{flag}]",
+                    f"    {var} = {table}.get(tag)",
+                    f"    if {var} is None:",
+                    "        raise ArgumentValueError(",
+                    "            path,",
+                    '            f"get invalid choice `{tag}`"',
+                    f"            + {f' for flag key `{vv.flag_name}`.'!r}",
+                    f"            + _did_you_mean(tag, {candidates}),",
+                    "        )",
+                    "else:",
+                ]
+            )
+            if vv.optional:
+                lines.append(f"    {var} = {choices[vv.default_tag]}")
+            else:
+                message = repr(
+                    f"key `{vv.flag_name}` is required to choose variant but not found."
+                )
+                lines.append(f"    raise ArgumentKeyError(path, {message})")
+            lines.extend(self._branches(var, branches, self._dispatch))
+        return lines
+
+    def keys_lines(self) -> list[str]:
+        """Lines building `keys`, the flattened keys in order."""
+        lines = [f"keys = {list(self.argument.sub_fields)!r}"]
+        lines.extend(self._keys(self.items, top=True))
+        return lines
+
+    def _keys(self, items: list[tuple], top: bool = False) -> list[str]:
+        lines = []
+        if not top:
+            names = [item[1].name for item in items if item[0] == "field"]
+            if names:
+                lines.append(f"keys += {names!r}")
+        for item in items:
+            if item[0] != "variant":
+                continue
+            _, vv, var, branches = item
+            lines.append(f"keys.append({vv.flag_name!r})")
+            lines.extend(self._branches(var, branches, self._keys))
+        return lines
+
+    def entry_lines(self, kind: str) -> list[str]:
+        return self._entries(kind, self.items)
+
+    def _entries(self, kind: str, items: list[tuple]) -> list[str]:
+        lines = []
+        for item in items:
+            if item[0] == "field":
+                lines.extend(self.gen.field_lines(kind, item[1]))
+                continue
+            _, vv, var, branches = item
+            if kind == "default" and vv.optional:
+                flag = repr(vv.flag_name)
+                lines.extend(
+                    [f"if {flag} not in d:", f"    d[{flag}] = {vv.default_tag!r}"]
+                )
+            lines.extend(
+                self._branches(var, branches, lambda ii: self._entries(kind, ii))
+            )
+        return lines
+
+    @staticmethod
+    def _branches(var: str, branches: list[tuple], func: Any) -> list[str]:
+        """Dispatch on the picked choice, skipping the choices without lines."""
+        lines = []
+        for ii, sub_items in branches:
+            sub_lines = func(sub_items)
+            if sub_lines:
+                keyword = "elif" if lines else "if"
+                lines.append(f"{keyword} {var} == {ii}:")
+                lines.extend(_indent(sub_lines))
+        return lines
+
+
+def _all_subs(argument: Argument) -> list[Argument]:
+    """Sub fields and choices of an argument."""
+    subs = list(argument.sub_fields.values())
+    for vv in argument.sub_variants.values():
+        subs.extend(vv.choice_dict.values())
+    return subs
+
+
+def _is_empty_default(argument: Argument) -> bool:
+    """Whether the default value is an empty dict, assigned in a later pass."""
+    return isinstance(argument.default, dict) and argument.default == {}
+
+
+def _may_be_dict(dtype: tuple) -> bool:
+    """Whether a value of the given types may be a dict."""
+    for dd in dtype:
+        if dd is None or dd is type(None):
+            continue
+        origin = get_origin(dd)
+        if origin is list:
+            continue
+        if (
+            origin is None
+            and isinstance(dd, type)
+            and not issubclass(dict, dd)
+            and not issubclass(dd, dict)
+        ):
+            continue
+        return True
+    return False
+
+
+def _path_expr(path: str, tail: list[str]) -> str:
+    if not tail:
+        return path
+    return f"{path} + [{', '.join(tail)}]"
+
+
+def _indent(lines: list[str]) -> list[str]:
+    return [f"    {line}" if line else line for line in lines]
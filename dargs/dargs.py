@@ -18,33 +18,62 @@ We also need to pay special attention to flat the keys of its choices.
 
 from __future__ import annotations
 
+import ast
+import asyncio
 import difflib
 import fnmatch
+import hashlib
+import heapq
+import inspect
+import io
 import json
 import os
 import re
+import sys
+import threading
+import types
+import typing
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from copy import deepcopy
 from enum import Enum
+from functools import lru_cache
 from textwrap import indent
-from typing import Any, Callable, Iterable, List
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Union,
+)
 
 try:
-    from typing import get_origin
+    from typing import get_args, get_origin
 except ImportError:
-    from typing_extensions import get_origin
+    from typing_extensions import get_args, get_origin
 
 import typeguard
 
 INDENT = "    "  # doc is indented by four spaces
 RAW_ANCHOR = False  # whether to use raw html anchors or RST ones
+# number of repeat elements traversed between two yields to the event loop
+_ASYNC_YIELD_INTERVAL = 64
 
-# the third argument is the base path
-HookArgKType = Callable[["Argument", dict, List[str]], None]
-HookArgVType = Callable[["Argument", Any, List[str]], None]
-HookVrntType = Callable[["Variant", dict, List[str]], None]
+# the third argument is the base path. The same list is extended and restored
+# while traversing, so hooks should copy it to keep it. Elements of repeat
+# lists are given by their int index, which is converted to str only when an
+# ArgumentError is raised.
+HookArgKType = Callable[["Argument", dict, List[Union[str, int]]], None]
+HookArgVType = Callable[["Argument", Any, List[Union[str, int]]], None]
+HookVrntType = Callable[["Variant", dict, List[Union[str, int]]], None]
 
 
-def _DUMMYHOOK(a: Argument | Variant, x: dict | Any, p: list[str]) -> None:
+def _DUMMYHOOK(a: Argument | Variant, x: dict | Any, p: list[str | int]) -> None:
     # for doing nothing in traversing
     pass
 
@@ -58,13 +87,13 @@ class ArgumentError(Exception):
     """Base error class for invalid argument values in argchecking."""
 
     def __init__(
-        self, path: None | str | list[str] = None, message: str | None = None
+        self, path: str | list[str | int] | None = None, message: str | None = None
     ) -> None:
         super().__init__(message)
         if path is None:
             path = ""
         if not isinstance(path, str):
-            path = "/".join(path)
+            path = "/".join(map(str, path))
         self.path = path.strip("/")
         self.message = message
 
@@ -91,6 +120,43 @@ class ArgumentValueError(ArgumentError):
     pass
 
 
+# the Arguments whose dtypes are to be reorganized, by thread
+_deferred_dtype = threading.local()
+
+
+@contextmanager
+def defer_dtype() -> Iterator[None]:
+    """Defer the reorganization of dtypes while building a schema.
+
+    Creating an `Argument` or adding sub fields, sub variants or repeat to it
+    reorganizes its dtype, which may check the default value with typeguard.
+    Inside this context, each `Argument` created or changed is reorganized
+    only once, from its final state, when the outermost context exits. The
+    schema should not be used before that; the dtype of a new `Argument` is
+    an empty tuple until then.
+
+    Examples
+    --------
+    >>> with defer_dtype():
+    ...     ca = Argument("base", dict)
+    ...     for ii in range(3):
+    ...         ca.add_subfield(f"sub{ii}", int, optional=True, default=ii)
+    >>> ca.check_value({"sub0": 0})
+    """
+    if getattr(_deferred_dtype, "pending", None) is not None:
+        # the outermost context does the work
+        yield
+        return
+    pending: dict[int, tuple[Argument, Any]] = {}
+    _deferred_dtype.pending = pending
+    try:
+        yield
+    finally:
+        _deferred_dtype.pending = None
+        for arg, dtype in pending.values():
+            arg.dtype = arg._reorg_dtype(dtype)
+
+
 class Argument:
     """Define possible arguments and their types and properties.
 
@@ -142,7 +208,7 @@ class Argument:
     def __init__(
         self,
         name: str,
-        dtype: None | type | Iterable[type | Any | None],
+        dtype: type | Iterable[type | Any | None] | None,
         sub_fields: Iterable[Argument] | None = None,
         sub_variants: Iterable[Variant] | None = None,
         repeat: bool = False,
@@ -165,11 +231,15 @@ class Argument:
         self.doc = doc
         self.fold_subdoc = fold_subdoc
         self.extra_check_errmsg = extra_check_errmsg
-        # handle the format of dtype, makeit a tuple
-        self.dtype = self._reorg_dtype(dtype)
+        # suggestion indexes of the flattened keys, for strict checks
+        self._suggestions: dict[tuple, _SuggestionIndex] = {}
+        # always a tuple; empty until reorganized, see defer_dtype
+        self.dtype: tuple[type | Any | None, ...] = ()
         # adding subfields and subvariants
-        self.extend_subfields(sub_fields)
-        self.extend_subvariants(sub_variants)
+        self._add_subfields(sub_fields)
+        self._add_subvariants(sub_variants)
+        # handle the format of dtype, makeit a tuple
+        self._update_dtype(dtype)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Argument):
@@ -222,7 +292,7 @@ class Argument:
         return Argument("_", dict, [self])
 
     def _reorg_dtype(
-        self, dtype: None | type | Any | Iterable[type | Any | None]
+        self, dtype: type | Any | Iterable[type | Any | None] | None
     ) -> tuple[type | Any | None, ...]:
         if (
             isinstance(dtype, type)
@@ -231,15 +301,15 @@ class Argument:
         ):
             dtype = [dtype]
         assert dtype is not None
-        # remove duplicate
-        dtype = {
+        # remove duplicate, keeping the given order
+        dtype = dict.fromkeys(
             dt if type(dt) is type or type(get_origin(dt)) is type else type(dt)
             for dt in dtype
-        }
+        )
         # check conner cases
         if self.sub_fields or self.sub_variants:
             if not self.repeat:
-                dtype.add(dict)
+                dtype[dict] = None
             else:
                 # convert dtypes to unsubscripted types
                 unsubscripted_dtype = {
@@ -247,28 +317,52 @@ class Argument:
                 }
                 if dict not in unsubscripted_dtype:
                     # only add list (compatible with old behaviors) if no dict in dtype
-                    dtype.add(list)
+                    dtype[list] = None
 
         if (
             self.optional
             and self.default is not _Flags.NONE
+            # isinstance is enough for most defaults and much faster
+            and not isinstance(
+                self.default, tuple(tt for tt in dtype if type(tt) is type)
+            )
             and all(not isinstance_annotation(self.default, tt) for tt in dtype)
         ):
-            dtype.add(type(self.default))
+            dtype[type(self.default)] = None
         # and make it compatible with `isinstance`
         return tuple(dtype)
 
-    def set_dtype(self, dtype: None | type | Iterable[type]) -> None:
+    def _update_dtype(
+        self, dtype: type | Any | Iterable[type | Any | None] | None = _Flags.NONE
+    ) -> None:
+        # reorganize the given dtype, by default the current one; inside
+        # defer_dtype, the raw dtype waits there and self.dtype is unchanged
+        pending = getattr(_deferred_dtype, "pending", None)
+        if dtype is _Flags.NONE:
+            waiting = None if pending is None else pending.get(id(self))
+            dtype = self.dtype if waiting is None else waiting[1]
+        if pending is None:
+            self.dtype = self._reorg_dtype(dtype)
+        else:
+            pending[id(self)] = (self, dtype)
+
+    def set_dtype(self, dtype: type | Iterable[type] | None) -> None:
         """Change the dtype of the current Argument."""
-        self.dtype = self._reorg_dtype(dtype)
+        self._update_dtype(dtype)
 
     def set_repeat(self, repeat: bool = True) -> None:
         """Change the repeat attribute of the current Argument."""
         self.repeat = repeat
-        self.dtype = self._reorg_dtype(self.dtype)
+        self._update_dtype()
 
     def extend_subfields(self, sub_fields: Iterable[Argument] | None) -> None:
         """Add a list of sub fields to the current Argument."""
+        if sub_fields is None:
+            return
+        self._add_subfields(sub_fields)
+        self._update_dtype()
+
+    def _add_subfields(self, sub_fields: Iterable[Argument] | None) -> None:
         if sub_fields is None:
             return
         assert all(isinstance(s, Argument) for s in sub_fields)
@@ -277,7 +371,6 @@ class Argument:
             ((s.name, s) for s in sub_fields),
             err_msg=f"building Argument `{self.name}`",
         )
-        self.dtype = self._reorg_dtype(self.dtype)
 
     def add_subfield(self, name: str | Argument, *args: Any, **kwargs: Any) -> Argument:
         """Add a sub field to the current Argument."""
@@ -290,6 +383,12 @@ class Argument:
 
     def extend_subvariants(self, sub_variants: Iterable[Variant] | None) -> None:
         """Add a list of sub variants to the current Argument."""
+        if sub_variants is None:
+            return
+        self._add_subvariants(sub_variants)
+        self._update_dtype()
+
+    def _add_subvariants(self, sub_variants: Iterable[Variant] | None) -> None:
         if sub_variants is None:
             return
         assert all(isinstance(s, Variant) for s in sub_variants)
@@ -299,7 +398,6 @@ class Argument:
             exclude=self.sub_fields.keys(),
             err_msg=f"building Argument `{self.name}`",
         )
-        self.dtype = self._reorg_dtype(self.dtype)
 
     def add_subvariant(
         self, flag_name: str | Variant, *args: Any, **kwargs: Any
@@ -316,7 +414,7 @@ class Argument:
     # below are general traverse part
 
     def flatten_sub(
-        self, value: dict, path: list[str] | None = None
+        self, value: dict, path: list[str | int] | None = None
     ) -> dict[str, Argument]:
         sub_dicts = [self.sub_fields]
         sub_dicts.extend(
@@ -335,22 +433,44 @@ class Argument:
         value_hook: HookArgVType = _DUMMYHOOK,
         sub_hook: HookArgKType = _DUMMYHOOK,
         variant_hook: HookVrntType = _DUMMYHOOK,
-        path: list[str] | None = None,
+        path: list[str | int] | None = None,
         allow_ref: bool = False,
     ) -> None:
+        """Traverse the dict holding the key of this argument with hooks.
+
+        Each hook is called with the argument or variant, the data, and the
+        path of the dict being visited, as a list of its own that the hook
+        may keep. Elements of a repeat list appear in it as their int index,
+        e.g. ``["base", 0]``; before, the path was a list of str such as
+        ``["base", "0"]``.
+
+        Parameters
+        ----------
+        argdict : dict
+            The dict holding the key of this argument.
+        key_hook, value_hook, sub_hook, variant_hook : Callable, optional
+            The hooks called at each key, at each value, at each dict, and at
+            each variant of a dict.
+        path : list[str | int], optional
+            The path of argdict, which is extended in place while traversing.
+        allow_ref : bool, optional
+            If true, allow loading from external files via the ``$ref`` key.
+        """
         # first, do something with the key
         # then, take out the vaule and do something with it
         if path is None:
             path = []
-        key_hook(self, argdict, path)
-        if self.name in argdict:
-            value = argdict[self.name]
-            value_hook(self, value, path)
-            newpath = [*path, self.name]
-            # this is the key step that we traverse into the tree
-            self.traverse_value(
-                value, key_hook, value_hook, sub_hook, variant_hook, newpath, allow_ref
-            )
+        _run_traverse(
+            self,
+            argdict,
+            True,
+            _snapshot_path(key_hook),
+            _snapshot_path(value_hook),
+            _snapshot_path(sub_hook),
+            _snapshot_path(variant_hook),
+            path,
+            allow_ref,
+        )
 
     def traverse_value(
         self,
@@ -359,72 +479,68 @@ class Argument:
         value_hook: HookArgVType = _DUMMYHOOK,
         sub_hook: HookArgKType = _DUMMYHOOK,
         variant_hook: HookVrntType = _DUMMYHOOK,
-        path: list[str] | None = None,
+        path: list[str | int] | None = None,
         allow_ref: bool = False,
     ) -> None:
+        """Traverse the value of this argument with hooks.
+
+        Same as `traverse`, without the leading key. The path given to the
+        hooks follows the same rules: a list of its own for each call, with
+        int indexes for the elements of repeat lists.
+        """
         # this is not private, and can be called directly
         # in the condition where there is no leading key
         if path is None:
             path = []
-        if not self.repeat and isinstance(value, dict):
-            self._traverse_sub(
-                value, key_hook, value_hook, sub_hook, variant_hook, path, allow_ref
-            )
-        elif self.repeat and isinstance(value, list):
-            for idx, item in enumerate(value):
-                self._traverse_sub(
-                    item,
-                    key_hook,
-                    value_hook,
-                    sub_hook,
-                    variant_hook,
-                    [*path, str(idx)],
-                    allow_ref,
-                )
-        elif self.repeat and isinstance(value, dict):
-            for kk, item in value.items():
-                self._traverse_sub(
-                    item,
-                    key_hook,
-                    value_hook,
-                    sub_hook,
-                    variant_hook,
-                    [*path, kk],
-                    allow_ref,
-                )
+        _run_traverse(
+            self,
+            value,
+            False,
+            _snapshot_path(key_hook),
+            _snapshot_path(value_hook),
+            _snapshot_path(sub_hook),
+            _snapshot_path(variant_hook),
+            path,
+            allow_ref,
+        )
 
-    def _traverse_sub(
+    def _traverse_builtin(
         self,
-        value: dict,
+        data: Any,
+        is_argdict: bool,
         key_hook: HookArgKType = _DUMMYHOOK,
         value_hook: HookArgVType = _DUMMYHOOK,
         sub_hook: HookArgKType = _DUMMYHOOK,
         variant_hook: HookVrntType = _DUMMYHOOK,
-        path: list[str] | None = None,
         allow_ref: bool = False,
     ) -> None:
-        if path is None:
-            path = [self.name]
-        if not isinstance(value, dict):
-            raise ArgumentTypeError(
-                path,
-                f"key `{path[-1]}` gets wrong value type, "
-                f"requires dict but {type(value).__name__} is given",
-            )
-        _resolve_ref(value, allow_ref)
-        sub_hook(self, value, path)
-        for subvrnt in self.sub_variants.values():
-            variant_hook(subvrnt, value, path)
-        for subarg in self.flatten_sub(value, path).values():
-            subarg.traverse(
-                value, key_hook, value_hook, sub_hook, variant_hook, path, allow_ref
-            )
+        """Traverse with built-in hooks, which get the shared path.
+
+        Unlike `traverse`, the hooks are given the list of the traversal
+        itself, which is extended and restored in place, so they must not
+        keep it after returning.
+        """
+        _run_traverse(
+            self,
+            data,
+            is_argdict,
+            key_hook,
+            value_hook,
+            sub_hook,
+            variant_hook,
+            [],
+            allow_ref,
+        )
 
     # above are general traverse part
     # below are type checking part
 
     def check(
-        self, argdict: dict, strict: bool = False, allow_ref: bool = False
+        self,
+        argdict: dict,
+        strict: bool = False,
+        allow_ref: bool = False,
+        allow_ndarray: bool = False,
     ) -> None:
         """Check whether `argdict` meets the structure defined in self.
 
@@ -441,6 +557,9 @@ class Argument:
             If true, allow loading from external files via the ``$ref`` key.
             A deep copy of ``argdict`` is made internally so the caller's
             data is not mutated.
+        allow_ndarray : bool, optional
+            If true, a one-dimensional `numpy.ndarray` of a matching dtype is
+            accepted by the arguments of `List[int]` or `List[float]`.
         """
         if strict and len(argdict) != 1:
             raise ArgumentKeyError(
@@ -451,16 +570,19 @@ class Argument:
             )
         if allow_ref:
             argdict = deepcopy(argdict)
-        self.traverse(
-            argdict,
-            key_hook=Argument._check_exist,
-            value_hook=Argument._check_data,
-            sub_hook=Argument._check_strict if strict else _DUMMYHOOK,
-            allow_ref=allow_ref,
-        )
+            _prefetch_refs(argdict)
+        if not _check_columns(self, argdict, True, strict, allow_ndarray):
+            # find the first error with its path
+            ArgumentVisitor.checker(strict, allow_ndarray).visit(
+                self, argdict, allow_ref=allow_ref
+            )
 
     def check_value(
-        self, value: Any, strict: bool = False, allow_ref: bool = False
+        self,
+        value: Any,
+        strict: bool = False,
+        allow_ref: bool = False,
+        allow_ndarray: bool = False,
     ) -> None:
         """Check the value without the leading key.
 
@@ -477,18 +599,20 @@ class Argument:
             If true, allow loading from external files via the ``$ref`` key.
             A deep copy of ``value`` is made internally so the caller's
             data is not mutated.
+        allow_ndarray : bool, optional
+            If true, a one-dimensional `numpy.ndarray` of a matching dtype is
+            accepted by the arguments of `List[int]` or `List[float]`.
         """
         if allow_ref:
             value = deepcopy(value)
-        self.traverse_value(
-            value,
-            key_hook=Argument._check_exist,
-            value_hook=Argument._check_data,
-            sub_hook=Argument._check_strict if strict else _DUMMYHOOK,
-            allow_ref=allow_ref,
-        )
+            _prefetch_refs(value)
+        if not _check_columns(self, value, False, strict, allow_ndarray):
+            # find the first error with its path
+            ArgumentVisitor.checker(strict, allow_ndarray).visit_value(
+                self, value, allow_ref=allow_ref
+            )
 
-    def _check_exist(self, argdict: dict, path: list[str] | None = None) -> None:
+    def _check_exist(self, argdict: dict, path: list[str | int] | None = None) -> None:
         if self.optional is True:
             return
         if self.name not in argdict:
@@ -496,7 +620,34 @@ class Argument:
                 path, f"key `{self.name}` is required in arguments but not found"
             )
 
-    def _check_data(self, value: Any, path: list[str] | None = None) -> None:
+    def _check_data(
+        self,
+        value: Any,
+        path: list[str | int] | None = None,
+        allow_ndarray: bool = False,
+    ) -> None:
+        self._check_type(value, path, allow_ndarray)
+        if self.extra_check is not None:
+            passed = self.extra_check(value)
+            if inspect.isawaitable(passed):
+                # an awaitable is always true, never accept it silently
+                if inspect.iscoroutine(passed):
+                    passed.close()
+                raise TypeError(
+                    f"extra_check of key `{self.name}` returns an awaitable, "
+                    "use the asynchronous API such as acheck or acheck_value"
+                )
+            if not passed:
+                raise self._extra_check_error(path)
+
+    def _check_type(
+        self,
+        value: Any,
+        path: list[str | int] | None = None,
+        allow_ndarray: bool = False,
+    ) -> None:
+        if self._is_numeric_list(value, allow_ndarray):
+            return
         try:
             typeguard.check_type(
                 value,
@@ -510,15 +661,46 @@ class Argument:
                 f"requires <{'|'.join(self._get_type_name(dd) for dd in self.dtype)}> "
                 f"but " + str(e),
             ) from e
-        if self.extra_check is not None and not self.extra_check(value):
-            raise ArgumentValueError(
-                path,
-                f"key `{self.name}` gets bad value "
-                "that fails to pass its extra checking. " + self.extra_check_errmsg,
-            )
 
-    def _check_strict(self, value: dict, path: list[str] | None = None) -> None:
-        allowed_keys = set(self.flatten_sub(value, path).keys())
+    def _is_numeric_list(self, value: Any, allow_ndarray: bool = False) -> bool:
+        # fast path of typeguard for List[int] and List[float], which checks
+        # the elements one by one, or the dtype of the whole array at once
+        if isinstance(value, list):
+            pass
+        elif allow_ndarray and _is_ndarray(value):
+            if value.ndim != 1:
+                return False
+        else:
+            return False
+        for dt in self.dtype:
+            if get_origin(dt) is not list:
+                continue
+            item_types = get_args(dt)
+            if item_types == (int,):
+                numeric, kinds = int, "iu"
+            elif item_types == (float,):
+                numeric, kinds = (int, float), "iuf"
+            else:
+                continue
+            if isinstance(value, list):
+                if all(isinstance(vv, numeric) for vv in value):
+                    return True
+            elif value.dtype.kind in kinds:
+                return True
+        return False
+
+    def _extra_check_error(
+        self, path: list[str | int] | None = None
+    ) -> ArgumentValueError:
+        return ArgumentValueError(
+            path,
+            f"key `{self.name}` gets bad value "
+            "that fails to pass its extra checking. " + self.extra_check_errmsg,
+        )
+
+    def _check_strict(self, value: dict, path: list[str | int] | None = None) -> None:
+        flat_keys = self.flatten_sub(value, path).keys()
+        allowed_keys = set(flat_keys)
         # curpath = [*path, self.name]
         if not len(allowed_keys):
             # no allowed keys defined, allow any keys
@@ -529,7 +711,9 @@ class Argument:
         allowed_keys.add("$schema")
         for name in value.keys():
             if name not in allowed_keys:
-                dym_message = did_you_mean(name, allowed_keys)
+                dym_message = did_you_mean(
+                    name, _cached_index(self._suggestions, (*flat_keys, "$schema"))
+                )
                 raise ArgumentKeyError(
                     path,
                     f"undefined key `{name}` is not allowed in strict mode. {dym_message}",
@@ -544,8 +728,9 @@ class Argument:
         inplace: bool = False,
         do_default: bool = True,
         do_alias: bool = True,
-        trim_pattern: str | None = None,
+        trim_pattern: str | list[str] | None = None,
         allow_ref: bool = False,
+        convert_ndarray: bool = False,
     ) -> dict:
         """Modify `argdict` so that it meets the Argument structure.
 
@@ -563,10 +748,15 @@ class Argument:
             Whether to add default values.
         do_alias : bool, optional
             Whether to transform alias names.
-        trim_pattern : str, optional
-            If given, discard keys that matches the glob pattern.
+        trim_pattern : str or list of str, optional
+            If given, discard keys that matches the glob pattern, or any of
+            the glob patterns.
         allow_ref : bool, optional
             If true, allow loading from external files via the ``$ref`` key.
+        convert_ndarray : bool, optional
+            If true, convert the `numpy.ndarray` values accepted by the
+            arguments of `List[int]` or `List[float]` into lists. Otherwise
+            the arrays are kept.
 
         Returns
         -------
@@ -575,29 +765,39 @@ class Argument:
         """
         if not inplace:
             argdict = deepcopy(argdict)
+        if allow_ref:
+            _prefetch_refs(argdict)
         if do_alias:
-            self.traverse(
+            self._traverse_builtin(
                 argdict,
+                True,
                 key_hook=Argument._convert_alias,
                 variant_hook=Variant._convert_choice_alias,
                 allow_ref=allow_ref,
             )
         if do_default:
-            self.traverse(
-                argdict, key_hook=Argument._assign_default, allow_ref=allow_ref
+            self._traverse_builtin(
+                argdict, True, key_hook=Argument._assign_default, allow_ref=allow_ref
             )
-            self.traverse(
-                argdict, key_hook=Argument._handle_empty_dict, allow_ref=allow_ref
+            self._traverse_builtin(
+                argdict, True, key_hook=Argument._handle_empty_dict, allow_ref=allow_ref
             )
         if trim_pattern is not None:
-            trim_by_pattern(argdict, trim_pattern, reserved=[self.name])
-            self.traverse(
+            patterns = (
+                trim_pattern if isinstance(trim_pattern, str) else tuple(trim_pattern)
+            )
+            select = _trim_matcher(patterns)
+            _trim(argdict, select, reserved=[self.name])
+            self._traverse_builtin(
                 argdict,
-                sub_hook=lambda a, d, p: trim_by_pattern(
-                    d, trim_pattern, a.flatten_sub(d, p).keys()
-                ),
+                True,
+                sub_hook=lambda a, d, p: _trim(d, select, a.flatten_sub(d, p).keys()),
                 allow_ref=allow_ref,
             )
+        if convert_ndarray:
+            self._traverse_builtin(
+                argdict, True, key_hook=Argument._convert_ndarray, allow_ref=allow_ref
+            )
         return argdict
 
     def normalize_value(
@@ -606,8 +806,9 @@ class Argument:
         inplace: bool = False,
         do_default: bool = True,
         do_alias: bool = True,
-        trim_pattern: str | None = None,
+        trim_pattern: str | list[str] | None = None,
         allow_ref: bool = False,
+        convert_ndarray: bool = False,
     ) -> Any:
         """Modify the value so that it meets the Argument structure.
 
@@ -623,10 +824,15 @@ class Argument:
             Whether to add default values.
         do_alias : bool, optional
             Whether to transform alias names.
-        trim_pattern : str, optional
-            If given, discard keys that matches the glob pattern.
+        trim_pattern : str or list of str, optional
+            If given, discard keys that matches the glob pattern, or any of
+            the glob patterns.
         allow_ref : bool, optional
             If true, allow loading from external files via the ``$ref`` key.
+        convert_ndarray : bool, optional
+            If true, convert the `numpy.ndarray` values accepted by the
+            arguments of `List[int]` or `List[float]` into lists. Otherwise
+            the arrays are kept.
 
         Returns
         -------
@@ -635,31 +841,45 @@ class Argument:
         """
         if not inplace:
             value = deepcopy(value)
+        if allow_ref:
+            _prefetch_refs(value)
         if do_alias:
-            self.traverse_value(
+            self._traverse_builtin(
                 value,
+                False,
                 key_hook=Argument._convert_alias,
                 variant_hook=Variant._convert_choice_alias,
                 allow_ref=allow_ref,
             )
         if do_default:
-            self.traverse_value(
-                value, key_hook=Argument._assign_default, allow_ref=allow_ref
+            self._traverse_builtin(
+                value, False, key_hook=Argument._assign_default, allow_ref=allow_ref
             )
-            self.traverse_value(
-                value, key_hook=Argument._handle_empty_dict, allow_ref=allow_ref
+            self._traverse_builtin(
+                value, False, key_hook=Argument._handle_empty_dict, allow_ref=allow_ref
             )
         if trim_pattern is not None:
-            self.traverse_value(
+            patterns = (
+                trim_pattern if isinstance(trim_pattern, str) else tuple(trim_pattern)
+            )
+            select = _trim_matcher(patterns)
+            self._traverse_builtin(
                 value,
-                sub_hook=lambda a, d, p: trim_by_pattern(
-                    d, trim_pattern, a.flatten_sub(d, p).keys()
-                ),
+                False,
+                sub_hook=lambda a, d, p: _trim(d, select, a.flatten_sub(d, p).keys()),
                 allow_ref=allow_ref,
             )
+        if convert_ndarray:
+            if _is_ndarray(value):
+                value = self._ndarray_to_list(value)
+            self._traverse_builtin(
+                value, False, key_hook=Argument._convert_ndarray, allow_ref=allow_ref
+            )
         return value
 
-    def _assign_default(self, argdict: dict, path: list[str] | None = None) -> None:
+    def _assign_default(
+        self, argdict: dict, path: list[str | int] | None = None
+    ) -> None:
         if (
             self.name not in argdict
             and self.optional
@@ -668,32 +888,329 @@ class Argument:
             default = self.default if self.default != {} else _Flags.EMPTY_DICT
             argdict[self.name] = default
 
-    def _handle_empty_dict(self, argdict: dict, path: list[str] | None = None) -> None:
+    def _handle_empty_dict(
+        self, argdict: dict, path: list[str | int] | None = None
+    ) -> None:
         if argdict.get(self.name, None) is _Flags.EMPTY_DICT:
             argdict[self.name] = {}
 
-    def _convert_alias(self, argdict: dict, path: list[str] | None = None) -> None:
+    def _convert_alias(
+        self, argdict: dict, path: list[str | int] | None = None
+    ) -> None:
         if self.name not in argdict:
             for alias in self.alias:
                 if alias in argdict:
                     argdict[self.name] = argdict.pop(alias)
                     return
 
+    def _convert_ndarray(
+        self, argdict: dict, path: list[str | int] | None = None
+    ) -> None:
+        if self.name in argdict and _is_ndarray(argdict[self.name]):
+            argdict[self.name] = self._ndarray_to_list(argdict[self.name])
+
+    def _ndarray_to_list(self, value: Any) -> Any:
+        # only the arrays that would pass the check
+        if self._is_numeric_list(value, allow_ndarray=True):
+            return value.tolist()
+        return value
+
+    def compact(self, argdict: dict, inplace: bool = False) -> dict:
+        """Remove the keys whose values are the same as their defaults.
+
+        This is the inverse of `normalize`: normalizing the compacted dict
+        with default values gives the original one again.
+
+        Parameters
+        ----------
+        argdict : dict
+            The normalized dict whose root key is the name of this argument.
+        inplace : bool, optional
+            If true, modify the given dict. Otherwise return a new one.
+
+        Returns
+        -------
+        dict:
+            The compacted dict.
+        """
+        if not inplace:
+            argdict = deepcopy(argdict)
+        self._traverse_builtin(argdict, True, key_hook=Argument._remove_default)
+        return argdict
+
+    def compact_value(self, value: Any, inplace: bool = False) -> Any:
+        """Remove the keys in the value whose values are the same as their defaults.
+
+        Same as `compact({self.name: value})[self.name]`, so that
+        `normalize_value(compact_value(value))` gives `value` again if the
+        value is normalized. Defaulted variant flags and empty dicts are also
+        removed. Each key is visited once, and a removed key is not visited
+        further, so it is cheap to compact a large repeated list.
+
+        Parameters
+        ----------
+        value : any value type
+            The normalized arg value to be compacted.
+        inplace : bool, optional
+            If true, modify the given dict. Otherwise return a new one.
+
+        Returns
+        -------
+        value:
+            The compacted arg value.
+        """
+        if not inplace:
+            value = deepcopy(value)
+        self._traverse_builtin(value, False, key_hook=Argument._remove_default)
+        return value
+
+    def _remove_default(
+        self, argdict: dict, path: list[str | int] | None = None
+    ) -> None:
+        # an alias left in the dict would take the place of the removed key
+        if (
+            self.optional
+            and self.default is not _Flags.NONE
+            and self.name in argdict
+            and _same_value(argdict[self.name], self.default)
+            and not any(alias in argdict for alias in self.alias)
+        ):
+            del argdict[self.name]
+
     # above are normalizing part
+    # below are asyncio part
+
+    async def acheck(
+        self,
+        argdict: dict,
+        strict: bool = False,
+        allow_ref: bool = False,
+        allow_ndarray: bool = False,
+    ) -> None:
+        """Asynchronous version of :meth:`check`.
+
+        ``$ref`` files are loaded in the default executor, ``extra_check``
+        may return an awaitable, and the event loop is given a chance to
+        run other tasks between elements of long repeat lists. The data is
+        first checked column by column as in :meth:`check`, which does not
+        await; arguments with an ``extra_check`` leave the check to the
+        traversal.
+
+        Parameters
+        ----------
+        argdict : dict
+            The arg dict to be checked
+        strict : bool, optional
+            If true, only keys defined in `Argument` are allowed.
+        allow_ref : bool, optional
+            If true, allow loading from external files via the ``$ref`` key.
+            A deep copy of ``argdict`` is made internally so the caller's
+            data is not mutated.
+        allow_ndarray : bool, optional
+            If true, a one-dimensional `numpy.ndarray` of a matching dtype is
+            accepted by the arguments of `List[int]` or `List[float]`.
+        """
+        if strict and len(argdict) != 1:
+            raise ArgumentKeyError(
+                None,
+                "only one single key of arg name is allowed "
+                "for check in strict mode at top level, "
+                "use check_value if you are checking subfields",
+            )
+        if allow_ref:
+            argdict = deepcopy(argdict)
+            await _aprefetch_refs(argdict)
+        if not _check_columns(self, argdict, True, strict, allow_ndarray):
+            await _arun_traverse(
+                self,
+                argdict,
+                True,
+                key_hook=Argument._check_exist,
+                value_hook=lambda a, v, p: a._acheck_data(v, p, allow_ndarray),
+                sub_hook=Argument._check_strict if strict else _DUMMYHOOK,
+                allow_ref=allow_ref,
+            )
+
+    async def acheck_value(
+        self,
+        value: Any,
+        strict: bool = False,
+        allow_ref: bool = False,
+        allow_ndarray: bool = False,
+    ) -> None:
+        """Asynchronous version of :meth:`check_value`.
+
+        Parameters
+        ----------
+        value : any value type
+            The value to be checked
+        strict : bool, optional
+            If true, only keys defined in `Argument` are allowed.
+        allow_ref : bool, optional
+            If true, allow loading from external files via the ``$ref`` key.
+            A deep copy of ``value`` is made internally so the caller's
+            data is not mutated.
+        allow_ndarray : bool, optional
+            If true, a one-dimensional `numpy.ndarray` of a matching dtype is
+            accepted by the arguments of `List[int]` or `List[float]`.
+        """
+        if allow_ref:
+            value = deepcopy(value)
+            await _aprefetch_refs(value)
+        if not _check_columns(self, value, False, strict, allow_ndarray):
+            await _arun_traverse(
+                self,
+                value,
+                False,
+                key_hook=Argument._check_exist,
+                value_hook=lambda a, v, p: a._acheck_data(v, p, allow_ndarray),
+                sub_hook=Argument._check_strict if strict else _DUMMYHOOK,
+                allow_ref=allow_ref,
+            )
+
+    async def anormalize_value(
+        self,
+        value: Any,
+        inplace: bool = False,
+        do_default: bool = True,
+        do_alias: bool = True,
+        trim_pattern: str | list[str] | None = None,
+        allow_ref: bool = False,
+        convert_ndarray: bool = False,
+    ) -> Any:
+        """Asynchronous version of :meth:`normalize_value`.
+
+        Parameters
+        ----------
+        value : any value type
+            The arg value to be normalized.
+        inplace : bool, optional
+            If true, modify the given dict. Otherwise return a new one.
+        do_default : bool, optional
+            Whether to add default values.
+        do_alias : bool, optional
+            Whether to transform alias names.
+        trim_pattern : str or list of str, optional
+            If given, discard keys that matches the glob pattern, or any of
+            the glob patterns.
+        allow_ref : bool, optional
+            If true, allow loading from external files via the ``$ref`` key.
+        convert_ndarray : bool, optional
+            If true, convert the `numpy.ndarray` values accepted by the
+            arguments of `List[int]` or `List[float]` into lists. Otherwise
+            the arrays are kept.
+
+        Returns
+        -------
+        value:
+            The normalized arg value.
+        """
+        if not inplace:
+            value = deepcopy(value)
+        if allow_ref:
+            await _aprefetch_refs(value)
+        if do_alias:
+            await _arun_traverse(
+                self,
+                value,
+                False,
+                key_hook=Argument._convert_alias,
+                variant_hook=Variant._convert_choice_alias,
+                allow_ref=allow_ref,
+            )
+        if do_default:
+            await _arun_traverse(
+                self,
+                value,
+                False,
+                key_hook=Argument._assign_default,
+                allow_ref=allow_ref,
+            )
+            await _arun_traverse(
+                self,
+                value,
+                False,
+                key_hook=Argument._handle_empty_dict,
+                allow_ref=allow_ref,
+            )
+        if trim_pattern is not None:
+            patterns = (
+                trim_pattern if isinstance(trim_pattern, str) else tuple(trim_pattern)
+            )
+            select = _trim_matcher(patterns)
+            await _arun_traverse(
+                self,
+                value,
+                False,
+                sub_hook=lambda a, d, p: _trim(d, select, a.flatten_sub(d, p).keys()),
+                allow_ref=allow_ref,
+            )
+        if convert_ndarray:
+            if _is_ndarray(value):
+                value = self._ndarray_to_list(value)
+            await _arun_traverse(
+                self,
+                value,
+                False,
+                key_hook=Argument._convert_ndarray,
+                allow_ref=allow_ref,
+            )
+        return value
+
+    async def _acheck_data(
+        self,
+        value: Any,
+        path: list[str | int] | None = None,
+        allow_ndarray: bool = False,
+    ) -> None:
+        self._check_type(value, path, allow_ndarray)
+        if self.extra_check is not None:
+            passed = self.extra_check(value)
+            if inspect.isawaitable(passed):
+                passed = await passed
+            if not passed:
+                raise self._extra_check_error(path)
+
+    # above are asyncio part
     # below are doc generation part
 
     def gen_doc(self, path: list[str] | None = None, **kwargs: Any) -> str:
         """Generate doc string for the current Argument."""
-        # the actual indentation is done here, and ONLY here
+        buff = io.StringIO()
+        self.write_doc(buff, path, **kwargs)
+        return buff.getvalue()
+
+    def write_doc(
+        self, stream: IO[str], path: list[str] | None = None, **kwargs: Any
+    ) -> None:
+        """Write doc string for the current Argument to a stream.
+
+        Same as `stream.write(self.gen_doc(path, **kwargs))`, but each line is
+        indented and written only once, without building the whole document.
+        """
+        writer = _DocWriter(stream, root=self)
+        self._write_doc(writer, path, **kwargs)
+        writer.close()
+
+    def _write_doc(
+        self, writer: _DocWriter, path: list[str] | None = None, **kwargs: Any
+    ) -> None:
         if path is None:
             path = []
+        writer.write_shared(
+            self, "doc", path, lambda w, p: self._render_doc(w, p, **kwargs)
+        )
+
+    def _render_doc(self, writer: _DocWriter, path: list[str], **kwargs: Any) -> None:
+        # the actual indentation is done here, and ONLY here
         sub_paths = [*path, self.name]
-        doc_list = [
-            self.gen_doc_head(sub_paths, **kwargs),
-            indent(self.gen_doc_path(sub_paths, **kwargs), INDENT),
-            indent(self.gen_doc_body(sub_paths, **kwargs), INDENT),
-        ]
-        return "\n".join(filter(None, doc_list))
+        writer.write(self.gen_doc_head(sub_paths, **kwargs))
+        with writer.indent():
+            writer.write("\n")
+            writer.write(self.gen_doc_path(sub_paths, **kwargs))
+            if self._has_doc_body():
+                writer.write("\n")
+                self._write_doc_body(writer, sub_paths, **kwargs)
 
     def gen_doc_head(self, path: list[str] | None = None, **kwargs: Any) -> str:
         typesig = "| type: " + " | ".join(
@@ -725,9 +1242,36 @@ class Argument:
         return pathdoc
 
     def gen_doc_body(self, path: list[str] | None = None, **kwargs: Any) -> str:
-        body_list = []
-        if self.doc:
-            body_list.append(self.doc + "\n")
+        buff = io.StringIO()
+        writer = _DocWriter(buff, root=self)
+        self._write_doc_body(writer, path, **kwargs)
+        writer.close()
+        return buff.getvalue()
+
+    def _has_doc_body(self) -> bool:
+        return bool(
+            self.doc
+            or (
+                not self.fold_subdoc
+                and (self.repeat or self.sub_fields or self.sub_variants)
+            )
+        )
+
+    def _write_doc_body(
+        self, writer: _DocWriter, path: list[str] | None = None, **kwargs: Any
+    ) -> None:
+        writer.write_shared(
+            self, "body", path, lambda w, p: self._render_doc_body(w, p, **kwargs)
+        )
+
+    def _render_doc_body(
+        self, writer: _DocWriter, path: list[str] | None, **kwargs: Any
+    ) -> None:
+        # parts of the body are separated by a line break
+        sep = ""
+        if self.doc:
+            writer.write(self.doc + "\n")
+            sep = "\n"
         if not self.fold_subdoc:
             if self.repeat:
                 unsubscripted_dtype = {
@@ -743,21 +1287,22 @@ class Argument:
                     if dict in unsubscripted_dtype:
                         allowed_types.append("dict")
                         allowed_element.append("key-value pair")
-                body_list.append(
-                    f"This argument takes a {' or '.join(allowed_types)} with "
+                writer.write(
+                    f"{sep}This argument takes a {' or '.join(allowed_types)} with "
                     f"each {' or '.join(allowed_element)} containing the following: \n"
                 )
+                sep = "\n"
             if self.sub_fields:
-                # body_list.append("") # genetate a blank line
-                # body_list.append("This argument accept the following sub arguments:")
                 for subarg in self.sub_fields.values():
-                    body_list.append(subarg.gen_doc(path, **kwargs))
+                    writer.write(sep)
+                    subarg._write_doc(writer, path, **kwargs)
+                    sep = "\n"
             if self.sub_variants:
                 showflag = len(self.sub_variants) > 1
                 for subvrnt in self.sub_variants.values():
-                    body_list.append(subvrnt.gen_doc(path, showflag, **kwargs))
-        body = "\n".join(body_list)
-        return body
+                    writer.write(sep)
+                    subvrnt._write_doc(writer, path, showflag, **kwargs)
+                    sep = "\n"
 
     def _get_type_name(self, dd: type | Any | None) -> str:
         """Get type name for doc/message generation."""
@@ -766,6 +1311,573 @@ class Argument:
         return str(dd) if isinstance(get_origin(dd), type) else dd.__name__
 
 
+# frames of the traversal engine, on top of which the work resumes
+_TRAVERSE_FIELDS = 0  # (kind, sub arguments, argdict): keys left in argdict
+_TRAVERSE_ITEMS = 1  # (kind, argument, items): elements left in a repeat
+_TRAVERSE_POP = (2,)  # leave the last key of the path
+
+
+def _traverse_steps(
+    root: Argument,
+    data: Any,
+    is_argdict: bool,
+    key_hook: HookArgKType,
+    value_hook: HookArgVType,
+    sub_hook: HookArgKType,
+    variant_hook: HookVrntType,
+    path: list[str | int],
+    allow_ref: bool,
+    is_async: bool,
+) -> Generator[Awaitable, None, None]:
+    """Traverse with an explicit stack of frames instead of recursion.
+
+    The hooks are called in the same order as a depth-first recursion over
+    the sub fields, but the depth of the data is not limited by the Python
+    recursion limit. Sub fields and repeat elements are taken one by one,
+    so changes made by the hooks to the data ahead are seen as before.
+    The path is restored when the traversal ends, even on errors.
+
+    The engine is a generator shared by the synchronous and asynchronous
+    drivers, `_run_traverse` and `_arun_traverse`. If `is_async` is true,
+    it yields the awaitables returned by the hooks, the loading of ``$ref``
+    files, and a pause every `_ASYNC_YIELD_INTERVAL` repeat elements entered,
+    each to be awaited before the traversal resumes. Otherwise nothing is
+    yielded.
+
+    Parameters
+    ----------
+    root : Argument
+        The argument to start from.
+    data : Any
+        The data to traverse.
+    is_argdict : bool
+        Whether data is the dict holding the key of root, as in `traverse`,
+        or its value, as in `traverse_value`.
+    key_hook, value_hook, sub_hook, variant_hook : Callable
+        The hooks, see `Argument.traverse`.
+    path : list[str | int]
+        The path of data; keys are appended to it while traversing.
+    allow_ref : bool
+        If true, allow loading from external files via the ``$ref`` key.
+    is_async : bool
+        Whether to yield the awaitables to the asynchronous driver.
+
+    Yields
+    ------
+    Awaitable
+        The steps to be awaited, only if `is_async` is true.
+    """
+    stack: list[tuple] = []
+    # the argument whose dict is entered next, and the dict
+    entering: Argument | None = None
+    entered: Any = None
+    # repeat elements entered, to pause every _ASYNC_YIELD_INTERVAL of them
+    count = 0
+
+    def push_items(arg: Argument, value: Any) -> None:
+        # push the frame traversing the elements of a repeat, if any
+        if isinstance(value, list):
+            stack.append((_TRAVERSE_ITEMS, arg, enumerate(value)))
+        elif isinstance(value, dict):
+            stack.append((_TRAVERSE_ITEMS, arg, iter(value.items())))
+
+    depth = len(path)
+    try:
+        if is_argdict:
+            stack.append((_TRAVERSE_FIELDS, iter((root,)), data))
+        elif root.repeat:
+            push_items(root, data)
+        elif isinstance(data, dict):
+            entering, entered = root, data
+        while True:
+            if entering is not None:
+                # a dict to be checked against the sub fields of the argument
+                arg, value = entering, entered
+                entering = entered = None
+                if not isinstance(value, dict):
+                    raise ArgumentTypeError(
+                        path,
+                        f"key `{path[-1]}` gets wrong value type, "
+                        f"requires dict but {type(value).__name__} is given",
+                    )
+                if "$ref" in value:
+                    if is_async:
+                        yield _aresolve_ref(value, allow_ref)
+                    else:
+                        _resolve_ref(value, allow_ref)
+                res = sub_hook(arg, value, path)
+                if is_async and inspect.isawaitable(res):
+                    yield res
+                if arg.sub_variants:
+                    for subvrnt in arg.sub_variants.values():
+                        res = variant_hook(subvrnt, value, path)
+                        if is_async and inspect.isawaitable(res):
+                            yield res
+                    subargs = arg.flatten_sub(value, path).values()
+                else:
+                    # nothing to flatten
+                    subargs = arg.sub_fields.values()
+                stack.append((_TRAVERSE_FIELDS, iter(subargs), value))
+            if not stack:
+                break
+            frame = stack[-1]
+            kind = frame[0]
+            if kind == _TRAVERSE_FIELDS:
+                argdict = frame[2]
+                # visit keys until one has a value to traverse into
+                for subarg in frame[1]:
+                    res = key_hook(subarg, argdict, path)
+                    if is_async and inspect.isawaitable(res):
+                        yield res
+                    if subarg.name in argdict:
+                        value = argdict[subarg.name]
+                        res = value_hook(subarg, value, path)
+                        if is_async and inspect.isawaitable(res):
+                            yield res
+                        if subarg.repeat:
+                            if isinstance(value, (list, dict)):
+                                path.append(subarg.name)
+                                stack.append(_TRAVERSE_POP)
+                                push_items(subarg, value)
+                                break
+                        elif isinstance(value, dict):
+                            path.append(subarg.name)
+                            stack.append(_TRAVERSE_POP)
+                            entering, entered = subarg, value
+                            break
+                else:
+                    stack.pop()
+            elif kind == _TRAVERSE_ITEMS:
+                for kk, item in frame[2]:
+                    if is_async:
+                        count += 1
+                        if count % _ASYNC_YIELD_INTERVAL == 0:
+                            # let other tasks run between elements of long lists
+                            yield asyncio.sleep(0)
+                    path.append(kk)
+                    stack.append(_TRAVERSE_POP)
+                    entering, entered = frame[1], item
+                    break
+                else:
+                    stack.pop()
+            else:
+                stack.pop()
+                path.pop()
+    finally:
+        del path[depth:]
+
+
+def _run_traverse(
+    root: Argument,
+    data: Any,
+    is_argdict: bool,
+    key_hook: HookArgKType,
+    value_hook: HookArgVType,
+    sub_hook: HookArgKType,
+    variant_hook: HookVrntType,
+    path: list[str | int],
+    allow_ref: bool,
+) -> None:
+    """Run the traversal of `_traverse_steps` synchronously."""
+    for _ in _traverse_steps(
+        root,
+        data,
+        is_argdict,
+        key_hook,
+        value_hook,
+        sub_hook,
+        variant_hook,
+        path,
+        allow_ref,
+        False,
+    ):
+        pass
+
+
+async def _arun_traverse(
+    root: Argument,
+    data: Any,
+    is_argdict: bool,
+    key_hook: Callable = _DUMMYHOOK,
+    value_hook: Callable = _DUMMYHOOK,
+    sub_hook: Callable = _DUMMYHOOK,
+    variant_hook: Callable = _DUMMYHOOK,
+    allow_ref: bool = False,
+) -> None:
+    """Run the traversal of `_traverse_steps`, awaiting the yielded steps.
+
+    The hooks may return awaitables, which are awaited in turn.
+    """
+    steps = _traverse_steps(
+        root,
+        data,
+        is_argdict,
+        key_hook,
+        value_hook,
+        sub_hook,
+        variant_hook,
+        [],
+        allow_ref,
+        True,
+    )
+    try:
+        for step in steps:
+            await step
+    finally:
+        # leave the generator at once if a step fails
+        steps.close()
+
+
+def _check_columns(
+    root: Argument,
+    data: Any,
+    is_argdict: bool,
+    strict: bool,
+    allow_ndarray: bool = False,
+) -> bool:
+    """Check the data column by column, as the fast path of `Argument.check`.
+
+    The dicts to be checked against the same argument, e.g. the elements of
+    a repeat, are grouped by their variant choices, so that the variants are
+    flattened once per group. In each group, the sub fields are checked as
+    columns: one pass for the presence of the keys, then one type pass per
+    column. The nested dicts of all the elements are gathered and checked in
+    the same way. Arguments with an ``extra_check`` are left to the
+    traversal, so that each extra check is run once on each value.
+
+    No error is raised here. If anything fails, False is returned, and the
+    elementwise traversal is expected to run to report the first error with
+    its exact path.
+
+    Parameters
+    ----------
+    root : Argument
+        The argument to start from.
+    data : Any
+        The data to check.
+    is_argdict : bool
+        Whether data is the dict holding the key of root, as in `check`,
+        or its value, as in `check_value`.
+    strict : bool
+        If true, only keys defined in `Argument` are allowed.
+    allow_ndarray : bool, optional
+        If true, accept `numpy.ndarray` for `List[int]` and `List[float]`.
+
+    Returns
+    -------
+    bool
+        True if the data passes the check.
+    """
+    # (argument, dicts): the dicts to check against the sub fields of arg
+    entered: list[tuple[Argument, list]] = []
+
+    def enter_column(arg: Argument, column: list) -> None:
+        if arg.repeat:
+            items = []
+            for value in column:
+                if isinstance(value, list):
+                    items.extend(value)
+                elif isinstance(value, dict):
+                    items.extend(value.values())
+            column = items
+        else:
+            column = [vv for vv in column if isinstance(vv, dict)]
+        if column:
+            entered.append((arg, column))
+
+    def check_fields(subargs: Iterable[Argument], dicts: list[dict]) -> bool:
+        for subarg in subargs:
+            if subarg.extra_check is not None:
+                return False
+            name = subarg.name
+            column = [dd[name] for dd in dicts if name in dd]
+            if len(column) < len(dicts) and subarg.optional is not True:
+                return False
+            # isinstance is enough for plain types; typeguard for the others
+            plain = tuple(dt for dt in subarg.dtype if type(dt) is type)
+            for value in column:
+                if not isinstance(value, plain):
+                    subarg._check_type(value, allow_ndarray=allow_ndarray)
+            enter_column(subarg, column)
+        return True
+
+    def check_dicts(arg: Argument, dicts: list) -> bool:
+        for dd in dicts:
+            if not isinstance(dd, dict) or "$ref" in dd:
+                return False
+        if arg.sub_variants:
+            flags = _variant_flags(arg)
+            groups: dict[tuple, list[dict]] = {}
+            for dd in dicts:
+                key = tuple(dd.get(ff, _Flags.NONE) for ff in flags)
+                groups.setdefault(key, []).append(dd)
+            columns = [
+                (arg.flatten_sub(group[0]).values(), group) for group in groups.values()
+            ]
+        else:
+            columns = [(arg.sub_fields.values(), dicts)]
+        for subargs, group in columns:
+            if strict and subargs:
+                allowed = {aa.name for aa in subargs}
+                allowed.add("$schema")
+                if not all(allowed.issuperset(dd) for dd in group):
+                    return False
+            if not check_fields(subargs, group):
+                return False
+        return True
+
+    try:
+        if is_argdict:
+            if not isinstance(data, dict) or not check_fields((root,), [data]):
+                return False
+        else:
+            enter_column(root, [data])
+        while entered:
+            if not check_dicts(*entered.pop()):
+                return False
+    except Exception:
+        # the errors of the type checks, left to the traversal
+        return False
+    return True
+
+
+def _variant_flags(arg: Argument) -> tuple[str, ...]:
+    """Get the flag names of all the variants that arg may be flattened with."""
+    flags = {}
+    seen = set()
+    todo = [arg]
+    while todo:
+        aa = todo.pop()
+        if id(aa) in seen:
+            continue
+        seen.add(id(aa))
+        for vrnt in aa.sub_variants.values():
+            flags[vrnt.flag_name] = None
+            todo.extend(vrnt.choice_dict.values())
+    return tuple(flags)
+
+
+class ArgumentVisitor:
+    """Run several traversal hooks together in one traversal.
+
+    Calling `Argument.traverse` once per hook resolves ``$ref``, flattens the
+    variants and walks the data again for each of them. A visitor collects
+    key, value, sub and variant hooks, e.g. the built-in checks of
+    `ArgumentVisitor.checker` and user-supplied ones, and runs all of them
+    in a single traversal.
+
+    At each dict, the sub hooks are run first, then the variant hooks for
+    each variant; at each key, the key hooks are run, then the value hooks
+    if the key exists. Hooks of the same kind are run in the order they are
+    added. Each hook is given a list of its own as the path, with int
+    indexes for the elements of repeat lists, see `Argument.traverse`.
+
+    Parameters
+    ----------
+    key_hooks : list of Callable, optional
+        Hooks called with the argument, the dict that may hold its key, and
+        the path of the dict.
+    value_hooks : list of Callable, optional
+        Hooks called with the argument, its value, and the path of the dict
+        holding it.
+    sub_hooks : list of Callable, optional
+        Hooks called with the argument, its dict value, and the path of the
+        dict.
+    variant_hooks : list of Callable, optional
+        Hooks called with the variant, the dict holding its flag, and the
+        path of the dict.
+
+    Examples
+    --------
+    >>> ca = Argument("base", dict, [Argument("sub", int, optional=True)])
+    >>> missing = []
+    >>> visitor = ArgumentVisitor.checker(strict=True).add(
+    ...     key_hook=lambda arg, argdict, path: (
+    ...         arg.name in argdict or missing.append(arg.name)
+    ...     )
+    ... )
+    >>> visitor.visit_value(ca, {})
+    >>> missing
+    ['sub']
+    """
+
+    def __init__(
+        self,
+        key_hooks: Iterable[HookArgKType] = (),
+        value_hooks: Iterable[HookArgVType] = (),
+        sub_hooks: Iterable[HookArgKType] = (),
+        variant_hooks: Iterable[HookVrntType] = (),
+    ) -> None:
+        self.key_hooks = list(key_hooks)
+        self.value_hooks = list(value_hooks)
+        self.sub_hooks = list(sub_hooks)
+        self.variant_hooks = list(variant_hooks)
+        # built-in hooks given the path of the traversal itself, not a copy
+        self._shared_path_hooks: list[Callable] = []
+
+    @classmethod
+    def checker(
+        cls, strict: bool = False, allow_ndarray: bool = False
+    ) -> ArgumentVisitor:
+        """Get a visitor with the hooks of `Argument.check`.
+
+        Parameters
+        ----------
+        strict : bool, optional
+            If true, only keys defined in `Argument` are allowed.
+        allow_ndarray : bool, optional
+            If true, a one-dimensional `numpy.ndarray` of a matching dtype is
+            accepted by the arguments of `List[int]` or `List[float]`.
+
+        Returns
+        -------
+        ArgumentVisitor
+            the visitor checking the data
+        """
+        visitor = cls(
+            key_hooks=[Argument._check_exist],
+            value_hooks=[
+                (lambda a, v, p: a._check_data(v, p, allow_ndarray=True))
+                if allow_ndarray
+                else Argument._check_data
+            ],
+            sub_hooks=[Argument._check_strict] if strict else [],
+        )
+        # the checks do not keep the path, so they can skip copying it
+        visitor._shared_path_hooks = [
+            *visitor.key_hooks,
+            *visitor.value_hooks,
+            *visitor.sub_hooks,
+        ]
+        return visitor
+
+    def add(
+        self,
+        key_hook: HookArgKType | None = None,
+        value_hook: HookArgVType | None = None,
+        sub_hook: HookArgKType | None = None,
+        variant_hook: HookVrntType | None = None,
+    ) -> ArgumentVisitor:
+        """Add hooks, run after the hooks of the same kind added before.
+
+        Returns
+        -------
+        ArgumentVisitor
+            the visitor itself
+        """
+        if key_hook is not None:
+            self.key_hooks.append(key_hook)
+        if value_hook is not None:
+            self.value_hooks.append(value_hook)
+        if sub_hook is not None:
+            self.sub_hooks.append(sub_hook)
+        if variant_hook is not None:
+            self.variant_hooks.append(variant_hook)
+        return self
+
+    def visit(
+        self,
+        arg: Argument,
+        argdict: dict,
+        path: list[str | int] | None = None,
+        allow_ref: bool = False,
+    ) -> None:
+        """Run the hooks on the dict holding the key of arg.
+
+        Parameters
+        ----------
+        arg : Argument
+            The argument describing the data.
+        argdict : dict
+            The dict holding the key of arg.
+        path : list[str | int], optional
+            The path of argdict.
+        allow_ref : bool, optional
+            If true, allow loading from external files via the ``$ref`` key.
+            The loaded content is merged into the data in place.
+        """
+        _run_traverse(
+            arg,
+            argdict,
+            True,
+            *self._hooks(),
+            [] if path is None else path,
+            allow_ref,
+        )
+
+    def visit_value(
+        self,
+        arg: Argument,
+        value: Any,
+        path: list[str | int] | None = None,
+        allow_ref: bool = False,
+    ) -> None:
+        """Run the hooks on the value of arg, without the leading key.
+
+        Parameters
+        ----------
+        arg : Argument
+            The argument describing the data.
+        value : Any
+            The value of arg.
+        path : list[str | int], optional
+            The path of value.
+        allow_ref : bool, optional
+            If true, allow loading from external files via the ``$ref`` key.
+            The loaded content is merged into the data in place.
+        """
+        _run_traverse(
+            arg,
+            value,
+            False,
+            *self._hooks(),
+            [] if path is None else path,
+            allow_ref,
+        )
+
+    def _hooks(self) -> tuple[Callable, Callable, Callable, Callable]:
+        return (
+            _chain_hooks(self._snapshot_user_hooks(self.key_hooks)),
+            _chain_hooks(self._snapshot_user_hooks(self.value_hooks)),
+            _chain_hooks(self._snapshot_user_hooks(self.sub_hooks)),
+            _chain_hooks(self._snapshot_user_hooks(self.variant_hooks)),
+        )
+
+    def _snapshot_user_hooks(self, hooks: list[Callable]) -> list[Callable]:
+        return [
+            hh
+            if any(hh is bb for bb in self._shared_path_hooks)
+            else _snapshot_path(hh)
+            for hh in hooks
+        ]
+
+
+def _snapshot_path(hook: Callable) -> Callable:
+    """Get a hook calling the given one with a copy of the path."""
+    if hook is _DUMMYHOOK:
+        return hook
+
+    def snapshot(a: Argument | Variant, x: dict | Any, p: list[str | int]) -> Any:
+        return hook(a, x, list(p))
+
+    return snapshot
+
+
+def _chain_hooks(hooks: list[Callable]) -> Callable:
+    """Get a hook calling the given hooks in order."""
+    if not hooks:
+        return _DUMMYHOOK
+    if len(hooks) == 1:
+        return hooks[0]
+    chain = tuple(hooks)
+
+    def hook(a: Argument | Variant, x: dict | Any, p: list[str | int]) -> None:
+        for hh in chain:
+            hh(a, x, p)
+
+    return hook
+
+
 class Variant:
     """Define multiple choices of possible argument sets.
 
@@ -805,6 +1917,8 @@ class Variant:
         self.flag_name = flag_name
         self.choice_dict: dict[str, Argument] = {}
         self.choice_alias: dict[str, str] = {}
+        # suggestion indexes of the tags, for invalid choices
+        self._suggestions: dict[tuple, _SuggestionIndex] = {}
         self.extend_choices(choices)
         self.optional = optional
         if optional and not default_tag:
@@ -856,17 +1970,20 @@ class Variant:
             exclude={self.flag_name},
             err_msg=f"Variant with flag `{self.flag_name}`",
         )
+        # not a new set of all the tags, so that adding choices one by
+        # one does not take quadratic time
+        tags: ChainMap[str, Any] = ChainMap(self.choice_dict, {self.flag_name: None})
         update_nodup(
             self.choice_alias,
             *[[(a, c.name) for a in c.alias] for c in choices],
-            exclude={self.flag_name, *self.choice_dict.keys()},
+            exclude=tags,
             err_msg=f"building alias dict for Variant with flag `{self.flag_name}`",
         )
 
     def add_choice(
         self,
         tag: str | Argument,
-        _dtype: None | type | Iterable[type] = dict,
+        _dtype: type | Iterable[type] | None = dict,
         *args: Any,
         **kwargs: Any,
     ) -> Argument:
@@ -895,7 +2012,9 @@ class Variant:
     # above are creation part
     # below are helpers for traversing
 
-    def get_choice(self, argdict: dict, path: list[str] | None = None) -> Argument:
+    def get_choice(
+        self, argdict: dict, path: list[str | int] | None = None
+    ) -> Argument:
         if self.flag_name in argdict:
             tag = argdict[self.flag_name]
             if tag in self.choice_dict:
@@ -908,7 +2027,9 @@ class Variant:
                     f"get invalid choice `{tag}` for flag key `{self.flag_name}`."
                     + did_you_mean(
                         tag,
-                        list(self.choice_dict.keys()) + list(self.choice_alias.keys()),
+                        _cached_index(
+                            self._suggestions, (*self.choice_dict, *self.choice_alias)
+                        ),
                     ),
                 )
         elif self.optional:
@@ -920,7 +2041,7 @@ class Variant:
             )
 
     def flatten_sub(
-        self, argdict: dict, path: list[str] | None = None
+        self, argdict: dict, path: list[str | int] | None = None
     ) -> dict[str, Argument]:
         choice = self.get_choice(argdict, path)
         fields = {
@@ -930,7 +2051,7 @@ class Variant:
         return fields
 
     def _convert_choice_alias(
-        self, argdict: dict, path: list[str] | None = None
+        self, argdict: dict, path: list[str | int] | None = None
     ) -> None:
         if self.flag_name in argdict:
             tag = argdict[self.flag_name]
@@ -943,24 +2064,64 @@ class Variant:
     def gen_doc(
         self, path: list[str] | None = None, showflag: bool = False, **kwargs: Any
     ) -> str:
-        body_list = [""]
-        body_list.append(
-            f"Depending on the value of *{self.flag_name}*, "
+        buff = io.StringIO()
+        self.write_doc(buff, path, showflag, **kwargs)
+        return buff.getvalue()
+
+    def write_doc(
+        self,
+        stream: IO[str],
+        path: list[str] | None = None,
+        showflag: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """Write doc string for the current Variant to a stream.
+
+        Same as `stream.write(self.gen_doc(path, showflag, **kwargs))`.
+        """
+        writer = _DocWriter(stream, root=self)
+        self._write_doc(writer, path, showflag, **kwargs)
+        writer.close()
+
+    def _write_doc(
+        self,
+        writer: _DocWriter,
+        path: list[str] | None = None,
+        showflag: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        writer.write_shared(
+            self,
+            f"showflag={showflag}",
+            path,
+            lambda w, p: self._render_doc(w, p, showflag, **kwargs),
+        )
+
+    def _render_doc(
+        self,
+        writer: _DocWriter,
+        path: list[str] | None,
+        showflag: bool,
+        **kwargs: Any,
+    ) -> None:
+        # each part starts with a line break, as the first part is empty
+        writer.write(
+            f"\nDepending on the value of *{self.flag_name}*, "
             "different sub args are accepted. \n"
         )
-        body_list.append(self.gen_doc_flag(path, showflag=showflag, **kwargs))
+        writer.write("\n" + self.gen_doc_flag(path, showflag=showflag, **kwargs))
         fnstr = f"*{self.flag_name}*"
         if kwargs.get("make_link"):
             assert path is not None
             if not kwargs.get("make_anchor"):
                 raise ValueError("`make_link` only works with `make_anchor` set")
             fnstr, target = make_ref_pair([*path, self.flag_name], fnstr, "flag")
-            body_list.append(target + "\n")
+            writer.write("\n" + target + "\n")
         for choice in self.choice_dict.values():
-            body_list.append("")
+            writer.write("\n")
             choice_path = self._make_cpath(choice.name, path, showflag)
             if kwargs.get("make_anchor"):
-                body_list.append(make_rst_refid(choice_path))
+                writer.write("\n" + make_rst_refid(choice_path))
             c_alias = (
                 f" (or its alias{'es' if len(choice.alias) > 1 else ''} "
                 + ", ".join(f"``{al}``" for al in choice.alias)
@@ -968,14 +2129,9 @@ class Variant:
                 if choice.alias
                 else ""
             )
-            body_list.extend(
-                [
-                    f"When {fnstr} is set to ``{choice.name}``{c_alias}: \n",
-                    choice.gen_doc_body(choice_path, **kwargs),
-                ]
-            )
-        body = "\n".join(body_list)
-        return body
+            writer.write(f"\nWhen {fnstr} is set to ``{choice.name}``{c_alias}: \n")
+            writer.write("\n")
+            choice._write_doc_body(writer, choice_path, **kwargs)
 
     def gen_doc_flag(self, path: list[str] | None = None, **kwargs: Any) -> str:
         headdoc = f"{self.flag_name}:"
@@ -1043,6 +2199,209 @@ class Variant:
         return cpath
 
 
+class _DocWriter:
+    """Write doc text to a stream, indenting it on the fly.
+
+    The indentation is kept as state instead of re-indenting the text of
+    each subtree at every level. As :func:`textwrap.indent`, the prefix is
+    only added to lines that do not consist solely of whitespace, and the
+    prefix of a line is the one in effect when the line starts.
+
+    Subtrees that appear more than once under `root` are rendered only once
+    per writer, see :meth:`write_shared`.
+
+    Parameters
+    ----------
+    stream : IO[str]
+        The stream to write to.
+    root : Argument or Variant, optional
+        The object whose doc is written, used to find shared subtrees.
+    """
+
+    def __init__(self, stream: IO[str], root: Argument | Variant | None = None) -> None:
+        self.stream = stream
+        self.prefix = ""
+        self._line: list[str] = []
+        self._line_prefix = ""
+        self._fingerprints: dict[int, str] = {}
+        self._shared: set[str] = set()
+        self._fragments: dict[tuple[str, str], str] = {}
+        if root is not None:
+            self._shared = _find_shared(root, self._fingerprints)
+
+    @contextmanager
+    def indent(self) -> Iterator[None]:
+        """Indent the text written in the context by one more level."""
+        old_prefix = self.prefix
+        self.prefix += INDENT
+        try:
+            yield
+        finally:
+            self.prefix = old_prefix
+
+    def write(self, text: str) -> None:
+        for piece in text.splitlines(True):
+            if not self._line:
+                self._line_prefix = self.prefix
+            self._line.append(piece)
+            if piece[-1] in _LINE_BREAKS:
+                self._flush_line()
+
+    def close(self) -> None:
+        """Write the last line, which has no line break."""
+        if self._line:
+            self._flush_line()
+
+    def write_shared(
+        self,
+        obj: Argument | Variant,
+        kind: str,
+        path: list[str] | None,
+        render: Callable[[_DocWriter, list[str] | None], None],
+    ) -> None:
+        """Write the doc of `obj` by calling ``render(writer, path)``.
+
+        If `obj` is a shared subtree, it is rendered once at a placeholder
+        path, and the real path is substituted in each time it is written.
+        All paths in the doc, including anchors and links, are built by
+        joining `path` with the names below it, so the substitution gives
+        the same text as rendering it again.
+
+        Parameters
+        ----------
+        obj : Argument or Variant
+            The object to write.
+        kind : str
+            Which part of the doc of `obj` is written.
+        path : list of str, optional
+            The path of the parent of `obj`.
+        render : callable
+            Render the doc to the given writer.
+        """
+        fingerprint = self._fingerprints.get(id(obj))
+        if not path or fingerprint not in self._shared:
+            render(self, path)
+            return
+        key = (kind, fingerprint)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            buff = io.StringIO()
+            writer = _DocWriter(buff)
+            writer._fingerprints = self._fingerprints
+            writer._shared = self._shared
+            writer._fragments = self._fragments
+            render(writer, [_PATH_PLACEHOLDER])
+            writer.close()
+            fragment = self._fragments[key] = buff.getvalue()
+        self.write(fragment.replace(_PATH_PLACEHOLDER, "/".join(path)))
+
+    def _flush_line(self) -> None:
+        line = "".join(self._line)
+        self._line = []
+        if self._line_prefix and line.strip():
+            self.stream.write(self._line_prefix)
+        self.stream.write(line)
+
+
+# line boundaries used by str.splitlines
+_LINE_BREAKS = frozenset("\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+# stands for the path of a shared subtree while it is rendered
+_PATH_PLACEHOLDER = "\x00dargs-path\x00"
+
+
+def _fingerprint(obj: Argument | Variant, memo: dict[int, str]) -> str:
+    """Compute the structural fingerprint of an Argument or a Variant.
+
+    Objects with the same fingerprint give the same doc and JSON schema.
+    Attributes only used at runtime, such as `extra_check`, are ignored.
+
+    Parameters
+    ----------
+    obj : Argument or Variant
+        The object to fingerprint.
+    memo : dict
+        Fingerprints computed so far, keyed by the id of the objects. It
+        must not outlive the objects, nor be kept across modifications.
+
+    Returns
+    -------
+    str
+        The hex digest of the structure.
+    """
+    fingerprint = memo.get(id(obj))
+    if fingerprint is not None:
+        return fingerprint
+    if isinstance(obj, Argument):
+        if isinstance(obj.default, _Flags):
+            default = repr(obj.default)
+        else:
+            default = (repr(type(obj.default)), repr(obj.default))
+        fields = (
+            "Argument",
+            obj.name,
+            tuple(repr(dt) for dt in obj.dtype),
+            obj.repeat,
+            obj.optional,
+            default,
+            tuple(obj.alias),
+            obj.doc,
+            obj.fold_subdoc,
+            tuple(_fingerprint(aa, memo) for aa in obj.sub_fields.values()),
+            tuple(_fingerprint(vv, memo) for vv in obj.sub_variants.values()),
+        )
+    else:
+        fields = (
+            "Variant",
+            obj.flag_name,
+            obj.optional,
+            obj.default_tag,
+            obj.doc,
+            tuple(_fingerprint(cc, memo) for cc in obj.choice_dict.values()),
+            tuple(obj.choice_alias.items()),
+        )
+    fingerprint = hashlib.sha256(
+        repr(fields).encode("utf-8", "surrogatepass")
+    ).hexdigest()
+    memo[id(obj)] = fingerprint
+    return fingerprint
+
+
+def _find_shared(root: Argument | Variant, memo: dict[int, str]) -> set[str]:
+    """Find the subtrees that are referred to more than once under `root`.
+
+    Parameters
+    ----------
+    root : Argument or Variant
+        The root of the tree.
+    memo : dict
+        Fingerprints keyed by the id of the objects, filled for every object
+        in the tree.
+
+    Returns
+    -------
+    set of str
+        The fingerprints of the shared subtrees.
+    """
+    _fingerprint(root, memo)
+    counts: dict[str, int] = {}
+    visited = set()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in visited:
+            continue
+        visited.add(id(obj))
+        if isinstance(obj, Argument):
+            children = [*obj.sub_fields.values(), *obj.sub_variants.values()]
+        else:
+            children = list(obj.choice_dict.values())
+        for child in children:
+            fingerprint = memo[id(child)]
+            counts[fingerprint] = counts.get(fingerprint, 0) + 1
+            stack.append(child)
+    return {fp for fp, count in counts.items() if count > 1}
+
+
 def make_rst_refid(name: str | list[str]) -> str:
     if not isinstance(name, str):
         name = "/".join(name)
@@ -1088,54 +2447,205 @@ def update_nodup(
     return this
 
 
+def _same_value(value: Any, default: Any) -> bool:
+    # unlike ==, 1, 1.0 and True are different here, since normalizing
+    # would bring back the default instead of the original value
+    if type(value) is not type(default):
+        return False
+    if isinstance(value, dict):
+        return value.keys() == default.keys() and all(
+            _same_value(vv, default[kk]) for kk, vv in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return len(value) == len(default) and all(
+            _same_value(vv, dd) for vv, dd in zip(value, default)
+        )
+    return value == default
+
+
 def trim_by_pattern(
     argdict: dict,
-    pattern: str,
+    pattern: str | Iterable[str],
     reserved: Iterable[str] | None = None,
     use_regex: bool = False,
 ) -> None:
-    rep = fnmatch.translate(pattern) if not use_regex else pattern
-    rem = re.compile(rep)
+    """Discard the keys of a dict matching the pattern.
+
+    Parameters
+    ----------
+    argdict : dict
+        The dict to be trimmed in place.
+    pattern : str or list of str
+        The glob pattern, or the regular expression if `use_regex`. Keys
+        matching any of several patterns are discarded.
+    reserved : list of str, optional
+        Names that must not match the pattern.
+    use_regex : bool, optional
+        Whether the pattern is a regular expression.
+
+    Raises
+    ------
+    ValueError
+        If a reserved name matches the pattern.
+    """
+    if not isinstance(pattern, str):
+        pattern = tuple(pattern)
+    _trim(argdict, _trim_matcher(pattern, use_regex), reserved)
+
+
+def _trim(
+    argdict: dict,
+    select: _TrimMatcher,
+    reserved: Iterable[str] | None = None,
+) -> None:
+    """Discard the keys of a dict selected by a matcher of `_trim_matcher`."""
     if reserved:
-        # Use lambda instead of rem.match for ty type checker compatibility
-        conflict = list(filter(lambda x: rem.match(x) is not None, reserved))
+        select.check_reserved(reserved)
+    for key in select(argdict):
+        del argdict[key]
+
+
+class _TrimMatcher:
+    """Select the keys matching a trim pattern; see `_trim_matcher`.
+
+    Reserved names are checked against the pattern once, and remembered,
+    so that checking the same names again for each dict is a set lookup.
+
+    Parameters
+    ----------
+    pattern : str or tuple of str
+        The pattern, only used in error messages.
+    select : Callable[[Iterable], list[str]]
+        The function returning the keys that match the pattern.
+    """
+
+    def __init__(
+        self, pattern: str | tuple[str, ...], select: Callable[[Iterable], list[str]]
+    ) -> None:
+        self.pattern = pattern
+        self.select = select
+        self.allowed: set[str] = set()
+
+    def __call__(self, keys: Iterable) -> list[str]:
+        return self.select(keys)
+
+    def check_reserved(self, reserved: Iterable[str]) -> None:
+        """Raise ValueError if any of the reserved names matches the pattern."""
+        if self.allowed.issuperset(reserved):
+            return
+        reserved = [rr for rr in reserved if rr not in self.allowed]
+        conflict = self.select(reserved)
         if conflict:
+            pattern = self.pattern
+            if not isinstance(pattern, str):
+                pattern = "`, `".join(pattern)
             raise ValueError(
                 f"pattern `{pattern}` conflicts with the "
                 f"following reserved names: {', '.join(conflict)}"
             )
-    # Use lambda instead of rem.match for ty type checker compatibility
-    unrequired = list(filter(lambda x: rem.match(x) is not None, argdict.keys()))
-    for key in unrequired:
-        argdict.pop(key)
+        self.allowed.update(reserved)
 
 
-def _load_ref(ref_path: str) -> dict:
-    """Load a dict from an external file referenced by ``$ref``.
+@lru_cache(maxsize=128)
+def _trim_matcher(
+    pattern: str | tuple[str, ...], use_regex: bool = False
+) -> _TrimMatcher:
+    """Get the cached matcher selecting the keys matching the pattern.
+
+    Glob patterns made of a literal prefix and a trailing ``*``, such as the
+    default ``_*``, are tested with :meth:`str.startswith`. Other patterns
+    are combined into one compiled regular expression. Keys that are not
+    strings never match.
 
     Parameters
     ----------
-    ref_path : str
-        Path to the external file. Supported extensions: ``.json``, ``.yml``, ``.yaml``.
+    pattern : str or tuple of str
+        The glob pattern, or the regular expression if `use_regex`.
+    use_regex : bool, optional
+        Whether the pattern is a regular expression.
 
     Returns
     -------
-    dict
-        The loaded dict from the external file.
+    _TrimMatcher
+        the matcher returning the keys that match any of the patterns
+    """
+    patterns = (pattern,) if isinstance(pattern, str) else pattern
+    if not use_regex:
+        prefixes = tuple(
+            pp[:-1]
+            for pp in patterns
+            if pp.endswith("*") and not any(cc in pp[:-1] for cc in "*?[")
+        )
+        if len(prefixes) == len(patterns):
+            return _TrimMatcher(
+                pattern,
+                lambda keys: [
+                    kk for kk in keys if isinstance(kk, str) and kk.startswith(prefixes)
+                ],
+            )
+        rep = "|".join(fnmatch.translate(pp) for pp in patterns)
+    elif len(patterns) == 1:
+        rep = patterns[0]
+    else:
+        rep = "|".join(f"(?:{pp})" for pp in patterns)
+    match = re.compile(rep).match
+    return _TrimMatcher(
+        pattern, lambda keys: [kk for kk in keys if isinstance(kk, str) and match(kk)]
+    )
 
-    Raises
-    ------
-    ValueError
-        If the file extension is not supported, or if the file does not contain a
-        top-level mapping/object.
-    ImportError
-        If pyyaml is not installed and a YAML file is requested.
+
+# cache of parsed $ref targets: abspath -> (mtime_ns, size, loaded dict)
+_REF_CACHE: OrderedDict[str, tuple[int, int, dict]] = OrderedDict()
+_REF_CACHE_LOCK = threading.Lock()
+_REF_CACHE_MAXSIZE = 128
+
+
+def set_ref_cache_size(maxsize: int) -> None:
+    """Set the maximum number of files kept in the ``$ref`` cache.
+
+    Parsed ``$ref`` targets are cached by absolute path, modification time
+    and size, so a file referenced many times is only parsed once until it
+    changes on disk.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of cached files. Set to 0 to disable the cache.
     """
-    ext = os.path.splitext(ref_path)[1].lower()
+    global _REF_CACHE_MAXSIZE
+    if maxsize < 0:
+        raise ValueError("maxsize of the $ref cache should be non-negative")
+    with _REF_CACHE_LOCK:
+        _REF_CACHE_MAXSIZE = maxsize
+        while len(_REF_CACHE) > maxsize:
+            _REF_CACHE.popitem(last=False)
+
+
+def clear_ref_cache() -> None:
+    """Clear the cache of parsed ``$ref`` targets."""
+    with _REF_CACHE_LOCK:
+        _REF_CACHE.clear()
+
+
+def _copy_loaded(obj: Any) -> Any:
+    """Copy the containers of a loaded JSON/YAML object.
+
+    Much faster than :func:`copy.deepcopy` since the leaves of loaded data
+    are immutable scalars.
+    """
+    if isinstance(obj, dict):
+        return {kk: _copy_loaded(vv) for kk, vv in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_loaded(vv) for vv in obj]
+    return obj
+
+
+def _parse_ref(ref_path: str, ext: str) -> dict:
+    """Parse an external file referenced by ``$ref`` without caching."""
     if ext == ".json":
         with open(ref_path, encoding="utf-8") as f:
             loaded = json.load(f)
-    elif ext in (".yml", ".yaml"):
+    else:
         try:
             import yaml
         except ImportError as e:
@@ -1145,24 +2655,223 @@ def _load_ref(ref_path: str) -> dict:
             ) from e
         with open(ref_path, encoding="utf-8") as f:
             loaded = yaml.safe_load(f)
-    else:
-        raise ValueError(
-            f"Unsupported file extension `{ext}` for $ref. "
-            "Supported extensions are: .json, .yml, .yaml"
-        )
     if not isinstance(loaded, dict):
         raise ValueError(
             f"Referenced file {ref_path!r} must contain a mapping/object at the top "
             f"level, but got {type(loaded).__name__!r}."
         )
+    _rebase_refs(loaded, os.path.abspath(ref_path))
     return loaded
 
 
+def _rebase_refs(obj: Any, ref_file: str) -> None:
+    """Make the ``$ref`` values in a loaded file independent of the CWD.
+
+    Relative paths are resolved against the directory of the referencing
+    file, and fragment-only references (``#/pointer``) point to the
+    referencing file itself.
+    """
+    if isinstance(obj, dict):
+        ref = obj.get("$ref")
+        if isinstance(ref, str):
+            if ref.startswith("#"):
+                obj["$ref"] = ref_file + ref
+            elif not os.path.isabs(ref):
+                obj["$ref"] = os.path.join(os.path.dirname(ref_file), ref)
+        for vv in obj.values():
+            _rebase_refs(vv, ref_file)
+    elif isinstance(obj, list):
+        for vv in obj:
+            _rebase_refs(vv, ref_file)
+
+
+def _split_ref(ref: str) -> tuple[str, str]:
+    """Split a ``$ref`` value into the file path and the JSON pointer."""
+    ref_path, _, pointer = ref.partition("#")
+    return ref_path, pointer
+
+
+def _resolve_pointer(doc: dict, pointer: str, ref_path: str) -> Any:
+    """Resolve a JSON pointer (RFC 6901) in a loaded document."""
+    if not pointer:
+        return doc
+    if not pointer.startswith("/"):
+        raise ValueError(
+            f"Invalid JSON pointer {pointer!r} in $ref to {ref_path!r}: "
+            "it should start with `/`."
+        )
+    target = doc
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(target, dict) and token in target:
+            target = target[token]
+        elif (
+            isinstance(target, list)
+            and token.isdigit()
+            and (token == "0" or not token.startswith("0"))
+            and int(token) < len(target)
+        ):
+            target = target[int(token)]
+        else:
+            raise ValueError(
+                f"Cannot resolve JSON pointer {pointer!r} in {ref_path!r}: "
+                f"`{token}` is not found."
+            )
+    return target
+
+
+def _load_ref_shared(ref_path: str) -> tuple[dict, bool]:
+    """Load a ``$ref`` target, possibly shared with the cache.
+
+    Returns
+    -------
+    dict
+        The loaded dict, which must not be modified if it is shared.
+    bool
+        Whether the dict is shared with the cache.
+    """
+    ext = os.path.splitext(ref_path)[1].lower()
+    if ext not in (".json", ".yml", ".yaml"):
+        raise ValueError(
+            f"Unsupported file extension `{ext}` for $ref. "
+            "Supported extensions are: .json, .yml, .yaml"
+        )
+    if _REF_CACHE_MAXSIZE <= 0:
+        return _parse_ref(ref_path, ext), False
+    abspath = os.path.abspath(ref_path)
+    st = os.stat(abspath)
+    with _REF_CACHE_LOCK:
+        cached = _REF_CACHE.get(abspath)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            _REF_CACHE.move_to_end(abspath)
+            return cached[2], True
+    loaded = _parse_ref(ref_path, ext)
+    with _REF_CACHE_LOCK:
+        if _REF_CACHE_MAXSIZE > 0:
+            _REF_CACHE[abspath] = (st.st_mtime_ns, st.st_size, loaded)
+            _REF_CACHE.move_to_end(abspath)
+            while len(_REF_CACHE) > _REF_CACHE_MAXSIZE:
+                _REF_CACHE.popitem(last=False)
+            return loaded, True
+    return loaded, False
+
+
+def _load_ref(ref: str) -> dict:
+    """Load a dict from an external file referenced by ``$ref``.
+
+    Parsed files are cached (see :func:`set_ref_cache_size`); the returned
+    dict is always a private copy that can be modified freely.
+
+    Parameters
+    ----------
+    ref : str
+        Path to the external file, optionally followed by a JSON pointer
+        fragment, e.g., ``shared.json#/model/descriptor``.
+        Supported extensions: ``.json``, ``.yml``, ``.yaml``.
+
+    Returns
+    -------
+    dict
+        The loaded dict from the external file.
+
+    Raises
+    ------
+    ValueError
+        If the file extension is not supported, if the JSON pointer cannot be
+        resolved, or if the target is not a mapping/object.
+    ImportError
+        If pyyaml is not installed and a YAML file is requested.
+    """
+    if not isinstance(ref, str):
+        raise TypeError(f"$ref should be a string, but got {type(ref).__name__!r}.")
+    ref_path, pointer = _split_ref(ref)
+    if not ref_path:
+        raise ValueError(
+            f"$ref {ref!r} has no file path; fragment-only references are "
+            "only supported inside referenced files."
+        )
+    loaded, shared = _load_ref_shared(ref_path)
+    target = _resolve_pointer(loaded, pointer, ref_path)
+    if not isinstance(target, dict):
+        raise ValueError(
+            f"$ref {ref!r} must point to a mapping/object, "
+            f"but got {type(target).__name__!r}."
+        )
+    return _copy_loaded(target) if shared else target
+
+
+def _collect_refs(obj: Any, refs: list[str]) -> None:
+    """Collect the values of all ``$ref`` keys nested in ``obj``."""
+    if isinstance(obj, dict):
+        ref = obj.get("$ref")
+        if isinstance(ref, str):
+            refs.append(ref)
+        for vv in obj.values():
+            _collect_refs(vv, refs)
+    elif isinstance(obj, list):
+        for vv in obj:
+            _collect_refs(vv, refs)
+
+
+def _try_load_ref(ref_path: str) -> dict | None:
+    """Load a ``$ref`` target file into the cache, ignoring any error."""
+    try:
+        return _load_ref_shared(ref_path)[0]
+    except Exception:
+        # errors are raised later by _resolve_ref, at the same place as before
+        return None
+
+
+def _prefetch_refs(value: Any) -> None:
+    """Load all ``$ref`` targets of a document into the cache concurrently.
+
+    The document is scanned for ``$ref`` keys, and the distinct targets are
+    loaded in a thread pool. The loaded files are scanned in turn, so
+    chained references are prefetched as well. Errors are ignored here and
+    raised when the reference is resolved during traversal, which keeps the
+    error semantics (including cycle detection) of :func:`_resolve_ref`.
+
+    Parameters
+    ----------
+    value : Any
+        The document that may contain ``$ref`` keys.
+    """
+    if _REF_CACHE_MAXSIZE <= 0:
+        # nothing can be kept for the traversal
+        return
+    refs: list[str] = []
+    _collect_refs(value, refs)
+    seen: set[str] = set()
+    pool = None
+    try:
+        while refs:
+            ref_paths = (_split_ref(rr)[0] for rr in refs)
+            batch = [rr for rr in dict.fromkeys(ref_paths) if rr and rr not in seen]
+            seen.update(batch)
+            if len(batch) > 1:
+                if pool is None:
+                    pool = ThreadPoolExecutor()
+                loaded_list = list(pool.map(_try_load_ref, batch))
+            else:
+                loaded_list = [_try_load_ref(rr) for rr in batch]
+            refs = []
+            for loaded in loaded_list:
+                if loaded is not None:
+                    _collect_refs(loaded, refs)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
 def _resolve_ref(d: dict, allow_ref: bool = False) -> None:
     """Resolve the ``$ref`` key in a dict by loading from an external file.
 
-    If ``$ref`` is present in ``d``, its value is treated as a file path.
-    The file is loaded and its contents are merged into ``d``.  Keys already
+    If ``$ref`` is present in ``d``, its value is treated as a file path,
+    optionally followed by a JSON pointer fragment (``file.json#/a/b``) that
+    selects a sub-dict of the file.  Relative paths in the input data are
+    resolved against the current working directory, while relative paths
+    inside a referenced file are resolved against the directory of that
+    file.  The target is loaded and merged into ``d``.  Keys already
     present in ``d`` (other than ``$ref``) take precedence over keys from the
     loaded file, allowing local overrides.  Chained ``$ref`` values in the
     loaded content are resolved in turn.  Cyclic references are detected and
@@ -1193,15 +2902,64 @@ def _resolve_ref(d: dict, allow_ref: bool = False) -> None:
         )
     visited_refs: set[str] = set()
     while "$ref" in d:
-        ref_path = d.pop("$ref")
-        if ref_path in visited_refs:
-            raise ValueError(f"Cyclic $ref detected for path: {ref_path!r}")
-        visited_refs.add(ref_path)
-        loaded = _load_ref(ref_path)
-        # Merge: loaded content as base, local keys take precedence
-        merged = {**loaded, **d}
-        d.clear()
-        d.update(merged)
+        ref_path = _pop_ref(d, visited_refs)
+        _merge_ref(d, _load_ref(ref_path))
+
+
+async def _aresolve_ref(d: dict, allow_ref: bool = False) -> None:
+    """Asynchronous version of :func:`_resolve_ref`.
+
+    The files are loaded in the default executor of the running loop.
+    """
+    if "$ref" not in d:
+        return
+    if not allow_ref:
+        raise ValueError(
+            "$ref is not allowed by default. "
+            "Pass allow_ref=True to enable loading from external files."
+        )
+    loop = asyncio.get_running_loop()
+    visited_refs: set[str] = set()
+    while "$ref" in d:
+        ref_path = _pop_ref(d, visited_refs)
+        _merge_ref(d, await loop.run_in_executor(None, _load_ref, ref_path))
+
+
+async def _aprefetch_refs(value: Any) -> None:
+    """Asynchronous version of :func:`_prefetch_refs`."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _prefetch_refs, value)
+
+
+def _pop_ref(d: dict, visited_refs: set[str]) -> Any:
+    """Pop the ``$ref`` value of a dict, checking for cyclic references."""
+    ref_path = d.pop("$ref")
+    if isinstance(ref_path, str):
+        file_path, pointer = _split_ref(ref_path)
+        ref_key = f"{os.path.abspath(file_path)}#{pointer}" if file_path else ref_path
+    else:
+        ref_key = ref_path
+    if ref_key in visited_refs:
+        raise ValueError(f"Cyclic $ref detected for path: {ref_path!r}")
+    visited_refs.add(ref_key)
+    return ref_path
+
+
+def _merge_ref(d: dict, loaded: dict) -> None:
+    """Merge the loaded content into a dict, local keys taking precedence."""
+    merged = {**loaded, **d}
+    d.clear()
+    d.update(merged)
+
+
+def _is_ndarray(value: Any) -> bool:
+    """Whether value is a `numpy.ndarray`, without importing numpy.
+
+    No array can be created before numpy is imported by someone else, so
+    numpy stays an optional dependency.
+    """
+    np = sys.modules.get("numpy")
+    return np is not None and isinstance(value, np.ndarray)
 
 
 def isinstance_annotation(value: Any, dtype: type | Any) -> bool:
@@ -1249,6 +3007,9 @@ class ArgumentEncoder(json.JSONEncoder):
                 "repeat": o.repeat,
                 "sub_fields": o.sub_fields,
                 "sub_variants": o.sub_variants,
+                # the full types, which can be parsed by ArgumentDecoder
+                "dtype": [_format_dtype(dt) for dt in o.dtype],
+                "fold_subdoc": o.fold_subdoc,
             }
             if o.optional and o.default is not _Flags.NONE:
                 output["default"] = o.default
@@ -1270,20 +3031,362 @@ class ArgumentEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, o)
 
 
-def did_you_mean(choice: str, choices: Iterable[str]) -> str:
+class ArgumentDecoder(json.JSONDecoder):
+    """Extended JSON Decoder to rebuild the objects encoded by `ArgumentEncoder`.
+
+    The types are parsed from their names, including subscripted generics
+    such as ``List[int]``, without evaluating any code; only built-in types
+    and the generics of `typing` are known. `extra_check` is not encoded,
+    so it is lost.
+
+    Examples
+    --------
+    >>> json.loads(json.dumps(some_arg, cls=ArgumentEncoder), cls=ArgumentDecoder)
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # other dicts are still given to the object_hook of the caller
+        self._object_hook = kwargs.pop("object_hook", None)
+        super().__init__(*args, object_hook=self.decode_object, **kwargs)
+
+    def decode_object(self, obj: dict) -> Any:
+        """Rebuild an Argument or a Variant from a decoded dict.
+
+        Returns
+        -------
+        Any
+            for dicts encoded from Argument and Variant, the object; otherwise,
+            the dict given to the object_hook of the caller, if any
+        """
+        kind = obj.get("object")
+        if kind == "Argument" and "name" in obj:
+            dtype = obj["dtype"] if "dtype" in obj else obj["type"]
+            return Argument(
+                name=obj["name"],
+                dtype=[_parse_dtype(dt) for dt in dtype],
+                sub_fields=obj.get("sub_fields", {}).values(),
+                sub_variants=obj.get("sub_variants", {}).values(),
+                repeat=obj.get("repeat", False),
+                optional=obj.get("optional", False),
+                default=obj.get("default", _Flags.NONE),
+                alias=obj.get("alias"),
+                doc=obj.get("doc", ""),
+                fold_subdoc=obj.get("fold_subdoc", False),
+            )
+        elif kind == "Variant" and "flag_name" in obj:
+            return Variant(
+                flag_name=obj["flag_name"],
+                choices=obj.get("choice_dict", {}).values(),
+                optional=obj.get("optional", False),
+                default_tag=obj.get("default_tag", ""),
+                doc=obj.get("doc", ""),
+            )
+        if self._object_hook is not None:
+            return self._object_hook(obj)
+        return obj
+
+
+# the names of types known to ArgumentDecoder
+_DTYPE_NAMES = {
+    **{
+        tt.__name__: tt
+        for tt in (
+            bool,
+            bytes,
+            complex,
+            dict,
+            float,
+            frozenset,
+            int,
+            list,
+            object,
+            set,
+            str,
+            tuple,
+            type,
+            type(None),
+        )
+    },
+    **{
+        name: getattr(typing, name)
+        for name in (
+            "Any",
+            "Callable",
+            "Dict",
+            "FrozenSet",
+            "Iterable",
+            "List",
+            "Literal",
+            "Mapping",
+            "Optional",
+            "Sequence",
+            "Set",
+            "Tuple",
+            "Type",
+            "Union",
+        )
+        if hasattr(typing, name)
+    },
+}
+# the generics to subscript instead of the built-in types, which are not
+# subscriptable before Python 3.9
+_DTYPE_GENERICS = {
+    dict: typing.Dict,
+    frozenset: typing.FrozenSet,
+    list: typing.List,
+    set: typing.Set,
+    tuple: typing.Tuple,
+    type: typing.Type,
+}
+
+
+def _format_dtype(dtype: Any) -> str:
+    """Format a type, so that it can be parsed by `_parse_dtype`.
+
+    Raises
+    ------
+    TypeError
+        If the type is a class of `typing` that cannot be parsed back.
+    """
+    if dtype is Any:
+        return "Any"
+    if dtype is Ellipsis:
+        return "..."
+    if isinstance(dtype, list):
+        # the arguments of Callable
+        return "[" + ", ".join(_format_dtype(dt) for dt in dtype) + "]"
+    origin = get_origin(dtype)
+    if origin is None:
+        if (
+            isinstance(dtype, type)
+            and dtype.__module__ in ("typing", "typing_extensions")
+            and dtype.__name__ not in _DTYPE_NAMES
+        ):
+            # Argument keeps only the class of a type such as Literal["a"] or
+            # Optional[int] given in a list of types, e.g. _LiteralGenericAlias
+            raise TypeError(
+                f"cannot encode type `typing.{dtype.__name__}`, which is kept "
+                "by Argument in place of a typing special form such as Literal "
+                "or Union in a list of types; list the types of a Union "
+                "instead, e.g. [int, None] for Optional[int]"
+            )
+        return dtype.__name__ if isinstance(dtype, type) else repr(dtype)
+    args = get_args(dtype)
+    if origin is typing.Union or origin is getattr(types, "UnionType", None):
+        # int | None is written as Union[int, None]
+        name = "Union"
+    elif str(origin) == "typing.Literal":
+        return "Literal[" + ", ".join(repr(aa) for aa in args) + "]"
+    else:
+        name = getattr(origin, "__name__", repr(origin))
+    if not args:
+        return name
+    return name + "[" + ", ".join(_format_dtype(aa) for aa in args) + "]"
+
+
+@lru_cache(maxsize=None)
+def _parse_dtype(dtype: str) -> Any:
+    """Parse a type formatted by `_format_dtype`, without evaluating code.
+
+    Raises
+    ------
+    ValueError
+        If the string is not a type, or it has unknown names.
+    """
+    try:
+        node = ast.parse(dtype, mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"cannot parse type `{dtype}`") from e
+    return _eval_dtype_node(node, dtype)
+
+
+def _eval_dtype_node(node: ast.AST, dtype: str) -> Any:
+    if isinstance(node, ast.Tuple):
+        return tuple(_eval_dtype_node(ee, dtype) for ee in node.elts)
+    if isinstance(node, ast.List):
+        return [_eval_dtype_node(ee, dtype) for ee in node.elts]
+    if isinstance(node, ast.Subscript):
+        origin = _eval_dtype_node(node.value, dtype)
+        origin = _DTYPE_GENERICS.get(origin, origin)
+        index = node.slice
+        if type(index).__name__ == "Index":
+            # Python < 3.9 wraps the subscript into ast.Index
+            index = getattr(index, "value")
+        args = _eval_dtype_node(index, dtype)
+        try:
+            return origin[args]
+        except TypeError as e:
+            raise ValueError(f"cannot parse type `{dtype}`: {e}") from e
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        # typing.List is the same as List
+        name = node.id if isinstance(node, ast.Name) else node.attr
+        if name not in _DTYPE_NAMES:
+            raise ValueError(f"unknown type name `{name}` in `{dtype}`")
+        return _DTYPE_NAMES[name]
+    if getattr(node, "value", None) is Ellipsis:
+        return Ellipsis
+    # the values of Literal, or None
+    try:
+        return ast.literal_eval(node)
+    except ValueError as e:
+        raise ValueError(f"cannot parse type `{dtype}`") from e
+
+
+def did_you_mean(choice: str, choices: Iterable[str] | _SuggestionIndex) -> str:
     """Get did you mean message.
 
     Parameters
     ----------
     choice : str
         the user's wrong choice
-    choices : list[str]
-        all the choices
+    choices : list[str] or _SuggestionIndex
+        all the choices, or an index of them built before
 
     Returns
     -------
     str
         did you mean error message
     """
-    matches = difflib.get_close_matches(choice, choices)
+    if not isinstance(choice, str):
+        # e.g. an integer variant tag; nothing sensible to suggest
+        return ""
+    if isinstance(choices, _SuggestionIndex):
+        matches = choices.get_close_matches(choice)
+        return f"Did you mean: {matches[0]}?" if matches else ""
+    try:
+        index = _suggestion_index(frozenset(choices))
+    except TypeError:
+        # unhashable or non-string choices
+        matches = difflib.get_close_matches(choice, choices)
+    else:
+        matches = index.get_close_matches(choice)
     return f"Did you mean: {matches[0]}?" if matches else ""
+
+
+class _SuggestionIndex:
+    """Index of choices answering :func:`difflib.get_close_matches` with n=1.
+
+    The choices sharing most bigrams with the word are compared first to get
+    a good match early. The other choices are then skipped as soon as an
+    upper bound of their similarity ratio, from their lengths or their
+    character counts (the bounds of
+    :meth:`difflib.SequenceMatcher.real_quick_ratio` and
+    :meth:`difflib.SequenceMatcher.quick_ratio`), cannot beat the best match.
+    The result is the same as ``difflib.get_close_matches(word, choices, n=1)``.
+
+    Parameters
+    ----------
+    choices : Iterable[str]
+        all the choices
+    """
+
+    max_cached_words = 1024
+
+    def __init__(self, choices: Iterable[str]) -> None:
+        self.by_length: dict[int, list[tuple[str, dict[str, int]]]] = {}
+        self.by_bigram: dict[str, list[str]] = {}
+        self.cache: dict[str, list[str]] = {}
+        for cc in choices:
+            if not isinstance(cc, str):
+                raise TypeError(f"choice {cc!r} is not a string")
+            self.by_length.setdefault(len(cc), []).append((cc, _char_counts(cc)))
+            for bigram in _bigrams(cc):
+                self.by_bigram.setdefault(bigram, []).append(cc)
+
+    def get_close_matches(self, word: str, cutoff: float = 0.6) -> list[str]:
+        """Get the best match of word with a ratio of at least cutoff.
+
+        Parameters
+        ----------
+        word : str
+            the word to match
+        cutoff : float, optional
+            the minimal similarity ratio
+
+        Returns
+        -------
+        list[str]
+            the best match, or an empty list
+        """
+        key = f"{cutoff}:{word}"
+        if key in self.cache:
+            return list(self.cache[key])
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        best: tuple[float, str] | None = None
+        seen = set()
+
+        def compare(cc: str) -> None:
+            nonlocal best
+            seen.add(cc)
+            matcher.set_seq1(cc)
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or (score, cc) > best):
+                best = (score, cc)
+
+        shared: dict[str, int] = {}
+        for bigram in _bigrams(word):
+            for cc in self.by_bigram.get(bigram, ()):
+                shared[cc] = shared.get(cc, 0) + 1
+        for cc in heapq.nlargest(3, shared, key=shared.__getitem__):
+            compare(cc)
+
+        word_counts = _char_counts(word)
+        for length in sorted(self.by_length, key=lambda ll: abs(ll - len(word))):
+            total = length + len(word)
+            limit = cutoff if best is None else best[0]
+            if total and 2.0 * min(length, len(word)) / total < limit:
+                continue
+            for cc, counts in self.by_length[length]:
+                if cc in seen:
+                    continue
+                common = 0
+                for char, nn in word_counts.items():
+                    common += min(nn, counts.get(char, 0))
+                limit = cutoff if best is None else best[0]
+                if total and 2.0 * common / total < limit:
+                    continue
+                compare(cc)
+
+        result = [best[1]] if best is not None else []
+        if len(self.cache) < self.max_cached_words:
+            self.cache[key] = result
+        return list(result)
+
+
+def _char_counts(word: str) -> dict[str, int]:
+    """Count the characters of a word."""
+    counts: dict[str, int] = {}
+    for char in word:
+        counts[char] = counts.get(char, 0) + 1
+    return counts
+
+
+def _bigrams(word: str) -> set[str]:
+    """Get the bigrams of a word."""
+    return {word[ii : ii + 2] for ii in range(len(word) - 1)}
+
+
+@lru_cache(maxsize=128)
+def _suggestion_index(choices: frozenset) -> _SuggestionIndex:
+    """Get the cached suggestion index of a set of choices."""
+    return _SuggestionIndex(choices)
+
+
+def _cached_index(
+    cache: dict[tuple, _SuggestionIndex], choices: tuple
+) -> _SuggestionIndex | tuple:
+    """Get the suggestion index of choices, kept in the cache of its owner.
+
+    The cache is keyed by the choices themselves, so an index is never
+    stale after the owner is changed. Choices that can not be indexed are
+    returned as they are, to be matched by difflib.
+    """
+    index = cache.get(choices)
+    if index is None:
+        try:
+            index = _SuggestionIndex(choices)
+        except TypeError:
+            return choices
+        cache[choices] = index
+    return index
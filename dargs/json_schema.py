@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from dargs.dargs import Argument, _Flags
+from dargs.dargs import Argument, _fingerprint, _Flags
 
 try:
     from typing import get_origin
@@ -12,7 +12,9 @@ except ImportError:
     from typing_extensions import get_origin
 
 
-def generate_json_schema(argument: Argument, id: str = "") -> dict:
+def generate_json_schema(
+    argument: Argument, id: str = "", deduplicate: bool = True
+) -> dict:
     """Generate JSON schema from a given dargs.Argument.
 
     Parameters
@@ -21,6 +23,12 @@ def generate_json_schema(argument: Argument, id: str = "") -> dict:
         The argument to generate JSON schema.
     id : str, optional
         The URL of the schema, by default "".
+    deduplicate : bool, optional
+        If true (default), sub-arguments that appear more than once in the
+        schema, including variant choices and arguments with aliases, are
+        emitted once under ``$defs`` and referred to by ``$ref``.
+        Sub-arguments are identified by their structure, so equal copies
+        are shared as well. If false, every sub-argument is inlined.
 
     Returns
     -------
@@ -41,22 +49,106 @@ def generate_json_schema(argument: Argument, id: str = "") -> dict:
     >>> with open("deepmd.json", "w") as f:
     ...     json.dump(schema, f, indent=2)
     """
+    defs = _SchemaDefs(argument) if deduplicate else None
     schema = {
         "$schema": "https://json-schema.org/draft/2020-12/schema",
         "$id": id,
         "title": argument.name,
-        **_convert_single_argument(argument),
+        **_convert_single_argument(argument, defs),
     }
+    if defs is not None and defs.schemas:
+        schema["$defs"] = defs.schemas
     return schema
 
 
-def _convert_single_argument(argument: Argument) -> dict:
+class _SchemaDefs:
+    """Sub-arguments emitted once under ``$defs``.
+
+    Parameters
+    ----------
+    argument : Argument
+        The root argument of the schema.
+    """
+
+    def __init__(self, argument: Argument) -> None:
+        self.memo: dict[int, str] = {}
+        # fingerprint -> name under $defs, for the reused sub-arguments
+        self.names: dict[str, str] = {}
+        self.schemas: dict[str, dict] = {}
+        counts: dict[str, int] = {}
+        order: list[Argument] = []
+        self._count(argument, counts, order, set())
+        used = set()
+        for aa in order:
+            fingerprint = _fingerprint(aa, self.memo)
+            if counts[fingerprint] < 2 or fingerprint in self.names:
+                continue
+            name = aa.name
+            ii = 1
+            while name in used:
+                ii += 1
+                name = f"{aa.name}-{ii}"
+            used.add(name)
+            self.names[fingerprint] = name
+
+    def _count(
+        self,
+        argument: Argument,
+        counts: dict[str, int],
+        order: list[Argument],
+        visited: set[str],
+    ) -> None:
+        """Count how many times each sub-argument is emitted in the schema.
+
+        Each distinct sub-argument is visited once, as its own sub-arguments
+        are emitted only once, either inline or under ``$defs``.
+        """
+        fingerprint = _fingerprint(argument, self.memo)
+        if fingerprint in visited:
+            return
+        visited.add(fingerprint)
+        subs = [(aa, 1 + len(aa.alias)) for aa in argument.sub_fields.values()] + [
+            (aa, 1)
+            for vv in argument.sub_variants.values()
+            for aa in vv.choice_dict.values()
+        ]
+        for aa, count in subs:
+            sub_fingerprint = _fingerprint(aa, self.memo)
+            counts[sub_fingerprint] = counts.get(sub_fingerprint, 0) + count
+            order.append(aa)
+            self._count(aa, counts, order, visited)
+
+    def convert(self, argument: Argument) -> dict:
+        """Convert a sub-argument, or refer to it if it is reused."""
+        name = self.names.get(_fingerprint(argument, self.memo))
+        if name is None:
+            return _convert_single_argument(argument, self)
+        if name not in self.schemas:
+            # reserve the place first, so that $defs follows the document order
+            self.schemas[name] = {}
+            self.schemas[name] = _convert_single_argument(argument, self)
+        pointer = name.replace("~", "~0").replace("/", "~1")
+        return {"$ref": f"#/$defs/{pointer}"}
+
+
+def _convert_sub_argument(argument: Argument, defs: _SchemaDefs | None) -> dict:
+    """Convert a sub-argument to JSON schema, deduplicated if `defs` is given."""
+    if defs is None:
+        return _convert_single_argument(argument)
+    return defs.convert(argument)
+
+
+def _convert_single_argument(
+    argument: Argument, defs: _SchemaDefs | None = None
+) -> dict:
     """Convert a single argument to JSON schema.
 
     Parameters
     ----------
     argument : Argument
         The argument to convert.
+    defs : _SchemaDefs, optional
+        If given, reused sub-arguments are referred to by ``$ref``.
 
     Returns
     -------
@@ -71,7 +163,7 @@ def _convert_single_argument(argument: Argument) -> dict:
         data["default"] = argument.default
     properties = {
         **{
-            nn: _convert_single_argument(aa)
+            nn: _convert_sub_argument(aa, defs)
             for aa in argument.sub_fields.values()
             for nn in (aa.name, *aa.alias)
         },
@@ -103,7 +195,7 @@ def _convert_single_argument(argument: Argument) -> dict:
                 if not (vv.optional and vv.default_tag == kk)
                 else [],
             },
-            "then": _convert_single_argument(aa),
+            "then": _convert_sub_argument(aa, defs),
         }
         for vv in argument.sub_variants.values()
         for kk, aa in vv.choice_dict.items()
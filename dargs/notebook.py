@@ -22,7 +22,8 @@ from __future__ import annotations
 import html
 import json
 import re
-from typing import Any, cast
+from itertools import islice
+from typing import Any, Iterator, cast
 
 from IPython.display import HTML, display
 
@@ -31,6 +32,11 @@ from dargs.dargs import _resolve_ref
 
 __all__ = ["JSON"]
 
+_RE_DOUBLE_BACKTICK = re.compile(r"``(.*?)``")
+_RE_BACKTICK = re.compile(r"`+(.*?)`+")
+_RE_EMPHASIS = re.compile(r"\*(.+)\*")
+_RE_NEWLINES = re.compile(r"\n+")
+
 # https://www.w3schools.com/css/css_tooltip.asp
 css = """<style>
 .dargs-codeblock {
@@ -71,28 +77,35 @@ css = """<style>
 .dargs-codeblock .dargs-key code.dargs-code {
   color: #0550ae;
 }
-.dargs-codeblock .dargs-key .dargs-doc {
-  visibility: hidden;
+.dargs-codeblock .dargs-docs {
+  position: sticky;
+  bottom: 0;
+  z-index: 1;
+}
+.dargs-codeblock .dargs-doc {
+  display: none;
   width: 600px;
   background-color: black;
   color: #fff;
   padding: 1em 1em;
   border-radius: 6px;
-  position: absolute;
-  z-index: 1;
-}
-.dargs-codeblock .dargs-key:hover .dargs-doc {
-  visibility: visible;
 }
-.dargs-codeblock .dargs-key .dargs-doc .dargs-doc-code {
+.dargs-codeblock .dargs-doc .dargs-doc-code {
   color: #bbbbff;
 }
+.dargs-codeblock code.dargs-more {
+  color: #6e7781;
+}
 </style>
 """
 
 
 def JSON(
-    data: dict | str, arg: Argument | list[Argument], allow_ref: bool = False
+    data: dict | str,
+    arg: Argument | list[Argument],
+    allow_ref: bool = False,
+    max_depth: int | None = None,
+    max_items: int | None = 100,
 ) -> None:
     """Display JSON data with Argument in the Jupyter Notebook.
 
@@ -104,12 +117,33 @@ def JSON(
         The Argument that describes the JSON data.
     allow_ref : bool, optional
         If true, allow loading from external files via the ``$ref`` key.
+    max_depth : int, optional
+        Dicts and lists nested deeper than this level are collapsed
+        and not rendered. By default, all levels are rendered.
+    max_items : int, optional
+        At most this number of items of a repeated argument are rendered;
+        the others are left out, and only their number is shown. By default
+        100; None for no limit.
     """
-    display(HTML(print_html(data, arg, allow_ref=allow_ref)))
+    display(
+        HTML(
+            print_html(
+                data,
+                arg,
+                allow_ref=allow_ref,
+                max_depth=max_depth,
+                max_items=max_items,
+            )
+        )
+    )
 
 
 def print_html(
-    data: Any, arg: Argument | list[Argument], allow_ref: bool = False
+    data: Any,
+    arg: Argument | list[Argument],
+    allow_ref: bool = False,
+    max_depth: int | None = None,
+    max_items: int | None = 100,
 ) -> str:
     """Print HTML string with Argument in the Jupyter Notebook.
 
@@ -121,6 +155,13 @@ def print_html(
         The Argument that describes the JSON data.
     allow_ref : bool, optional
         If true, allow loading from external files via the ``$ref`` key.
+    max_depth : int, optional
+        Dicts and lists nested deeper than this level are collapsed
+        and not rendered. By default, all levels are rendered.
+    max_items : int, optional
+        At most this number of items of a repeated argument are rendered;
+        the others are left out, and only their number is shown. By default
+        100; None for no limit.
 
     Returns
     -------
@@ -141,7 +182,12 @@ def print_html(
     else:
         raise ValueError(f"Unknown type: {type(arg)}")
     argdata = ArgumentData(data, arg, allow_ref=allow_ref)
-    buff = [css, r"""<div class="dargs-codeblock">""", argdata.print_html(), r"</div>"]
+    buff = [
+        css,
+        r"""<div class="dargs-codeblock">""",
+        argdata.print_html(max_depth=max_depth, max_items=max_items),
+        r"</div>",
+    ]
     return "".join(buff)
 
 
@@ -149,6 +195,8 @@ class ArgumentData:
     """ArgumentData is a class to hold the data and Argument.
 
     It is used to print the data with Argument in the Jupyter Notebook.
+    Sub ArgumentData are only built when they are accessed, so that
+    rendering a part of the data does not walk the whole tree.
 
     Parameters
     ----------
@@ -173,16 +221,31 @@ class ArgumentData:
         self.arg = arg
         self.repeat = repeat
         self.allow_ref = allow_ref
-        self.subdata = []
-        self._init_subdata()
+        self._subdata: list[ArgumentData] | None = None
 
-    def _init_subdata(self) -> None:
-        """Initialize sub ArgumentData."""
-        if (
-            isinstance(self.data, dict)
+    @property
+    def subdata(self) -> list[ArgumentData]:
+        """Sub ArgumentData, built on first access."""
+        if self._subdata is None:
+            self._subdata = list(self._iter_subdata())
+        return self._subdata
+
+    def _is_repeated(self) -> bool:
+        """Whether the data is a list or a dict of repeated items."""
+        return (
+            isinstance(self.data, (list, dict))
             and isinstance(self.arg, Argument)
-            and not (self.arg.repeat and not self.repeat)
-        ):
+            and self.arg.repeat
+            and not self.repeat
+        )
+
+    def _iter_subdata(self) -> Iterator[ArgumentData]:
+        """Iterate over sub ArgumentData."""
+        if self._is_repeated():
+            items = self.data if isinstance(self.data, list) else self.data.values()
+            for dd in items:
+                yield ArgumentData(dd, self.arg, repeat=True, allow_ref=self.allow_ref)
+        elif isinstance(self.data, dict) and isinstance(self.arg, Argument):
             # Work on a copy to avoid mutating the caller's data
             data = self.data.copy()
             _resolve_ref(data, self.allow_ref)
@@ -195,57 +258,69 @@ class ArgumentData:
 
             for kk in data:
                 if kk in sub_fields:
-                    self.subdata.append(
-                        ArgumentData(data[kk], sub_fields[kk], allow_ref=self.allow_ref)
+                    yield ArgumentData(
+                        data[kk], sub_fields[kk], allow_ref=self.allow_ref
                     )
                 elif kk in self.arg.sub_variants:
-                    self.subdata.append(
-                        ArgumentData(
-                            data[kk],
-                            self.arg.sub_variants[kk],
-                            allow_ref=self.allow_ref,
-                        )
+                    yield ArgumentData(
+                        data[kk],
+                        self.arg.sub_variants[kk],
+                        allow_ref=self.allow_ref,
                     )
                 else:
-                    self.subdata.append(ArgumentData(data[kk], kk))
-        elif (
-            isinstance(self.data, list)
-            and isinstance(self.arg, Argument)
-            and self.arg.repeat
-            and not self.repeat
-        ):
-            for dd in self.data:
-                self.subdata.append(
-                    ArgumentData(dd, self.arg, repeat=True, allow_ref=self.allow_ref)
-                )
-        elif (
-            isinstance(self.data, dict)
-            and isinstance(self.arg, Argument)
-            and self.arg.repeat
-            and not self.repeat
-        ):
-            for dd in self.data.values():
-                self.subdata.append(
-                    ArgumentData(dd, self.arg, repeat=True, allow_ref=self.allow_ref)
-                )
+                    yield ArgumentData(data[kk], kk)
 
-    def print_html(self, _level: int = 0, _last_one: bool = True) -> str:
+    def print_html(
+        self,
+        _level: int = 0,
+        _last_one: bool = True,
+        max_depth: int | None = None,
+        max_items: int | None = 100,
+    ) -> str:
         """Print the data with Argument in HTML format.
 
+        The documentation of each Argument is rendered once, after the
+        data, and shown when any of its keys is hovered.
+
         Parameters
         ----------
         _level : int, optional
             The level of indentation, by default 0
         _last_one : bool, optional
             Whether it is the last one, by default True
+        max_depth : int, optional
+            Dicts and lists nested deeper than this level are collapsed
+            and not rendered. By default, all levels are rendered.
+        max_items : int, optional
+            At most this number of items of a repeated argument are rendered;
+            the others are left out, and only their number is shown. By default
+            100; None for no limit.
         """
+        if max_items is not None and max_items < 1:
+            raise ValueError("max_items should be positive")
+        buff: list[str] = []
+        docs = _SharedDocs()
+        self._write_html(buff, docs, _level, _last_one, max_depth, max_items)
+        docs.write(buff)
+        return "".join(buff)
+
+    def _write_html(
+        self,
+        buff: list[str],
+        docs: _SharedDocs,
+        _level: int,
+        _last_one: bool,
+        max_depth: int | None,
+        max_items: int | None,
+    ) -> None:
+        """Append the HTML of the data to buff; see print_html."""
         linebreak = "<br/>"
         indent = (
             r"""<code class="dargs-code dargs-linebegin">"""
             + "&nbsp;" * (_level * 2)
             + "</code>"
         )
-        buff = []
+        comma = "" if _last_one else ","
         buff.append(indent)
         if _level > 0 and not (
             isinstance(self.data, dict)
@@ -253,7 +328,9 @@ class ArgumentData:
             and self.repeat
         ):
             if isinstance(self.arg, (Argument, Variant)):
-                buff.append(r"""<span class="dargs-key">""")
+                buff.append(
+                    f"""<span class="dargs-key dargs-key-{docs.ref(self.arg)}">"""
+                )
             else:
                 buff.append(r"""<span>""")
             buff.append(r"""<code class="dargs-code">""")
@@ -268,94 +345,156 @@ class ArgumentData:
                 raise ValueError(f"Unknown type: {type(self.arg)}")
             buff.append('"')
             buff.append("</code>")
-            if isinstance(self.arg, (Argument, Variant)):
-                buff.append(r"""<span class="dargs-doc">""")
-                if isinstance(self.arg, Argument):
-                    doc_head = (
-                        self.arg.gen_doc_head()
-                        .replace("| type:", "type:")
-                        .replace("\n", linebreak)
-                    )
-                    # use re to replace ``xx`` to <code>xx</code>
-                    doc_head = re.sub(
-                        r"``(.*?)``",
-                        r'<span class="dargs-doc-code">\1</span>',
-                        doc_head,
-                    )
-                    doc_head = re.sub(r"\*(.+)\*", r"<i>\1</i>", doc_head)
-                    buff.append(doc_head)
-                elif isinstance(self.arg, Variant):
-                    buff.append(f"{self.arg.flag_name}:<br/>type: ")
-                    buff.append(r"""<span class="dargs-doc-code">""")
-                    buff.append("str")
-                    buff.append(r"""</span>""")
-                    if self.arg.default_tag:
-                        buff.append(", default: ")
-                        buff.append(r"""<span class="dargs-doc-code">""")
-                        buff.append(self.arg.default_tag)
-                        buff.append(r"""</span>""")
-                else:
-                    raise ValueError(f"Unknown type: {type(self.arg)}")
-
-                doc_body = html.escape(self.arg.doc.strip())
-                if doc_body:
-                    buff.append("<hr/>")
-                doc_body = re.sub(r"""\n+""", "\n", doc_body)
-                doc_body = doc_body.replace("\n", linebreak)
-                doc_body = re.sub(
-                    r"`+(.*?)`+", r'<span class="dargs-doc-code">\1</span>', doc_body
-                )
-                doc_body = re.sub(r"\*(.+)\*", r"<i>\1</i>", doc_body)
-                buff.append(doc_body)
-
-                buff.append(r"""</span>""")
             buff.append(r"""</span>""")
             buff.append(r"""<code class="dargs-code">""")
             buff.append(": ")
             buff.append("</code>")
-        if self.subdata and isinstance(self.data, dict):
-            buff.append(r"""<code class="dargs-code">""")
-            buff.append("{")
-            buff.append("</code>")
-            buff.append(linebreak)
-            for ii, sub in enumerate(self.subdata):
+
+        if self._is_repeated():
+            # only wrap the items that are displayed
+            total = len(self.data)
+            subdata = list(islice(self._iter_subdata(), max_items))
+        else:
+            subdata = self.subdata
+            total = len(subdata)
+        if subdata and isinstance(self.data, (dict, list)):
+            brackets = "{}" if isinstance(self.data, dict) else "[]"
+            if max_depth is not None and _level >= max_depth:
+                # collapsed: the sub tree is not rendered at all
                 buff.append(
-                    sub.print_html(_level + 1, _last_one=(ii == len(self.subdata) - 1))
+                    f"""<code class="dargs-code dargs-more" title="{total} items">"""
+                    f"{brackets[0]}…{brackets[1]}{comma}</code>"
                 )
-            buff.append(indent)
+                buff.append(linebreak)
+                return
             buff.append(r"""<code class="dargs-code">""")
-            buff.append("}")
-            if not _last_one:
-                buff.append(",")
+            buff.append(brackets[0])
             buff.append("</code>")
             buff.append(linebreak)
-        elif self.subdata and isinstance(self.data, list):
-            buff.append(r"""<code class="dargs-code">""")
-            buff.append("[")
-            buff.append("</code>")
-            buff.append(linebreak)
-            for ii, sub in enumerate(self.subdata):
-                buff.append(
-                    sub.print_html(_level + 1, _last_one=(ii == len(self.subdata) - 1))
+            for ii, sub in enumerate(subdata):
+                sub._write_html(
+                    buff,
+                    docs,
+                    _level + 1,
+                    (ii == total - 1),
+                    max_depth,
+                    max_items,
                 )
+            if total > len(subdata):
+                self._write_more(buff, _level + 1, total - len(subdata))
             buff.append(indent)
             buff.append(r"""<code class="dargs-code">""")
-            buff.append("]")
-            if not _last_one:
-                buff.append(",")
+            buff.append(brackets[1])
+            buff.append(comma)
             buff.append("</code>")
             buff.append(linebreak)
         else:
-            buff.append(r"""<code class="dargs-code">""")
-            buff.append(
-                json.dumps(self.data, indent=2)
-                .replace(" ", "&nbsp;")
-                .replace(
-                    "\n", f"""</code>{linebreak}{indent}<code class="dargs-code">"""
-                )
+            lines = json.dumps(self.data, indent=2).split("\n")
+            _write_lines(buff, indent, lines, comma)
+
+    def _write_more(self, buff: list[str], level: int, hidden: int) -> None:
+        """Append the number of the items of a repeat beyond max_items.
+
+        The items themselves are not written, so that the size of the
+        HTML does not grow with the data.
+        """
+        indent = (
+            r"""<code class="dargs-code dargs-linebegin">"""
+            + "&nbsp;" * (level * 2)
+            + "</code>"
+        )
+        buff.append(indent)
+        buff.append(
+            f"""<code class="dargs-code dargs-more">… {hidden} more items</code>"""
+        )
+        buff.append("<br/>")
+
+
+def _write_lines(buff: list[str], indent: str, lines: list[str], comma: str) -> None:
+    """Append lines of plain JSON to buff, each as a line of the code block."""
+    linebreak = "<br/>"
+    buff.append(r"""<code class="dargs-code">""")
+    buff.append(
+        f"""</code>{linebreak}{indent}<code class="dargs-code">""".join(
+            line.replace(" ", "&nbsp;") for line in lines
+        )
+    )
+    buff.append(comma)
+    buff.append("</code>")
+    buff.append(linebreak)
+
+
+class _SharedDocs:
+    """Documentation of the Arguments shown in one display.
+
+    Keys only carry a ``dargs-key-<index>`` class; the documentation of each
+    Argument or Variant is rendered once and shown by a CSS rule when one
+    of its keys is hovered.
+    """
+
+    def __init__(self) -> None:
+        self.index: dict[int, int] = {}
+        self.docs: list[str] = []
+
+    def ref(self, arg: Argument | Variant) -> int:
+        """Return the index of the documentation of arg, rendering it once."""
+        idx = self.index.get(id(arg))
+        if idx is None:
+            idx = self.index[id(arg)] = len(self.docs)
+            self.docs.append(_doc_html(arg))
+        return idx
+
+    def write(self, buff: list[str]) -> None:
+        """Append the documentation and the CSS rules showing it to buff."""
+        if not self.docs:
+            return
+        buff.append(r"""<div class="dargs-docs">""")
+        for ii, doc in enumerate(self.docs):
+            buff.append(f"""<span class="dargs-doc dargs-doc-{ii}">{doc}</span>""")
+        buff.append("</div>")
+        buff.append("<style>")
+        buff.append(
+            ",\n".join(
+                f".dargs-codeblock:has(.dargs-key-{ii}:hover) .dargs-doc-{ii}"
+                for ii in range(len(self.docs))
             )
-            if not _last_one:
-                buff.append(",")
-            buff.append("</code>")
-            buff.append(linebreak)
-        return "".join(buff)
+        )
+        buff.append(" {\n  display: block;\n}\n</style>")
+
+
+def _doc_html(arg: Argument | Variant) -> str:
+    """Render the documentation of an Argument or a Variant in HTML."""
+    linebreak = "<br/>"
+    buff = []
+    if isinstance(arg, Argument):
+        doc_head = (
+            arg.gen_doc_head().replace("| type:", "type:").replace("\n", linebreak)
+        )
+        # use re to replace ``xx`` to <code>xx</code>
+        doc_head = _RE_DOUBLE_BACKTICK.sub(
+            r'<span class="dargs-doc-code">\1</span>', doc_head
+        )
+        doc_head = _RE_EMPHASIS.sub(r"<i>\1</i>", doc_head)
+        buff.append(doc_head)
+    elif isinstance(arg, Variant):
+        buff.append(f"{arg.flag_name}:<br/>type: ")
+        buff.append(r"""<span class="dargs-doc-code">""")
+        buff.append("str")
+        buff.append(r"""</span>""")
+        if arg.default_tag:
+            buff.append(", default: ")
+            buff.append(r"""<span class="dargs-doc-code">""")
+            buff.append(arg.default_tag)
+            buff.append(r"""</span>""")
+    else:
+        raise ValueError(f"Unknown type: {type(arg)}")
+
+    doc_body = html.escape(arg.doc.strip())
+    if doc_body:
+        buff.append("<hr/>")
+    doc_body = _RE_NEWLINES.sub("\n", doc_body)
+    doc_body = doc_body.replace("\n", linebreak)
+    doc_body = _RE_BACKTICK.sub(r'<span class="dargs-doc-code">\1</span>', doc_body)
+    doc_body = _RE_EMPHASIS.sub(r"<i>\1</i>", doc_body)
+    buff.append(doc_body)
+    return "".join(buff)
@@ -18,12 +18,18 @@ Then `dargs` directive will be added:
        :func: _test_argument
 
 where `_test_argument` returns an :class:`Argument <dargs.Argument>`. A :class:`list` of :class:`Argument <dargs.Argument>` is also accepted.
+
+The generated reStructuredText is cached in the Sphinx environment, keyed by
+the version of dargs, the structural fingerprint of the arguments and the
+directive options, so it is only generated again when the arguments change
+or dargs is upgraded.
 """
 
 from __future__ import annotations
 
+import io
 import sys
-from typing import TYPE_CHECKING, Any, Callable, ClassVar, List
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Iterable, List
 
 from docutils.parsers.rst import Directive
 from docutils.parsers.rst.directives import unchanged
@@ -31,13 +37,17 @@ from sphinx import addnodes
 from sphinx.directives import ObjectDescription
 from sphinx.domains import Domain, ObjType
 from sphinx.roles import XRefRole
+from sphinx.util import logging
 from sphinx.util.nodes import make_refnode
 
-from .dargs import Argument, Variant
+from ._version import __version__
+from .dargs import Argument, Variant, _fingerprint
 
 if TYPE_CHECKING:
     from sphinx.util.typing import RoleFunction
 
+logger = logging.getLogger(__name__)
+
 
 class DargsDirective(Directive):
     """dargs directive."""
@@ -73,18 +83,75 @@ class DargsDirective(Directive):
         if not isinstance(arguments, (list, tuple)):
             arguments = [arguments]
 
-        rsts = []
         for argument in arguments:
             if not isinstance(argument, (Argument, Variant)):
                 raise RuntimeError("The function doesn't return Argument")
-            rst = argument.gen_doc(
-                make_anchor=True, make_link=True, use_sphinx_domain=True
-            )
-            rsts.extend(rst.split("\n"))
-        self.state_machine.insert_input(rsts, f"{module_name}:{attr_name}")
+
+        env = self.state.document.settings.env
+        memo = {}
+        key = (
+            # the rendering may change between versions
+            __version__,
+            tuple(_fingerprint(argument, memo) for argument in arguments),
+            tuple(sorted(self.options.items())),
+        )
+        cache = _get_rst_cache(env)
+        rsts = cache.get(key)
+        if rsts is None:
+            rsts = []
+            for argument in arguments:
+                buff = io.StringIO()
+                argument.write_doc(
+                    buff, make_anchor=True, make_link=True, use_sphinx_domain=True
+                )
+                rsts.extend(buff.getvalue().split("\n"))
+            cache[key] = rsts
+        env.dargs_rst_docs.setdefault(env.docname, set()).add(key)
+        self.state_machine.insert_input(list(rsts), f"{module_name}:{attr_name}")
         return []
 
 
+def _get_rst_cache(env: Any) -> dict[tuple, list[str]]:
+    """Get the cache of generated reStructuredText in the environment.
+
+    The cache maps the version of dargs, the fingerprints of the arguments
+    and the directive options to the generated lines. `env.dargs_rst_docs` records the keys
+    used by each document, so that unused entries can be pruned.
+    """
+    if not hasattr(env, "dargs_rst_cache"):
+        env.dargs_rst_cache = {}
+        env.dargs_rst_docs = {}
+    return env.dargs_rst_cache
+
+
+def _purge_rst_cache(app: Any, env: Any, docname: str) -> None:
+    """Forget the cache keys used by a document that is read again."""
+    _get_rst_cache(env)
+    env.dargs_rst_docs.pop(docname, None)
+
+
+def _merge_rst_cache(app: Any, env: Any, docnames: set[str], other: Any) -> None:
+    """Merge the cache built by a parallel reading process."""
+    cache = _get_rst_cache(env)
+    other_cache = _get_rst_cache(other)
+    for docname in docnames:
+        keys = other.dargs_rst_docs.get(docname)
+        if keys is None:
+            continue
+        env.dargs_rst_docs[docname] = keys
+        for key in keys:
+            cache.setdefault(key, other_cache[key])
+
+
+def _prune_rst_cache(app: Any, env: Any) -> None:
+    """Drop the cache entries no longer used by any document."""
+    cache = _get_rst_cache(env)
+    used = set().union(*env.dargs_rst_docs.values())
+    for key in list(cache):
+        if key not in used:
+            del cache[key]
+
+
 class DargsObject(ObjectDescription):
     """dargs::argument directive.
 
@@ -151,6 +218,27 @@ class DargsDomain(Domain):
         "arguments": {},  # fullname -> docname, objtype
     }
 
+    def clear_doc(self, docname: str) -> None:
+        """Remove the arguments described in a document that is read again."""
+        inv = self.data["arguments"]
+        for targetid, (fn, _) in list(inv.items()):
+            if fn == docname:
+                del inv[targetid]
+
+    def merge_domaindata(self, docnames: Iterable[str], otherdata: dict) -> None:
+        """Merge the arguments found by a parallel reading process."""
+        docnames = set(docnames)
+        inv = self.data["arguments"]
+        for targetid, (fn, objtype) in otherdata["arguments"].items():
+            if fn not in docnames:
+                continue
+            if targetid in inv and inv[targetid][0] != fn:
+                logger.warning(
+                    f'Duplicated argument "{targetid}" described in "{self.env.doc2path(inv[targetid][0])}".',
+                    location=fn,
+                )
+            inv[targetid] = (fn, objtype)
+
     def resolve_xref(
         self,
         env: Any,
@@ -169,11 +257,14 @@ class DargsDomain(Domain):
         return make_refnode(builder, fromdocname, obj[0], targetid, contnode, target)
 
 
-def setup(app: Any) -> dict[str, bool]:
+def setup(app: Any) -> dict[str, Any]:
     """Setup sphinx app."""
     app.add_directive("dargs", DargsDirective)
     app.add_domain(DargsDomain)
-    return {"parallel_read_safe": True}
+    app.connect("env-purge-doc", _purge_rst_cache)
+    app.connect("env-merge-info", _merge_rst_cache)
+    app.connect("env-updated", _prune_rst_cache)
+    return {"parallel_read_safe": True, "env_version": 1}
 
 
 def _test_argument() -> Argument:
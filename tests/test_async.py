@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import unittest
+import weakref
+from unittest import mock
+
+from dargs import Argument, Variant
+from dargs.check import _BASE_CACHE_MAXSIZE, _base_argument, acheck, check
+from dargs.dargs import ArgumentKeyError, ArgumentTypeError, ArgumentValueError
+
+from .dpmdargs import example_json_str, gen_args
+
+
+class TestAsync(unittest.TestCase):
+    def test_same_as_sync(self) -> None:
+        base = gen_args()
+        data = json.loads(example_json_str)
+        expected = base.normalize_value(data, trim_pattern="_*")
+        result = asyncio.run(base.anormalize_value(data, trim_pattern="_*"))
+        self.assertEqual(result, expected)
+        asyncio.run(base.acheck_value(result, strict=True))
+        self.assertEqual(asyncio.run(acheck(base, data)), check(base, data))
+        # lists of arguments are wrapped into the same one again
+        subs = list(base.sub_fields.values())
+        self.assertEqual(check(subs, data), expected)
+        self.assertEqual(asyncio.run(acheck(tuple(subs), data)), expected)
+        self.assertIs(_base_argument(subs), _base_argument(tuple(subs)))
+        self.assertIsNot(_base_argument(subs), _base_argument(subs[1:]))
+        # nothing is stored on the arguments
+        self.assertNotIn(_base_argument(subs), vars(subs[0]).values())
+        # only the recent wrappers are kept
+        ref = weakref.ref(_base_argument([Argument("a", int), Argument("b", int)]))
+        for _ in range(_BASE_CACHE_MAXSIZE):
+            _base_argument([Argument("a", int)])
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_errors(self) -> None:
+        ca = Argument(
+            "base",
+            dict,
+            sub_variants=[
+                Variant("type", [Argument("a", dict), Argument("b", dict)]),
+            ],
+        )
+        with self.assertRaises(ArgumentKeyError):
+            asyncio.run(ca.acheck({"base": {}}))
+        with self.assertRaises(ArgumentValueError):
+            asyncio.run(ca.acheck_value({"type": "c"}))
+        with self.assertRaises(ArgumentKeyError):
+            asyncio.run(ca.acheck_value({"type": "a", "x": 1}, strict=True))
+
+    def test_async_extra_check(self) -> None:
+        async def positive(value: int) -> bool:
+            await asyncio.sleep(0)
+            return value > 0
+
+        ca = Argument(
+            "base",
+            list,
+            [Argument("n", int, extra_check=positive)],
+            repeat=True,
+        )
+        asyncio.run(ca.acheck_value([{"n": ii} for ii in range(1, 200)]))
+        with mock.patch.object(
+            ca["n"], "extra_check", side_effect=positive
+        ) as spy, self.assertRaises(ArgumentValueError) as cm:
+            asyncio.run(ca.acheck_value([{"n": 1}] * 100 + [{"n": 0}]))
+        self.assertEqual(cm.exception.path, "100")
+        # each value is checked once
+        self.assertEqual(spy.call_count, 101)
+        # the synchronous API can not await it
+        for value in ([{"n": 1}], [{"n": 0}]):
+            with self.assertRaisesRegex(TypeError, "acheck"):
+                ca.check_value(value)
+        with self.assertRaisesRegex(TypeError, "acheck"):
+            ca.check({"base": [{"n": 1}]})
+
+    def test_deep_nesting(self) -> None:
+        # deeper than the recursion limit
+        depth = sys.getrecursionlimit() * 2
+        ca = Argument("leaf", int)
+        value = 1
+        for ii in range(depth):
+            value = {ca.name: value}
+            ca = Argument(f"l{ii}", dict, [ca])
+        asyncio.run(ca.acheck_value(value, strict=True))
+        normalized = asyncio.run(
+            ca.anormalize_value(value, inplace=True, trim_pattern="_*")
+        )
+        self.assertIs(normalized, value)
+        inner = value
+        for _ in range(depth - 1):
+            inner = next(iter(inner.values()))
+        inner["leaf"] = "x"
+        with self.assertRaises(ArgumentTypeError) as cm:
+            asyncio.run(ca.acheck_value(value))
+        self.assertEqual(len(cm.exception.path.split("/")), depth - 1)
+
+    def test_ref(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ref_path = os.path.join(tmpdir, "ref.json")
+            with open(ref_path, "w") as f:
+                json.dump({"sub1": 1}, f)
+            ca = Argument(
+                "base",
+                dict,
+                [
+                    Argument("sub1", int),
+                    Argument("sub2", str, optional=True, default="default"),
+                ],
+            )
+            data = {"$ref": ref_path}
+            result = asyncio.run(ca.anormalize_value(data, allow_ref=True))
+            self.assertEqual(result, {"sub1": 1, "sub2": "default"})
+            asyncio.run(ca.acheck({"base": data}, allow_ref=True))
+            self.assertIn("$ref", data)
+            with self.assertRaises(ValueError):
+                asyncio.run(ca.acheck_value(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import difflib
+import random
+import sys
 import unittest
 from typing import List
 
 from dargs import Argument, Variant
-from dargs.dargs import ArgumentKeyError, ArgumentTypeError, ArgumentValueError
+from dargs.dargs import (
+    ArgumentKeyError,
+    ArgumentTypeError,
+    ArgumentValueError,
+    did_you_mean,
+)
 
 
 class TestChecker(unittest.TestCase):
@@ -351,6 +359,156 @@ class TestChecker(unittest.TestCase):
                 ],
             )
 
+    def test_did_you_mean(self) -> None:
+        rng = random.Random(0)
+        alphabet = "abcd_"
+        for _ in range(500):
+            choices = {
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+                for _ in range(rng.randint(0, 20))
+            }
+            word = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+            matches = difflib.get_close_matches(word, choices, n=1)
+            expected = f"Did you mean: {matches[0]}?" if matches else ""
+            self.assertEqual(did_you_mean(word, choices), expected)
+            # answered from the cached index
+            self.assertEqual(did_you_mean(word, list(choices)), expected)
+        self.assertEqual(did_you_mean(1, ["a", "b"]), "")
+        ca = Argument(
+            "base", dict, sub_variants=[Variant("type", [Argument("a", dict)])]
+        )
+        with self.assertRaises(ArgumentValueError):
+            ca.check_value({"type": 1})
+        # indexes are kept on the argument and the variant
+        for _ in range(2):
+            with self.assertRaisesRegex(ArgumentValueError, "Did you mean: a?"):
+                ca.check_value({"type": "aa"})
+            with self.assertRaisesRegex(ArgumentKeyError, "Did you mean: type?"):
+                ca.check_value({"type": "a", "typ": 1}, strict=True)
+        self.assertEqual(len(ca.sub_variants["type"]._suggestions), 1)
+        self.assertEqual(len(ca._suggestions), 1)
+        ca.sub_variants["type"].add_choice("bb")
+        with self.assertRaisesRegex(ArgumentValueError, "Did you mean: bb?"):
+            ca.check_value({"type": "b"})
+
+    def test_error_path(self) -> None:
+        ca = Argument(
+            "base",
+            dict,
+            [
+                Argument(
+                    "items",
+                    list,
+                    [Argument("sub", dict, [Argument("n", int)])],
+                    repeat=True,
+                ),
+            ],
+        )
+        value = {"items": [{"sub": {"n": 1}}] * 3 + [{"sub": {"n": "x"}}]}
+        with self.assertRaises(ArgumentTypeError) as cm:
+            ca.check_value(value)
+        self.assertEqual(cm.exception.path, "items/3/sub")
+        # hooks get the path of the current dict, restored after traversing
+        paths = []
+        path = ["root"]
+        ca.traverse_value(
+            value, key_hook=lambda a, d, p: paths.append((a.name, list(p))), path=path
+        )
+        self.assertEqual(path, ["root"])
+        self.assertEqual(
+            paths[:3],
+            [
+                ("items", ["root"]),
+                ("sub", ["root", "items", 0]),
+                ("n", ["root", "items", 0, "sub"]),
+            ],
+        )
+
+    def test_deep_nesting(self) -> None:
+        # deeper than the recursion limit
+        depth = sys.getrecursionlimit() * 2
+        ca = Argument("leaf", int)
+        value = 1
+        for ii in range(depth):
+            value = {ca.name: value}
+            ca = Argument(f"l{ii}", dict, [ca])
+        ca.check_value(value, strict=True)
+        normalized = ca.normalize_value(value, inplace=True, trim_pattern="_*")
+        self.assertIs(normalized, value)
+        inner = value
+        for _ in range(depth - 1):
+            inner = next(iter(inner.values()))
+        inner["leaf"] = "x"
+        with self.assertRaises(ArgumentTypeError) as cm:
+            ca.check_value(value)
+        # l{depth-2}/.../l0, the dict holding the leaf key
+        self.assertEqual(len(cm.exception.path.split("/")), depth - 1)
+
+    def test_extra_check_once(self) -> None:
+        calls = []
+
+        def positive(value: int) -> bool:
+            calls.append(value)
+            return value > 0
+
+        ca = Argument(
+            "rows", list, [Argument("n", int, extra_check=positive)], repeat=True
+        )
+        with self.assertRaises(ArgumentValueError):
+            ca.check_value([{"n": 1}, {"n": 2}, {"n": 0}])
+        self.assertEqual(calls, [1, 2, 0])
+
+    def test_repeat_columns(self) -> None:
+        ca = Argument(
+            "rows",
+            list,
+            [
+                Argument("id", int),
+                Argument("w", float, optional=True, extra_check=lambda x: x >= 0),
+                Argument("sub", dict, [Argument("z", str)], optional=True),
+            ],
+            [
+                Variant(
+                    "kind",
+                    [
+                        Argument("a", dict, [Argument("x", int)]),
+                        Argument("b", dict, [Argument("y", [str, None])]),
+                    ],
+                    optional=True,
+                    default_tag="a",
+                )
+            ],
+            repeat=True,
+        )
+        rows = [
+            {"id": ii, "w": 1, "x": ii, "sub": {"z": "z"}}
+            if ii % 2
+            else {"id": ii, "kind": "b", "y": None}
+            for ii in range(300)
+        ]
+        ca.check_value(rows, strict=True)
+        ca.check({"rows": rows}, strict=True)
+        ca.check_value({str(ii): row for ii, row in enumerate(rows)})
+        # errors report the first element failing, in order
+        cases = [
+            (ArgumentKeyError, 150, lambda row: row.pop("id")),
+            (ArgumentKeyError, 151, lambda row: row.pop("x")),
+            (ArgumentTypeError, 151, lambda row: row.update(w="1")),
+            (ArgumentTypeError, 151, lambda row: row["sub"].update(z=1)),
+            (ArgumentValueError, 151, lambda row: row.update(w=-1.0)),
+            (ArgumentValueError, 152, lambda row: row.update(kind="c")),
+            (ArgumentKeyError, 152, lambda row: row.update(x=1)),
+        ]
+        for error, index, modify in cases:
+            with self.subTest(index=index, error=error):
+                value = [dict(row) for row in rows]
+                value[index]["sub"] = {"z": "z"}
+                modify(value[index])
+                value[-1].pop("id")
+                with self.assertRaises(error) as cm:
+                    ca.check_value(value, strict=True)
+                self.assertEqual(cm.exception.path.split("/")[0], str(index))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import json
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -43,6 +47,112 @@ class TestCli(unittest.TestCase):
                 stdin=f,
             )
 
+    def test_check_lazy_files(self) -> None:
+        from dargs.cli import check_cli
+
+        # paths are opened one at a time; file objects are still accepted
+        check_cli(
+            func="dargs._test.test_arguments",
+            jdata=[str(this_directory / "test_arguments.json")] * 3,
+            strict=True,
+        )
+        with (this_directory / "test_arguments.json").open() as f:
+            check_cli(func="dargs._test.test_arguments", jdata=[f], strict=True)
+        with (this_directory / "test_arguments.json").open() as f:
+            subprocess.check_call(
+                [
+                    "dargs",
+                    "check",
+                    "-f",
+                    "dargs._test.test_arguments",
+                    "-",
+                ],
+                stdin=f,
+            )
+
+    def test_normalize(self) -> None:
+        result = subprocess.run(
+            [
+                "dargs",
+                "normalize",
+                "-f",
+                "dargs._test.test_arguments",
+                str(this_directory / "test_arguments.json"),
+                str(this_directory / "test_arguments.json"),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        lines = result.stdout.splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertEqual(
+                json.loads(line), {"test1": 1, "test2": 2, "test3": ["test"]}
+            )
+        with (this_directory / "test_arguments.json").open() as f:
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "dargs",
+                    "normalize",
+                    "-f",
+                    "dargs._test.test_arguments",
+                ],
+                stdin=f,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        self.assertEqual(json.loads(result.stdout)["test3"], ["test"])
+
+    def test_normalize_output_dir(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            subprocess.check_call(
+                [
+                    "dargs",
+                    "normalize",
+                    "-f",
+                    "dargs._test.test_arguments",
+                    "-o",
+                    tmpdir,
+                    "--indent",
+                    "4",
+                    str(this_directory / "test_arguments.json"),
+                ]
+            )
+            with open(Path(tmpdir) / "test_arguments.json") as f:
+                data = json.load(f)
+        self.assertEqual(data, {"test1": 1, "test2": 2, "test3": ["test"]})
+
+    def test_normalize_output_dir_collision(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for sub in ("a", "b"):
+                os.makedirs(Path(tmpdir) / sub)
+                shutil.copy(
+                    this_directory / "test_arguments.json",
+                    Path(tmpdir) / sub / "in.json",
+                )
+            result = subprocess.run(
+                [
+                    "dargs",
+                    "normalize",
+                    "-f",
+                    "dargs._test.test_arguments",
+                    "-o",
+                    str(Path(tmpdir) / "out"),
+                    str(Path(tmpdir) / "a" / "in.json"),
+                    str(Path(tmpdir) / "b" / "in.json"),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("would both be written to in.json", result.stderr)
+            # nothing is written
+            self.assertFalse((Path(tmpdir) / "out").exists())
+
     def test_doc_all_arguments(self) -> None:
         """Test printing documentation for all arguments."""
         result = subprocess.run(
@@ -200,3 +310,86 @@ class TestCli(unittest.TestCase):
         )
         self.assertNotEqual(result.returncode, 0)
         self.assertIn("module.function", result.stderr)
+
+    def test_schema(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            schema = str(Path(tmpdir) / "arguments.json")
+            subprocess.check_call(
+                ["dargs", "export", "-f", "dargs._test.test_arguments", "-o", schema]
+            )
+            jdata = str(this_directory / "test_arguments.json")
+            # the function is not imported
+            script = (
+                "import sys; from dargs.cli import main; main(); "
+                "assert 'dargs._test' not in sys.modules"
+            )
+            for command in (["check", jdata], ["normalize", jdata], ["doc"]):
+                subprocess.check_call(
+                    [sys.executable, "-c", script, *command, "--schema", schema]
+                )
+            result = subprocess.run(
+                ["dargs", "normalize", "--schema", schema, jdata],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            self.assertEqual(
+                json.loads(result.stdout), {"test1": 1, "test2": 2, "test3": ["test"]}
+            )
+            result = subprocess.run(
+                ["dargs", "doc", "--schema", schema, "--arg", "base/sub1"],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            self.assertIn("Sub argument 1", result.stdout)
+            self.assertIn("base/sub1", result.stdout)
+            self.assertNotIn("subsub1:", result.stdout)
+            # --schema is used instead of a function
+            for command, message in (
+                (["check", "-f", "dargs._test.test_arguments"], "not allowed"),
+                (["doc", "dargs._test.test_arguments", "test1"], "not allowed"),
+                # the positional is not taken as the path
+                (["doc", "base/sub1"], "not allowed"),
+            ):
+                result = subprocess.run(
+                    ["dargs", *command, "--schema", schema],
+                    capture_output=True,
+                    text=True,
+                )
+                self.assertNotEqual(result.returncode, 0)
+                self.assertIn(message, result.stderr)
+            result = subprocess.run(
+                ["dargs", "check", "--schema", jdata, jdata],
+                capture_output=True,
+                text=True,
+            )
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("does not contain Argument objects", result.stderr)
+
+    def test_export_extra_check(self) -> None:
+        # extra_check is not saved, so it must not be dropped silently
+        script = (
+            "from dargs import Argument, Variant\n"
+            "from dargs.cli import main\n"
+            "def args():\n"
+            "    return Argument('base', dict, [], [Variant('type', [Argument(\n"
+            "        'a', dict, [Argument('n', int, extra_check=lambda v: v > 0)]\n"
+            "    )])])\n"
+            "main()\n"
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            schema = str(Path(tmpdir) / "arguments.json")
+            command = [sys.executable, "-c", script, "export", "-f", "__main__.args"]
+            result = subprocess.run(
+                [*command, "-o", schema], capture_output=True, text=True
+            )
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("base[type=a]/n", result.stderr)
+            self.assertFalse(os.path.exists(schema))
+            subprocess.check_call([*command, "-o", schema, "--drop-extra-check"])
+            jdata = str(Path(tmpdir) / "in.json")
+            with open(jdata, "w") as f:
+                json.dump({"type": "a", "n": -1}, f)
+            # as asked, the check is not run from the file
+            subprocess.check_call(["dargs", "check", "--schema", schema, jdata])
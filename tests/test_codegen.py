@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import copy
+import json
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from dargs import Argument, Variant
+from dargs.codegen import generate_validator
+from dargs.dargs import ArgumentTypeError
+
+from .dpmdargs import example_json_str, gen_args
+
+
+def load_validator(argument: Argument, **kwargs: Any) -> types.ModuleType:
+    module = types.ModuleType("validator")
+    code = compile(generate_validator(argument, **kwargs), "validator.py", "exec")
+    exec(code, module.__dict__)
+    return module
+
+
+def outcome(func: Any, data: Any, **kwargs: Any) -> tuple:
+    try:
+        return ("ok", func(copy.deepcopy(data), **kwargs))
+    except Exception as e:
+        return (type(e).__name__, getattr(e, "path", None))
+
+
+def gen_test_argument() -> Argument:
+    inner = Argument(
+        "inner",
+        dict,
+        [Argument("x", int, optional=True, default=3, alias=["xx"])],
+        [
+            Variant(
+                "mode",
+                [
+                    Argument("m1", dict, [Argument("p", [float, None])]),
+                    Argument("m2", dict, [Argument("q", str)], alias=["mm2"]),
+                ],
+                optional=True,
+                default_tag="m1",
+            )
+        ],
+    )
+    return Argument(
+        "root",
+        dict,
+        [
+            Argument("lst", List[int], optional=True, default=[1, 2]),
+            Argument("dct", Dict[str, List[float]], optional=True),
+            Argument("opt", [Optional[int]], optional=True, default=None),
+            Argument("rep", list, [Argument("r", int), inner], repeat=True),
+            Argument("emp", dict, [inner], optional=True, default={}),
+            Argument("leaf", dict, optional=True, default={"k": 1}),
+            Argument("u", [int, str], alias=["uu"], optional=True),
+        ],
+        [
+            Variant(
+                "type",
+                [
+                    Argument(
+                        "t1",
+                        dict,
+                        [Argument("a", int, optional=True, default=1)],
+                        [Variant("sub", [Argument("s1", dict, [Argument("z", bool)])])],
+                        alias=["tt1"],
+                    ),
+                    Argument("t2", dict, [Argument("b", complex)]),
+                ],
+            )
+        ],
+    )
+
+
+class TestCodegen(unittest.TestCase):
+    def assert_same(self, argument: Argument, validator: Any, data: Any) -> None:
+        for strict in (False, True):
+            self.assertEqual(
+                outcome(validator.check, data, strict=strict),
+                outcome(argument.check_value, data, strict=strict),
+            )
+        for kwargs in ({}, {"trim_pattern": "_*"}, {"do_alias": False}):
+            self.assertEqual(
+                outcome(validator.normalize, data, **kwargs),
+                outcome(argument.normalize_value, data, **kwargs),
+            )
+
+    def test_dpmd(self) -> None:
+        argument = gen_args()
+        validator = load_validator(argument)
+        data = json.loads(example_json_str)
+        normalized = validator.normalize(data, trim_pattern="_*")
+        self.assertEqual(normalized, argument.normalize_value(data, trim_pattern="_*"))
+        validator.check(normalized, strict=True)
+        self.assert_same(argument, validator, data)
+        data["model"]["descriptor"]["type"] = "se_b"
+        self.assert_same(argument, validator, data)
+
+    def test_same_results(self) -> None:
+        argument = gen_test_argument()
+        validator = load_validator(argument)
+        valid = {
+            "type": "tt1",
+            "sub": "s1",
+            "z": True,
+            "rep": [{"r": 1, "inner": {"xx": 2, "mode": "mm2", "q": "a"}}],
+            "dct": {"a": [1, 2.5]},
+            "uu": "s",
+            "_comment": 1,
+        }
+        cases = [
+            valid,
+            {**valid, "type": "t2", "b": 1.0},
+            {**valid, "type": "t3"},
+            {**valid, "sub": "s2"},
+            {**valid, "z": 1},
+            {**valid, "rep": [{"inner": {}}]},
+            {**valid, "rep": [1]},
+            {**valid, "rep": {"k": {"r": 1, "inner": {"p": None}}}},
+            {**valid, "rep": [{"r": 1, "inner": {"mode": "m2"}}]},
+            {**valid, "dct": {"a": ["x"]}},
+            {**valid, "emp": {"mode": "m3"}},
+            {**valid, "leaf": {"$ref": "a.json"}},
+            {**valid, "undefined": 1},
+            {"rep": []},
+            [],
+            1,
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assert_same(argument, validator, data)
+
+    def test_type_error_message(self) -> None:
+        argument = Argument("base", dict, [Argument("a", int)])
+        validator = load_validator(argument)
+        with self.assertRaises(validator.ArgumentTypeError) as generated:
+            validator.check({"a": "x"})
+        with self.assertRaises(ArgumentTypeError) as expected:
+            argument.check_value({"a": "x"})
+        # the same but the end, which is not written by typeguard
+        prefix = "[at root location] key `a` gets wrong value type, requires <int> but "
+        self.assertEqual(str(generated.exception), prefix + "str is given")
+        self.assertEqual(
+            str(expected.exception), prefix + "str is not an instance of int"
+        )
+
+    def test_unsupported(self) -> None:
+        with self.assertRaises(ValueError):
+            generate_validator(
+                Argument("base", dict, [Argument("a", int, extra_check=bool)])
+            )
+        validator = load_validator(
+            Argument("base", dict, [Argument("a", int, extra_check=bool)]),
+            ignore_extra_check=True,
+        )
+        validator.check({"a": 0})
+        with self.assertRaises(ValueError):
+            generate_validator(Argument("base", dict, [Argument("a", Tuple[int])]))
+        with self.assertRaises(ValueError):
+            generate_validator(
+                Argument(
+                    "base",
+                    dict,
+                    [Argument("a", float, optional=True, default=float("inf"))],
+                )
+            )
+
+    def test_standalone(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "validator.py").write_text(
+                generate_validator(gen_test_argument())
+            )
+            code = (
+                "import sys; sys.modules['dargs'] = None; import validator; "
+                "print(validator.normalize({'type': 't2', 'b': 1j, 'rep': []})['lst'])"
+            )
+            result = subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=tmpdir,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        self.assertEqual(result.stdout.strip(), "[1, 2]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import unittest
 
 from dargs import Argument, Variant
+from dargs.dargs import defer_dtype
 
 
 class TestCreation(unittest.TestCase):
@@ -283,6 +284,46 @@ class TestCreation(unittest.TestCase):
         with self.assertRaises((KeyError, ValueError)):
             ca.I["base[type3][vnt3_flag3=v3f2t2]/v3f2t2_1"]
 
+    def test_defer_dtype(self) -> None:
+        def build() -> Argument:
+            ca = Argument("base", dict)
+            ca.add_subfield("sub1", int, optional=True, default=1)
+            ca.add_subfield("sub2", [int, None], optional=True, default={})
+            rows = ca.add_subfield("rows", None, optional=True, default=[])
+            rows.set_repeat()
+            rows.add_subfield("row", str)
+            vnt = ca.add_subvariant("vnt_flag")
+            for ii in range(3):
+                vnt.add_choice(f"type{ii}", alias=[f"t{ii}"]).add_subfield(
+                    f"vnt{ii}", float, optional=True, default=0
+                )
+            return ca
+
+        ref = build()
+        with defer_dtype():
+            with defer_dtype():
+                ca = build()
+            # nothing reorganized until the outermost context exits
+            self.assertEqual(ca["sub1"].dtype, ())
+        self.assertTrue(ca == ref)
+        self.assertEqual(set(ca["rows"].dtype), {type(None), list})
+        self.assertEqual(set(ca["sub2"].dtype), {int, type(None), dict})
+        # the same as created at once, whatever the order of the changes
+        with defer_dtype():
+            rows = Argument("rows", None, optional=True, default=[])
+            rows.add_subfield("row", str)
+            rows.set_repeat()
+        self.assertTrue(rows == ca["rows"])
+        # duplicated names are still found at once
+        with defer_dtype():
+            with self.assertRaises(ValueError):
+                ca.add_subfield("sub1", int)
+            with self.assertRaises(ValueError):
+                ca["[type1]"].add_subfield("vnt1", int)
+            vnt = Variant("vnt_flag", [Argument("type0", dict, alias=["a"])])
+            with self.assertRaises(ValueError):
+                vnt.add_choice("type1", alias=["vnt_flag"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import unittest
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    from typing import Literal
+except ImportError:
+    from typing_extensions import Literal
+
+from dargs import Argument, ArgumentDecoder, ArgumentEncoder, Variant
+from dargs.dargs import _format_dtype, _parse_dtype
+
+from .dpmdargs import example_json_str, gen_args
+
+
+class TestDecoder(unittest.TestCase):
+    def test_dpmd(self) -> None:
+        args = gen_args()
+        jsonstr = json.dumps(args, cls=ArgumentEncoder)
+        decoded = json.loads(jsonstr, cls=ArgumentDecoder)
+        self.assertTrue(decoded == args)
+        data = json.loads(example_json_str)
+        self.assertEqual(
+            decoded.normalize_value(data, trim_pattern="_*"),
+            args.normalize_value(data, trim_pattern="_*"),
+        )
+        # the JSON written by older versions has no full types
+        legacy = json.loads(jsonstr)
+        _drop_key(legacy, "dtype")
+        legacy = json.loads(json.dumps(legacy), cls=ArgumentDecoder)
+        self.assertTrue(legacy == args)
+        # the types are kept in their order
+        self.assertEqual(decoded.gen_doc(), args.gen_doc())
+
+    def test_generics(self) -> None:
+        ca = Argument(
+            "base",
+            dict,
+            [
+                Argument("sel", List[int], alias=["sel_a"], doc="sel doc"),
+                Argument("map", Dict[str, List[Union[int, str]]], optional=True),
+                Argument("pair", [Tuple[int, ...], None], optional=True, default=None),
+                Argument("opt", [dict, None], optional=True, default={}),
+            ],
+            [
+                Variant(
+                    "type",
+                    [Argument("a", dict, fold_subdoc=True), Argument("b", dict)],
+                    optional=True,
+                    default_tag="b",
+                    doc="type doc",
+                )
+            ],
+        )
+        decoded = json.loads(json.dumps([ca], cls=ArgumentEncoder), cls=ArgumentDecoder)
+        self.assertTrue(decoded == [ca])
+        self.assertEqual(decoded[0]["sel"].alias, ("sel_a",))
+        self.assertEqual(decoded[0]["opt"].default, {})
+        self.assertTrue(decoded[0]["[a]"].fold_subdoc)
+        # other dicts are left to the given hook
+        self.assertEqual(
+            json.loads(
+                '[{"a": 1}]', cls=ArgumentDecoder, object_hook=lambda d: sorted(d)
+            ),
+            [["a"]],
+        )
+
+    def test_parse_dtype(self) -> None:
+        for dtype in [
+            int,
+            type(None),
+            List[int],
+            Dict[str, Any],
+            List[Optional[float]],
+            Tuple[int, ...],
+        ]:
+            with self.subTest(dtype=dtype):
+                self.assertEqual(_parse_dtype(_format_dtype(dtype)), dtype)
+        self.assertEqual(_parse_dtype("typing.List[int]"), List[int])
+        for bad in ["foo", "List[foo]", "__import__('os')", "List[", "int[int]"]:
+            with self.subTest(bad=bad):
+                with self.assertRaises(ValueError):
+                    _parse_dtype(bad)
+        # only the class of these is kept by Argument, which cannot be decoded
+        for dtype in [Literal["a", 1], Optional[Tuple[int, ...]]]:
+            with self.subTest(dtype=dtype):
+                with self.assertRaisesRegex(TypeError, "cannot encode type"):
+                    json.dumps(Argument("x", [dtype]), cls=ArgumentEncoder)
+
+
+def _drop_key(obj: Any, key: str) -> None:
+    if isinstance(obj, dict):
+        obj.pop(key, None)
+        for vv in obj.values():
+            _drop_key(vv, key)
+    elif isinstance(obj, list):
+        for vv in obj:
+            _drop_key(vv, key)
+
+
+if __name__ == "__main__":
+    unittest.main()
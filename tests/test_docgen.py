@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import io
 import json
 import unittest
 from typing import List
+from unittest import mock
 
 import dargs
 from dargs import Argument, ArgumentEncoder, Variant
@@ -262,6 +264,127 @@ class TestDocgen(unittest.TestCase):
         # with open("outr.rst", "w") as of:
         #     print(docstr, file=of)
 
+    def test_write_doc(self) -> None:
+        ca = Argument(
+            "base",
+            dict,
+            [
+                Argument(
+                    "sub1",
+                    dict,
+                    [Argument("subsub1", int, doc="line 1\n\n  \nline 2")],
+                    doc="sub doc",
+                ),
+            ],
+            [Variant("flag", [Argument("type1", dict, [Argument("sub2", str)])])],
+        )
+        expected = (
+            "base: \n"
+            "    | type: ``dict``\n"
+            "    | argument path: ``base``\n"
+            "\n"
+            "    sub1: \n"
+            "        | type: ``dict``\n"
+            "        | argument path: ``base/sub1``\n"
+            "\n"
+            "        sub doc\n"
+            "\n"
+            "        subsub1: \n"
+            "            | type: ``int``\n"
+            "            | argument path: ``base/sub1/subsub1``\n"
+            "\n"
+            "            line 1\n"
+            "\n"
+            "  \n"
+            "            line 2\n"
+            "\n"
+            "\n"
+            "    Depending on the value of *flag*, different sub args are accepted. \n"
+            "\n"
+            "    flag:\n"
+            "        | type: ``str`` (flag key)\n"
+            "        | argument path: ``base/flag`` \n"
+            "        | possible choices: type1\n"
+            "\n"
+            "\n"
+            "\n"
+            "\n"
+            "\n"
+            "    When *flag* is set to ``type1``: \n"
+            "\n"
+            "    sub2: \n"
+            "        | type: ``str``\n"
+            "        | argument path: ``base[type1]/sub2``\n"
+        )
+        self.assertEqual(ca.gen_doc(), expected)
+        for kwargs in ({}, {"make_anchor": True, "make_link": True}):
+            buff = io.StringIO()
+            ca.write_doc(buff, ["root"], **kwargs)
+            self.assertEqual(buff.getvalue(), ca.gen_doc(["root"], **kwargs))
+
+    def test_deep_nesting(self) -> None:
+        ca = Argument("leaf", int, doc="leaf doc")
+        for ii in range(100):
+            ca = Argument(f"node{ii}", dict, [ca])
+        lines = ca.gen_doc().split("\n")
+        self.assertIn(" " * 400 + "leaf: ", lines)
+        self.assertIn(" " * 404 + "leaf doc", lines)
+
+    def test_shared_subtree(self) -> None:
+        def gen_args(block: Argument | None = None) -> Argument:
+            def get_block() -> Argument:
+                if block is not None:
+                    return block
+                return Argument(
+                    "block",
+                    dict,
+                    [Argument("sub", int, optional=True, default=1, doc="sub doc")],
+                    [Variant("kind", [Argument("k1", dict), Argument("k2", dict)])],
+                    doc="block doc",
+                )
+
+            return Argument(
+                "base",
+                dict,
+                [get_block(), Argument("wrap", dict, [get_block()])],
+                [
+                    Variant(
+                        "type",
+                        [
+                            Argument("type1", dict, [get_block()]),
+                            Argument("type2", dict, [get_block()]),
+                        ],
+                    )
+                ],
+            )
+
+        block = gen_args().sub_fields["block"]
+        shared = gen_args(block)
+        copied = gen_args()
+        for kwargs in (
+            {},
+            {"make_anchor": True, "make_link": True},
+            {"make_anchor": True, "use_sphinx_domain": True},
+        ):
+            self.assertEqual(shared.gen_doc(**kwargs), copied.gen_doc(**kwargs))
+            self.assertEqual(
+                shared.gen_doc_body(["root"], **kwargs),
+                copied.gen_doc_body(["root"], **kwargs),
+            )
+        doc = shared.gen_doc(make_anchor=True)
+        self.assertIn("argument path: ``base[type2]/block/sub``", doc)
+        self.assertIn(".. _`base/wrap/block[k1]`: ", doc)
+        # the shared block is rendered once, and only its path changes
+        with mock.patch.object(
+            Argument,
+            "gen_doc_head",
+            autospec=True,
+            side_effect=Argument.gen_doc_head,
+        ) as gen_doc_head:
+            self.assertEqual(shared.gen_doc(), copied.gen_doc())
+        heads = [call.args[0].name for call in gen_doc_head.call_args_list]
+        self.assertEqual(heads.count("sub"), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import json
 import unittest
+from typing import Any
 
-from jsonschema import validate
+from jsonschema import ValidationError, validate
 
+from dargs import Argument, Variant
 from dargs.json_schema import _convert_types, generate_json_schema
 
 from .dpmdargs import example_json_str, gen_args
@@ -16,6 +18,65 @@ class TestJsonSchema(unittest.TestCase):
         schema = generate_json_schema(args)
         data = json.loads(example_json_str)
         validate(data, schema)
+        self.assertIn("$defs", schema)
+        schema = generate_json_schema(args, deduplicate=False)
+        self.assertNotIn("$defs", schema)
+        validate(data, schema)
+
+    def test_deduplicate(self) -> None:
+        def gen_block() -> Argument:
+            return Argument(
+                "block",
+                dict,
+                [Argument("sub", int, doc="sub doc")],
+                doc="block doc",
+            )
+
+        shared = gen_block()
+        args = Argument(
+            "base",
+            dict,
+            [
+                shared,
+                Argument("wrap", dict, [gen_block()]),
+                Argument("aliased", dict, [Argument("sub", str)], alias=["a1"]),
+            ],
+            [
+                Variant(
+                    "type",
+                    [
+                        Argument("type1", dict, [shared]),
+                        Argument("type2", dict, [shared], alias=["t2"]),
+                    ],
+                )
+            ],
+        )
+        schema = generate_json_schema(args)
+        self.assertEqual(list(schema["$defs"]), ["block", "aliased"])
+        self.assertEqual(schema["properties"]["block"], {"$ref": "#/$defs/block"})
+        self.assertEqual(
+            schema["properties"]["wrap"]["properties"]["block"],
+            {"$ref": "#/$defs/block"},
+        )
+        self.assertEqual(schema["properties"]["a1"], {"$ref": "#/$defs/aliased"})
+        # same schema once the references are expanded
+        expanded = _expand_refs(schema, schema.pop("$defs"))
+        self.assertEqual(
+            _sort_types(expanded),
+            _sort_types(generate_json_schema(args, deduplicate=False)),
+        )
+        schema = generate_json_schema(args)
+        data = {
+            "block": {"sub": 1},
+            "wrap": {"block": {"sub": 2}},
+            "a1": {"sub": "x"},
+            "type": "t2",
+        }
+        validate(data, schema)
+        data["type"] = "type2"
+        data["wrap"]["block"]["sub"] = "x"
+        with self.assertRaises(ValidationError):
+            validate(data, schema)
 
     def test_convert_types(self) -> None:
         self.assertEqual(_convert_types(int), "number")
@@ -28,3 +89,25 @@ class TestJsonSchema(unittest.TestCase):
         self.assertEqual(_convert_types(dict), "object")
         with self.assertRaises(ValueError):
             _convert_types(set)
+
+
+def _expand_refs(schema: Any, defs: dict) -> Any:
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _expand_refs(defs[schema["$ref"].split("/")[-1]], defs)
+        return {kk: _expand_refs(vv, defs) for kk, vv in schema.items()}
+    if isinstance(schema, list):
+        return [_expand_refs(vv, defs) for vv in schema]
+    return schema
+
+
+def _sort_types(schema: Any) -> Any:
+    # the order of types is not deterministic
+    if isinstance(schema, dict):
+        return {
+            kk: sorted(vv) if kk == "type" and isinstance(vv, list) else _sort_types(vv)
+            for kk, vv in schema.items()
+        }
+    if isinstance(schema, list):
+        return [_sort_types(vv) for vv in schema]
+    return schema
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from typing import List
+
+from dargs import Argument
+from dargs.check import check
+from dargs.dargs import ArgumentTypeError
+
+try:
+    import numpy as np
+except ImportError:
+    numpy_installed = False
+else:
+    numpy_installed = True
+
+
+@unittest.skipUnless(numpy_installed, "NumPy not installed")
+class TestNdarray(unittest.TestCase):
+    def setUp(self) -> None:
+        self.arg = Argument(
+            "base",
+            dict,
+            [
+                Argument("sel", List[int]),
+                Argument("weights", [List[float], None], optional=True),
+                Argument(
+                    "layers",
+                    list,
+                    [Argument("neuron", List[int])],
+                    repeat=True,
+                    optional=True,
+                ),
+            ],
+        )
+
+    def test_check(self) -> None:
+        value = {
+            "sel": np.arange(3),
+            "weights": np.ones(2, dtype=np.float32),
+            "layers": [{"neuron": np.array([10, 20], dtype=np.uint8)}] * 3,
+        }
+        self.arg.check_value(value, strict=True, allow_ndarray=True)
+        asyncio.run(self.arg.acheck_value(value, allow_ndarray=True))
+        # int arrays are accepted as List[float], not the other way
+        value["weights"] = np.arange(2)
+        self.arg.check({"base": value}, allow_ndarray=True)
+        cases = [
+            ("sel", np.ones(3)),
+            ("sel", np.zeros((2, 2), dtype=int)),
+            ("sel", np.array(["1"])),
+            ("weights", np.array([True])),
+        ]
+        for key, array in cases:
+            with self.subTest(key=key, array=array):
+                with self.assertRaises(ArgumentTypeError):
+                    self.arg.check_value({**value, key: array}, allow_ndarray=True)
+        with self.assertRaises(ArgumentTypeError):
+            self.arg.check_value(value)
+        # python lists still work, with and without the option
+        self.arg.check_value({"sel": [1, 2], "weights": [1, 2.0]}, allow_ndarray=True)
+        with self.assertRaises(ArgumentTypeError):
+            self.arg.check_value({"sel": [1, 2.0]})
+
+    def test_normalize(self) -> None:
+        value = {
+            "sel": np.arange(3),
+            "weights": np.ones((1, 2)),
+            "layers": [{"neuron": np.arange(2)}],
+        }
+        kept = self.arg.normalize_value(value)
+        self.assertIsInstance(kept["sel"], np.ndarray)
+        converted = self.arg.normalize_value(value, convert_ndarray=True)
+        self.assertEqual(converted["sel"], [0, 1, 2])
+        self.assertEqual(converted["layers"], [{"neuron": [0, 1]}])
+        # not accepted as List[float], left to the check
+        self.assertIsInstance(converted["weights"], np.ndarray)
+        self.assertIsInstance(value["sel"], np.ndarray)
+        self.assertEqual(
+            Argument("sel", List[int]).normalize_value(
+                np.arange(2), convert_ndarray=True
+            ),
+            [0, 1],
+        )
+        data = check(self.arg, {**value, "weights": None}, allow_ndarray=True)
+        self.assertIsInstance(data["layers"][0]["neuron"], np.ndarray)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import fnmatch
 import unittest
 
 from dargs import Argument, Variant
+from dargs.dargs import _trim_matcher, trim_by_pattern
 
 
 class TestNormalizer(unittest.TestCase):
@@ -60,6 +62,35 @@ class TestNormalizer(unittest.TestCase):
         self.assertDictEqual(end1, ref)
         self.assertTrue(end1 is beg)
 
+    def test_trim_patterns(self) -> None:
+        ca = Argument("base", dict, [Argument("sub", int), Argument("tmp", int)])
+        beg = {"sub": 1, "tmp": 2, "_c": 3, "#c": 4, "tmp_x": 5, "x?": 6}
+        self.assertDictEqual(
+            ca.normalize_value(beg, trim_pattern=["_*", "#*"]),
+            {"sub": 1, "tmp": 2, "tmp_x": 5, "x?": 6},
+        )
+        self.assertDictEqual(
+            ca.normalize_value(beg, trim_pattern=["_*", "tmp_?", "x[?]"]),
+            {"sub": 1, "tmp": 2, "#c": 4},
+        )
+        # reserved names are checked once per pattern, conflicts every time
+        for _ in range(2):
+            with self.assertRaises(ValueError) as cm:
+                ca.normalize_value(beg, trim_pattern=["_*", "tmp*"])
+            self.assertIn("tmp", str(cm.exception))
+        self.assertEqual(_trim_matcher(("_*", "#*")).allowed, {"sub", "tmp"})
+        # the same keys as fnmatch, including the fast path of prefixes
+        keys = ["", "_", "_a", "a_", "__", "_\n", "a*", "[a]", "ab", "a?"]
+        patterns = ["_*", "*", "a*", "a?*", "[_a]*", "*_", "a\\*", "a[*]"]
+        for pattern in patterns:
+            argdict = dict.fromkeys(keys)
+            trim_by_pattern(argdict, pattern)
+            self.assertEqual(
+                list(argdict),
+                [kk for kk in keys if not fnmatch.fnmatchcase(kk, pattern)],
+                msg=pattern,
+            )
+
     def test_combined(self) -> None:
         ca = Argument(
             "base",
@@ -204,6 +235,70 @@ class TestNormalizer(unittest.TestCase):
         data = json.loads(example_json_str)
         normalize(data)
 
+    def test_compact(self) -> None:
+        ca = Argument(
+            "base",
+            dict,
+            [
+                Argument("sub1", int, optional=True, default=1),
+                Argument("sub2", bool, optional=True, default=False, alias=["s2"]),
+                Argument(
+                    "sub3",
+                    dict,
+                    [Argument("ss1", int, optional=True, default=21)],
+                    optional=True,
+                    default={},
+                ),
+                Argument("sub4", list, optional=True, default=[1, 2]),
+            ],
+            [
+                Variant(
+                    "type",
+                    [
+                        Argument("a", dict, [Argument("x", int, optional=True)]),
+                        Argument("b", dict, [Argument("y", int)]),
+                    ],
+                    optional=True,
+                    default_tag="a",
+                )
+            ],
+        )
+        value = ca.normalize_value({})
+        self.assertEqual(ca.compact_value(value), {})
+        self.assertEqual(ca.compact({"base": value}), {"base": {}})
+        # the given value is not modified unless inplace
+        self.assertEqual(value["type"], "a")
+        cases = [
+            ({"sub1": 2, "sub2": True}, {"sub1": 2, "sub2": True}),
+            ({"sub1": True, "sub2": 0}, {"sub1": True, "sub2": 0}),
+            ({"sub1": 1.0, "sub4": [1, 2.0]}, {"sub1": 1.0, "sub4": [1, 2.0]}),
+            ({"sub3": {"ss1": 21}}, {"sub3": {}}),
+            ({"sub3": {"ss1": 22}}, {"sub3": {"ss1": 22}}),
+            ({"type": "a", "x": 3}, {"x": 3}),
+            ({"type": "b", "y": 3}, {"type": "b", "y": 3}),
+            ({"sub2": False, "s2": True}, {"sub2": False, "s2": True}),
+        ]
+        for beg, end in cases:
+            with self.subTest(beg=beg):
+                value = ca.normalize_value(beg)
+                compacted = ca.compact_value(value)
+                self.assertEqual(compacted, end)
+                self.assertEqual(ca.normalize_value(compacted), value)
+                self.assertIs(ca.compact_value(value, inplace=True), value)
+                self.assertEqual(value, end)
+
+    def test_compact_dpmd(self) -> None:
+        import json
+
+        from .dpmdargs import example_json_str, gen_args
+
+        args = gen_args()
+        value = args.normalize_value(json.loads(example_json_str), trim_pattern="_*")
+        compacted = args.compact_value(value)
+        self.assertLess(len(json.dumps(compacted)), len(json.dumps(value)))
+        self.assertEqual(args.normalize_value(compacted), value)
+        args.check_value(compacted)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -70,3 +70,73 @@ class TestNotebook(unittest.TestCase):
             <!ENTITY nbsp ' '>
             ]>"""
         ET.fromstring(magic + f"<html>{html}</html>")
+
+    def test_incremental(self) -> None:
+        from dargs.notebook import ArgumentData, print_html
+
+        test_arg = Argument(
+            "test",
+            dict,
+            [
+                Argument(
+                    "items",
+                    list,
+                    [Argument("value", int), Argument("nested", dict, optional=True)],
+                    repeat=True,
+                ),
+                Argument("values", list),
+            ],
+        )
+        jdata = {
+            "items": [{"value": ii, "nested": {"a": {"b": ii}}} for ii in range(250)],
+            "values": list(range(1000)),
+        }
+        magic = """<!DOCTYPE html [
+            <!ENTITY nbsp ' '>
+            ]>"""
+        html = print_html(jdata, test_arg)
+        ET.fromstring(magic + f"<html>{html}</html>")
+        self.assertIn("… 150 more items", html)
+        # the rest are left out
+        self.assertIn('"b":&nbsp;99', html)
+        self.assertNotIn('"b":&nbsp;100', html)
+        self.assertEqual(html.count("dargs-key dargs-key-1"), 100)
+        # plain lists are not limited
+        self.assertIn("&nbsp;&nbsp;999", html)
+        html = print_html(jdata, test_arg, max_items=None)
+        self.assertNotIn("more items", html)
+        self.assertEqual(html.count("dargs-key dargs-key-1"), 250)
+        html = print_html(jdata, test_arg, max_depth=2)
+        ET.fromstring(magic + f"<html>{html}</html>")
+        self.assertNotIn('"b"', html)
+        self.assertIn("{…}", html)
+        with self.assertRaises(ValueError):
+            print_html(jdata, test_arg, max_items=0)
+        # sub data are only built for what is displayed
+        argdata = ArgumentData(jdata, test_arg)
+        argdata.print_html(max_depth=1)
+        self.assertIsNone(argdata.subdata[0]._subdata)
+        self.assertEqual(len(argdata.subdata), 2)
+
+    def test_shared_docs(self) -> None:
+        from dargs.notebook import print_html
+
+        test_arg = Argument(
+            "test",
+            dict,
+            [
+                Argument(
+                    "items",
+                    list,
+                    [Argument("value", int, doc="Value of ``the`` item.")],
+                    repeat=True,
+                    doc="Items.",
+                ),
+            ],
+        )
+        jdata = {"items": [{"value": ii} for ii in range(50)]}
+        html = print_html(jdata, test_arg)
+        self.assertEqual(html.count("Value of"), 1)
+        self.assertIn('<span class="dargs-doc-code">the</span>', html)
+        self.assertEqual(html.count("dargs-key dargs-key-1"), 50)
+        self.assertIn(".dargs-codeblock:has(.dargs-key-1:hover) .dargs-doc-1", html)
@@ -7,8 +7,11 @@ import json
 import os
 import tempfile
 import unittest
+from unittest import mock
 
 from dargs import Argument
+from dargs import dargs as dargs_module
+from dargs.dargs import clear_ref_cache, set_ref_cache_size
 
 
 class TestRef(unittest.TestCase):
@@ -226,6 +229,189 @@ class TestRef(unittest.TestCase):
         self.assertEqual(result["base"]["sub1"], 7)
         self.assertEqual(result["base"]["sub2"], "inner")
 
+    def test_ref_json_pointer(self) -> None:
+        """A JSON pointer fragment selects a sub-dict of the referenced file."""
+        ref_path = self._write_json(
+            "ref_shared.json",
+            {
+                "descriptors": [{"sub1": 1}, {"sub1": 2, "sub2": "a/b"}],
+                "a/b": {"~c": {"sub1": 3, "sub2": "escaped"}},
+            },
+        )
+        ca = Argument(
+            "base",
+            dict,
+            [
+                Argument("sub1", int),
+                Argument("sub2", str, optional=True, default="default"),
+            ],
+        )
+        result = ca.normalize_value(
+            {"$ref": ref_path + "#/descriptors/1"}, allow_ref=True
+        )
+        self.assertEqual(result, {"sub1": 2, "sub2": "a/b"})
+        result = ca.normalize_value({"$ref": ref_path + "#/a~1b/~0c"}, allow_ref=True)
+        self.assertEqual(result, {"sub1": 3, "sub2": "escaped"})
+        with self.assertRaises(ValueError):
+            ca.normalize_value({"$ref": ref_path + "#/missing"}, allow_ref=True)
+        with self.assertRaises(ValueError):
+            # points to a list
+            ca.normalize_value({"$ref": ref_path + "#/descriptors"}, allow_ref=True)
+        with self.assertRaises(ValueError):
+            # fragment-only reference outside a referenced file
+            ca.normalize_value({"$ref": "#/descriptors/0"}, allow_ref=True)
+
+    def test_ref_relative_to_referencing_file(self) -> None:
+        """Paths in a referenced file are relative to that file."""
+        os.makedirs(self._tmpfile("shared"))
+        self._write_json(
+            os.path.join("shared", "inner.json"),
+            {"sub1": 5, "defaults": {"sub2": "inner"}},
+        )
+        self._write_json(
+            os.path.join("shared", "outer.json"),
+            {"$ref": "inner.json", "nested": {"$ref": "#/local"}, "local": {"x": 1}},
+        )
+        outer_path = self._tmpfile(os.path.join("shared", "outer.json"))
+        ca = Argument(
+            "base",
+            dict,
+            [
+                Argument("sub1", int),
+                Argument("nested", dict),
+            ],
+        )
+        cwd = os.getcwd()
+        try:
+            # make sure the paths are not resolved against the CWD
+            os.chdir(self._tmpdir)
+            result = ca.normalize_value(
+                {"$ref": os.path.join("shared", "outer.json")}, allow_ref=True
+            )
+            self.assertEqual(result["nested"], {"x": 1})
+            self.assertEqual(result["sub1"], 5)
+            ca.check_value({"$ref": outer_path}, allow_ref=True)
+        finally:
+            os.chdir(cwd)
+
+
+class TestRefCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.mkdtemp()
+        clear_ref_cache()
+
+    def tearDown(self) -> None:
+        import shutil
+
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+        set_ref_cache_size(128)
+        clear_ref_cache()
+
+    def _write_json(self, name: str, data: dict) -> str:
+        path = os.path.join(self._tmpdir, name)
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+    def _arg(self) -> Argument:
+        return Argument(
+            "base",
+            dict,
+            [
+                Argument(
+                    "systems",
+                    list,
+                    [
+                        Argument(
+                            "descriptor",
+                            dict,
+                            [
+                                Argument("rcut", float),
+                                Argument("sel", list, optional=True, default=[]),
+                            ],
+                        )
+                    ],
+                    repeat=True,
+                )
+            ],
+        )
+
+    def test_parsed_once(self) -> None:
+        """A file referenced many times is only parsed once."""
+        ref_path = self._write_json("descriptor.json", {"rcut": 6.0})
+        data = {"systems": [{"descriptor": {"$ref": ref_path}} for _ in range(50)]}
+        with mock.patch.object(
+            dargs_module, "_parse_ref", wraps=dargs_module._parse_ref
+        ) as parse:
+            result = self._arg().normalize_value(data, allow_ref=True)
+            self._arg().check_value(data, allow_ref=True)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(len(result["systems"]), 50)
+        for system in result["systems"]:
+            self.assertEqual(system["descriptor"], {"rcut": 6.0, "sel": []})
+
+    def test_copy_on_read(self) -> None:
+        """Modifying a loaded dict does not affect later loads."""
+        ref_path = self._write_json("nested.json", {"rcut": 6.0, "sel": [1, 2]})
+        loaded = dargs_module._load_ref(ref_path)
+        loaded["sel"].append(3)
+        loaded["rcut"] = 0.0
+        self.assertEqual(dargs_module._load_ref(ref_path), {"rcut": 6.0, "sel": [1, 2]})
+
+    def test_invalidated_on_change(self) -> None:
+        """A modified file is parsed again."""
+        ref_path = self._write_json("changed.json", {"rcut": 6.0})
+        self.assertEqual(dargs_module._load_ref(ref_path), {"rcut": 6.0})
+        self._write_json("changed.json", {"rcut": 12.0, "sel": [46]})
+        self.assertEqual(dargs_module._load_ref(ref_path), {"rcut": 12.0, "sel": [46]})
+
+    def test_prefetch(self) -> None:
+        """All distinct targets, including chained ones, are prefetched."""
+        inner = self._write_json("inner.json", {"rcut": 6.0})
+        paths = [
+            self._write_json(f"outer{ii}.json", {"$ref": inner}) for ii in range(4)
+        ]
+        data = {"systems": [{"descriptor": {"$ref": pp}} for pp in paths * 3]}
+        with mock.patch.object(
+            dargs_module, "_parse_ref", wraps=dargs_module._parse_ref
+        ) as parse:
+            dargs_module._prefetch_refs(data)
+            self.assertEqual(parse.call_count, 5)
+            result = self._arg().normalize_value(data, allow_ref=True)
+            self.assertEqual(parse.call_count, 5)
+        for system in result["systems"]:
+            self.assertEqual(system["descriptor"], {"rcut": 6.0, "sel": []})
+
+    def test_prefetch_errors_deferred(self) -> None:
+        """Errors of missing targets are raised during traversal as before."""
+        good = self._write_json("good.json", {"rcut": 6.0})
+        missing = os.path.join(self._tmpdir, "missing.json")
+        data = {
+            "systems": [
+                {"descriptor": {"$ref": good}},
+                {"descriptor": {"$ref": missing}},
+            ]
+        }
+        dargs_module._prefetch_refs(data)
+        with self.assertRaises(FileNotFoundError):
+            self._arg().check_value(data, allow_ref=True)
+
+    def test_disable_and_clear(self) -> None:
+        ref_path = self._write_json("disabled.json", {"rcut": 6.0})
+        with mock.patch.object(
+            dargs_module, "_parse_ref", wraps=dargs_module._parse_ref
+        ) as parse:
+            dargs_module._load_ref(ref_path)
+            clear_ref_cache()
+            dargs_module._load_ref(ref_path)
+            self.assertEqual(parse.call_count, 2)
+            set_ref_cache_size(0)
+            dargs_module._load_ref(ref_path)
+            dargs_module._load_ref(ref_path)
+            self.assertEqual(parse.call_count, 4)
+        with self.assertRaises(ValueError):
+            set_ref_cache_size(-1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from dargs import Argument
+
+try:
+    import sphinx  # noqa: F401
+except ImportError:
+    sphinx_installed = False
+else:
+    sphinx_installed = True
+
+
+@unittest.skipUnless(sphinx_installed, "Sphinx not installed")
+class TestSphinx(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.src = self.root / "src"
+        self.src.mkdir()
+        (self.src / "conf.py").write_text("extensions = ['dargs.sphinx']\n")
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def write_page(
+        self, name: str, text: str, func: str, module: str = "dargs.sphinx"
+    ) -> None:
+        path = self.src / f"{name}.rst"
+        path.write_text(
+            f"{text}\n{'=' * len(text)}\n\n"
+            f".. dargs::\n   :module: {module}\n   :func: {func}\n"
+        )
+        # make sure Sphinx sees the change even with a coarse mtime
+        mtime = time.time() + 10 * len(text)
+        os.utime(path, (mtime, mtime))
+
+    def build(self) -> int:
+        """Build the project and return the number of rendered arguments."""
+        from sphinx.application import Sphinx
+
+        with mock.patch.object(
+            Argument, "write_doc", autospec=True, side_effect=Argument.write_doc
+        ) as write_doc:
+            app = Sphinx(
+                str(self.src),
+                str(self.src),
+                str(self.root / "html"),
+                str(self.root / "doctrees"),
+                "html",
+                status=None,
+                warning=io.StringIO(),
+            )
+            app.build()
+        return write_doc.call_count
+
+    def test_rst_cache(self) -> None:
+        self.write_page("index", "Arguments", "_test_argument")
+        self.assertEqual(self.build(), 1)
+        # edit the text around the directive: the doc is read again,
+        # but the arguments are unchanged
+        self.write_page("index", "Arguments again", "_test_argument")
+        self.assertEqual(self.build(), 0)
+        html = (self.root / "html" / "index.html").read_text()
+        self.assertIn("Arguments again", html)
+        self.assertIn("test_variant_argument", html)
+        self.assertIn('id="argument:test/test_argument"', html)
+        # an upgrade of dargs generates it again
+        self.write_page("index", "Arguments upgraded", "_test_argument")
+        with mock.patch("dargs.sphinx.__version__", "upgraded"):
+            self.assertEqual(self.build(), 1)
+        # other arguments are generated
+        self.write_page("index", "Other arguments", "test_arguments", "dargs._test")
+        self.assertEqual(self.build(), 4)
+
+    def test_parallel_build(self) -> None:
+        # with a single CPU, "auto" builds serially, so also force two processes
+        for jobs in ("auto", "2"):
+            with self.subTest(jobs=jobs):
+                self.check_parallel_build(jobs)
+
+    def check_parallel_build(self, jobs: str) -> None:
+        from sphinx.cmd.build import build_main
+
+        npages = 8
+        (self.src / "schema.py").write_text(
+            "from dargs import Argument\n\n"
+            + "".join(
+                f"def page{ii}():\n"
+                f"    return Argument('arg{ii}', dict, [Argument('sub', int)])\n\n"
+                for ii in range(npages)
+            )
+        )
+        (self.src / "conf.py").write_text(
+            "import os, sys\n"
+            "sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))\n"
+            "extensions = ['dargs.sphinx']\n"
+        )
+        for ii in range(npages):
+            self.write_page(f"page{ii}", f"Page {ii}", f"page{ii}", "schema")
+        (self.src / "index.rst").write_text(
+            "Index\n=====\n\n.. toctree::\n\n"
+            + "".join(f"   page{ii}\n" for ii in range(npages))
+            + "\n"
+            + "".join(
+                f"* :dargs:argument:`arg{ii}/sub <arg{ii}/sub>`\n"
+                for ii in range(npages)
+            )
+        )
+        out = self.root / f"html-{jobs}"
+        warnings = out / "warnings.txt"
+        args = ["-j", jobs, "-q", "-w", str(warnings), "-b", "html"]
+        args += [str(self.src), str(out)]
+        self.assertEqual(build_main(args), 0)
+        html = (out / "index.html").read_text()
+        for ii in range(npages):
+            self.assertIn(f'href="page{ii}.html#argument:arg{ii}/sub"', html)
+        # arguments of a document read again are not duplicated
+        self.write_page("page1", "Page 1 again", "page1", "schema")
+        self.assertEqual(build_main(args), 0)
+        self.assertNotIn("Duplicated", warnings.read_text())
+        # stale arguments are removed
+        self.write_page("page2", "Page 2 again", "page1", "schema")
+        self.assertEqual(build_main(args), 0)
+        self.assertIn("Duplicated", warnings.read_text())
+        html = (out / "index.html").read_text()
+        self.assertNotIn('href="page2.html#argument:arg2/sub"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
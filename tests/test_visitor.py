@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import unittest
+from typing import Callable
+from unittest import mock
+
+from dargs import Argument, ArgumentVisitor, Variant
+from dargs.dargs import ArgumentKeyError, ArgumentTypeError
+
+from .dpmdargs import example_json_str, gen_args
+
+
+class TestVisitor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.arg = Argument(
+            "base",
+            dict,
+            [Argument("sub1", int), Argument("sub2", str, optional=True)],
+            [
+                Variant(
+                    "type",
+                    [Argument("a", dict, [Argument("x", int)]), Argument("b", dict)],
+                )
+            ],
+        )
+
+    def test_order(self) -> None:
+        calls = []
+
+        def hook(name: str) -> Callable:
+            return lambda a, d, p: calls.append(
+                (name, getattr(a, "name", getattr(a, "flag_name", None)), list(p))
+            )
+
+        visitor = ArgumentVisitor(
+            key_hooks=[hook("key1")],
+            sub_hooks=[hook("sub1"), hook("sub2")],
+        )
+        visitor.add(key_hook=hook("key2"), value_hook=hook("value"))
+        visitor.add(variant_hook=hook("variant"))
+        visitor.visit(self.arg, {"base": {"sub1": 1, "type": "a", "x": 2}})
+        self.assertEqual(
+            calls,
+            [
+                ("key1", "base", []),
+                ("key2", "base", []),
+                ("value", "base", []),
+                ("sub1", "base", ["base"]),
+                ("sub2", "base", ["base"]),
+                ("variant", "type", ["base"]),
+                ("key1", "sub1", ["base"]),
+                ("key2", "sub1", ["base"]),
+                ("value", "sub1", ["base"]),
+                ("key1", "sub2", ["base"]),
+                ("key2", "sub2", ["base"]),
+                ("key1", "type", ["base"]),
+                ("key2", "type", ["base"]),
+                ("value", "type", ["base"]),
+                ("key1", "x", ["base"]),
+                ("key2", "x", ["base"]),
+                ("value", "x", ["base"]),
+            ],
+        )
+
+    def test_checker(self) -> None:
+        seen = []
+        visitor = ArgumentVisitor.checker(strict=True).add(
+            value_hook=lambda a, v, p: seen.append(a.name)
+        )
+        visitor.visit_value(self.arg, {"sub1": 1, "type": "b"})
+        self.assertEqual(seen, ["sub1", "type"])
+        with self.assertRaises(ArgumentKeyError):
+            visitor.visit_value(self.arg, {"sub1": 1, "type": "b", "y": 1})
+        with self.assertRaises(ArgumentTypeError):
+            visitor.visit_value(self.arg, {"sub1": "1", "type": "b"})
+        # the same as check_value
+        args = gen_args()
+        data = args.normalize_value(json.loads(example_json_str), trim_pattern="_*")
+        ArgumentVisitor.checker(strict=True).visit_value(args, data)
+        del data["training"]["numb_steps"]
+        with self.assertRaises(ArgumentKeyError):
+            ArgumentVisitor.checker().visit_value(args, data)
+
+    def test_one_traversal(self) -> None:
+        value = {"sub1": 1, "type": "a", "x": 2}
+        with mock.patch.object(
+            Argument, "flatten_sub", autospec=True, side_effect=Argument.flatten_sub
+        ) as spy:
+            ArgumentVisitor.checker(strict=True).visit_value(self.arg, value)
+            expected = spy.call_count
+            spy.reset_mock()
+            # extra hooks do not flatten the variants again
+            ArgumentVisitor.checker(strict=True).add(
+                key_hook=lambda a, d, p: None, sub_hook=lambda a, d, p: None
+            ).visit_value(self.arg, value)
+        self.assertEqual(spy.call_count, expected)
+
+    def test_kept_path(self) -> None:
+        ca = Argument(
+            "base",
+            dict,
+            [Argument("items", list, [Argument("n", int)], repeat=True)],
+        )
+        value = {"items": [{"n": 1}, {"n": 2}]}
+        expected = [[], ["items", 0], ["items", 1]]
+        # hooks may keep the path they are given
+        kept = []
+        ca.traverse_value(value, sub_hook=lambda a, d, p: kept.append(p))
+        self.assertEqual(kept, expected)
+        kept = []
+        ArgumentVisitor.checker().add(
+            sub_hook=lambda a, d, p: kept.append(p)
+        ).visit_value(ca, value)
+        self.assertEqual(kept, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()